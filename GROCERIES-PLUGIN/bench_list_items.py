@@ -0,0 +1,108 @@
+# bench_list_items.py
+# Compara memoria y tiempo de las formas de listar GroceryItem sobre una BD
+# SQLite de prueba (no toca la de bbdd.env):
+#
+#   python bench_list_items.py              # 1.000.000 filas
+#   python bench_list_items.py --rows 100000
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_items.db")
+# antes de importar database.py: load_dotenv no pisa variables ya definidas
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+from sqlalchemy import select, func, insert  # noqa: E402
+
+from database import Base, engine, SessionLocal  # noqa: E402
+from db_models import GroceryItem  # noqa: E402
+import crud  # noqa: E402
+
+
+def preparar(rows: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        if db.scalar(select(func.count()).select_from(GroceryItem)) == rows:
+            return
+        db.execute(GroceryItem.__table__.delete())
+        bloque = 50_000
+        for ini in range(0, rows, bloque):
+            db.execute(
+                insert(GroceryItem),
+                [{"item_name": f"item-{i:07d}", "quantity": i % 50 + 1} for i in range(ini, min(ini + bloque, rows))],
+            )
+        db.commit()
+
+
+def orm_completo() -> int:
+    # lo que hacía GET /items: objetos ORM + lista + respuesta JSON entera
+    with SessionLocal() as db:
+        items = db.execute(select(GroceryItem)).scalars().all()
+        cuerpo = json.dumps({"items": [
+            {"item_id": i.id, "item_name": i.item_name, "quantity": i.quantity} for i in items
+        ]})
+    return len(cuerpo)
+
+
+def tuplas_completo() -> int:
+    # GET /items sin parámetros ahora: columnas en vez de objetos ORM
+    with SessionLocal() as db:
+        cuerpo = json.dumps({"items": crud.todos(db)})
+    return len(cuerpo)
+
+
+def paginas() -> int:
+    # GET /items?limit=1000 recorriendo todas las páginas con el cursor
+    total = 0
+    after = None
+    with SessionLocal() as db:
+        while True:
+            items, after = crud.listar(db, crud.LIST_LIMIT_MAX, "id", after)
+            total += len(json.dumps({"items": items, "next": after}))
+            if after is None:
+                return total
+
+
+def ndjson() -> int:
+    # GET /items?format=ndjson
+    return sum(len(t) for t in crud.ndjson())
+
+
+CASOS = [
+    ("orm (antes)", orm_completo),
+    ("tuplas", tuplas_completo),
+    ("keyset x1000", paginas),
+    ("ndjson stream", ndjson),
+]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark del listado de items")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    t = time.perf_counter()
+    preparar(args.rows)
+    print(f"{args.rows} filas listas en {time.perf_counter() - t:.1f}s ({DB_PATH})\n")
+
+    print(f"{'caso':<16}{'tiempo s':>10}{'pico MB':>10}{'bytes':>14}")
+    for nombre, fn in CASOS:
+        # tiempo sin tracemalloc (lo ralentiza); memoria en una segunda pasada
+        t = time.perf_counter()
+        tam = fn()
+        seg = time.perf_counter() - t
+
+        tracemalloc.start()
+        fn()
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(f"{nombre:<16}{seg:>10.2f}{pico / 1e6:>10.1f}{tam:>14}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
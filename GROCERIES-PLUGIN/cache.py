@@ -0,0 +1,205 @@
+# cache.py
+# Cache-aside en Redis delante de las lecturas de GroceryItem.
+# Si Redis no está configurado o no responde, todo sigue yendo a SQL.
+import json
+import logging
+import os
+import time
+from typing import Iterable
+
+from dotenv import load_dotenv
+
+try:
+    import redis
+except ImportError:  # sin la librería: sin caché
+    redis = None
+
+load_dotenv("bbdd.env")
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL", "")
+CACHE_TTL = int(os.getenv("CACHE_TTL", "300"))
+CACHE_PREFIX = os.getenv("CACHE_PREFIX", "grocery")
+# tras un fallo de Redis no se vuelve a intentar hasta pasados estos segundos
+CACHE_REINTENTO = float(os.getenv("CACHE_REINTENTO", "30"))
+CACHE_TIMEOUT = float(os.getenv("CACHE_TIMEOUT", "0.2"))
+CACHE_STATS = os.getenv("CACHE_STATS", "1") == "1"
+
+
+class ItemCache:
+    """
+    - {prefix}:item:{id}      -> un item (JSON)
+    - {prefix}:items:version  -> versión del listado (INCR en cada escritura)
+    - {prefix}:items:v{n}     -> listado completo de esa versión (JSON)
+
+    Al escribir se borra la clave del item y se sube la versión: el listado
+    viejo deja de leerse y caduca solo por TTL, y el item lo vuelve a poner
+    la siguiente lectura. (Guardar el valor escrito no vale: dos escrituras
+    pueden llegar a Redis al revés que a la BD.) Lo que se rellena
+    desde SQL (item o listado) solo se guarda si la versión no ha cambiado
+    desde antes de leer. Si una escritura no llega a Redis, la caché no se
+    usa hasta que haya caducado todo lo anterior (ttl).
+    """
+
+    def __init__(self, client=None, ttl: int = CACHE_TTL, prefix: str = CACHE_PREFIX):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self.errores = 0
+        self._caido_hasta = 0.0
+
+    @classmethod
+    def desde_env(cls) -> "ItemCache":
+        if not REDIS_URL or redis is None:
+            return cls(client=None)
+        client = redis.Redis.from_url(
+            REDIS_URL,
+            socket_timeout=CACHE_TIMEOUT,
+            socket_connect_timeout=CACHE_TIMEOUT,
+            decode_responses=True,
+        )
+        return cls(client=client)
+
+    # --- claves ---
+
+    def _k_item(self, item_id: int) -> str:
+        return f"{self.prefix}:item:{item_id}"
+
+    def _k_version(self) -> str:
+        return f"{self.prefix}:items:version"
+
+    def _k_lista(self, version: int) -> str:
+        return f"{self.prefix}:items:v{version}"
+
+    # --- acceso a Redis con vuelta a SQL ---
+
+    @property
+    def activa(self) -> bool:
+        return self.client is not None and time.monotonic() >= self._caido_hasta
+
+    def _fallo(self, e: Exception, segundos: float = CACHE_REINTENTO) -> None:
+        self.errores += 1
+        self._desactivar(segundos)
+        logger.warning("Redis no disponible (%s); se usa SQL durante %ss", e, segundos)
+
+    def _desactivar(self, segundos: float) -> None:
+        # nunca acorta un desvío más largo que ya hubiera
+        self._caido_hasta = max(self._caido_hasta, time.monotonic() + segundos)
+
+    def _contar(self, hit: bool) -> None:
+        if not CACHE_STATS:
+            return
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def _version(self) -> int:
+        return int(self.client.get(self._k_version()) or 0)
+
+    def get_item(self, item_id: int) -> dict | None:
+        if not self.activa:
+            return None
+        try:
+            raw = self.client.get(self._k_item(item_id))
+        except Exception as e:
+            self._fallo(e)
+            return None
+        self._contar(raw is not None)
+        return json.loads(raw) if raw is not None else None
+
+    def set_item(self, item: dict, version: int | None) -> None:
+        """
+        Como set_items, pero la clave del item no lleva versión: la comprobación
+        y el SET van en una transacción (WATCH) para que una escritura que llegue
+        entre medias no quede pisada por la fila vieja.
+        """
+        if not self.activa or version is None:
+            return
+        try:
+            with self.client.pipeline() as pipe:
+                pipe.watch(self._k_version())
+                if int(pipe.get(self._k_version()) or 0) != version:
+                    return
+                pipe.multi()
+                pipe.set(self._k_item(item["item_id"]), json.dumps(item), ex=self.ttl)
+                pipe.execute()
+        except Exception as e:
+            if redis is not None and isinstance(e, redis.WatchError):
+                return  # alguien ha escrito justo ahora: no se guarda
+            self._fallo(e)
+
+    def get_items(self) -> list[dict] | None:
+        if not self.activa:
+            return None
+        try:
+            raw = self.client.get(self._k_lista(self._version()))
+        except Exception as e:
+            self._fallo(e)
+            return None
+        self._contar(raw is not None)
+        return json.loads(raw) if raw is not None else None
+
+    def set_items(self, items: list[dict], version: int | None) -> None:
+        """`version` es la leída antes de ir a SQL: si ha cambiado entre medias, no se guarda."""
+        if not self.activa or version is None:
+            return
+        try:
+            if self._version() == version:
+                self.client.set(self._k_lista(version), json.dumps(items), ex=self.ttl)
+        except Exception as e:
+            self._fallo(e)
+
+    def version(self) -> int | None:
+        if not self.activa:
+            return None
+        try:
+            return self._version()
+        except Exception as e:
+            self._fallo(e)
+            return None
+
+    def item_cambiado(self, item: dict) -> None:
+        """Alta, cambio de cantidad o borrado: fuera el item y el listado."""
+        self.lote([item["item_id"]])
+
+    def item_borrado(self, item_id: int) -> None:
+        self.lote([item_id])
+
+    def lote(self, item_ids: Iterable[int]) -> None:
+        """Varios items invalidados en un solo viaje a Redis, con una sola subida de versión."""
+        if self.client is None:
+            return
+        if not self.activa:
+            # Redis ya estaba caído: esta escritura no se invalida allí, así que
+            # lo que quede guardado no se lee hasta que caduque
+            self._desactivar(self.ttl)
+            return
+        try:
+            pipe = self.client.pipeline()
+            claves = [self._k_item(i) for i in item_ids]
+            if claves:
+                pipe.delete(*claves)
+            pipe.incr(self._k_version())
+            pipe.execute()
+        except Exception as e:
+            # sin invalidar, el item y el listado de Redis pueden estar viejos hasta el ttl
+            self._fallo(e, max(CACHE_REINTENTO, self.ttl))
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "enabled": self.client is not None,
+            "available": self.activa,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else None,
+            "errors": self.errores,
+            "ttl": self.ttl,
+        }
+
+
+item_cache = ItemCache.desde_env()
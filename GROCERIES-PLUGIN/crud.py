@@ -0,0 +1,227 @@
+# crud.py
+# Cambios de cantidad hechos en la propia BD (upsert / decremento atómicos),
+# sin leer el item, modificarlo en Python y volver a guardarlo.
+import json
+
+from sqlalchemy import select, update, delete, case, func
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from db_models import GroceryItem
+
+# listado: tamaño máximo de página, filas por bloque del cursor y bytes por trozo NDJSON
+LIST_LIMIT_MAX = 1000
+STREAM_YIELD_PER = 1000
+STREAM_CHUNK_BYTES = 64 * 1024
+
+_COLUMNAS = (GroceryItem.id, GroceryItem.item_name, GroceryItem.quantity)
+_cadena_json = json.JSONEncoder(ensure_ascii=False).encode
+
+
+class CambioConcurrente(Exception):
+    """El item cambia sin parar mientras se le resta cantidad (el endpoint responde 409)."""
+
+
+def _es_mysql(db: Session) -> bool:
+    return db.get_bind().dialect.name in ("mysql", "mariadb")
+
+
+def _upsert(db: Session, filas: list[dict]):
+    """
+    INSERT ... que suma la cantidad si el item_name ya existe, o None si el
+    dialecto no tiene upsert (entonces se lee y se escribe, ver _sumar_leyendo).
+    """
+    nombre = db.get_bind().dialect.name
+    if nombre in ("mysql", "mariadb"):
+        stmt = mysql.insert(GroceryItem).values(filas)
+        # LAST_INSERT_ID(id): lastrowid devuelve el id también cuando actualiza
+        return stmt.on_duplicate_key_update(
+            id=func.last_insert_id(GroceryItem.id),
+            quantity=GroceryItem.quantity + stmt.inserted.quantity,
+        )
+    if nombre in ("postgresql", "sqlite"):
+        dialecto = postgresql if nombre == "postgresql" else sqlite
+        stmt = dialecto.insert(GroceryItem).values(filas)
+        return stmt.on_conflict_do_update(
+            index_elements=[GroceryItem.item_name],
+            set_={"quantity": GroceryItem.quantity + stmt.excluded.quantity},
+        )
+    return None
+
+
+def _sumar_leyendo(db: Session, cambios: dict[str, int]) -> None:
+    """
+    Sin upsert: SELECT ... FOR UPDATE de los que ya existen, se suman en
+    Python y se dan de alta los demás (el camino de antes). Un alta a la vez
+    con el mismo nombre sigue chocando con el unique de item_name.
+    """
+    existentes = {
+        i.item_name: i
+        for i in db.scalars(
+            select(GroceryItem).where(GroceryItem.item_name.in_(cambios)).with_for_update()
+        )
+    }
+    for nombre, cantidad in cambios.items():
+        item = existentes.get(nombre)
+        if item is None:
+            db.add(GroceryItem(item_name=nombre, quantity=cantidad))
+        else:
+            item.quantity += cantidad
+    db.flush()
+
+
+def _items(db: Session, *condiciones) -> list[dict]:
+    rows = db.execute(
+        select(GroceryItem.id, GroceryItem.item_name, GroceryItem.quantity).where(*condiciones)
+    ).all()
+    return [{"item_id": r.id, "item_name": r.item_name, "quantity": r.quantity} for r in rows]
+
+
+def sumar(db: Session, item_name: str, quantity: int) -> dict:
+    """Alta o suma de cantidad en una sola sentencia. No hace commit."""
+    stmt = _upsert(db, [{"item_name": item_name, "quantity": quantity}])
+    if stmt is None:
+        _sumar_leyendo(db, {item_name: quantity})
+        return _items(db, GroceryItem.item_name == item_name)[0]
+    if _es_mysql(db):
+        # MySQL no tiene RETURNING: se lee por id dentro de la misma transacción
+        item_id = db.execute(stmt).lastrowid
+        return _items(db, GroceryItem.id == item_id)[0]
+    r = db.execute(
+        stmt.returning(GroceryItem.id, GroceryItem.item_name, GroceryItem.quantity)
+    ).one()
+    return {"item_id": r.id, "item_name": r.item_name, "quantity": r.quantity}
+
+
+def restar(db: Session, item_id: int, quantity: int) -> dict | None:
+    """
+    Resta `quantity` y devuelve el item como queda (quantity 0 si se ha
+    borrado porque quedaba `quantity` o menos) o None si no existe. No hace commit.
+    """
+    # si entre el UPDATE y el DELETE alguien suma cantidad, no se borra nada
+    # y se vuelve a intentar
+    for _ in range(3):
+        stmt = (
+            update(GroceryItem)
+            .where(GroceryItem.id == item_id, GroceryItem.quantity > quantity)
+            .values(quantity=GroceryItem.quantity - quantity)
+        )
+        if _es_mysql(db):
+            if db.execute(stmt).rowcount:
+                return _items(db, GroceryItem.id == item_id)[0]
+        else:
+            r = db.execute(
+                stmt.returning(GroceryItem.id, GroceryItem.item_name, GroceryItem.quantity)
+            ).one_or_none()
+            if r is not None:
+                return {"item_id": r.id, "item_name": r.item_name, "quantity": r.quantity}
+
+        borrado = db.execute(
+            delete(GroceryItem).where(GroceryItem.id == item_id, GroceryItem.quantity <= quantity)
+        ).rowcount
+        if borrado:
+            return {"item_id": item_id, "quantity": 0}
+        if db.get(GroceryItem, item_id) is None:
+            return None
+    raise CambioConcurrente(f"No se pudo restar cantidad del item {item_id}: cambia sin parar")
+
+
+def sumar_lote(db: Session, cambios: dict[str, int]) -> list[dict]:
+    """Suma varias cantidades por nombre con un único INSERT multi-fila. No hace commit."""
+    stmt = _upsert(db, [{"item_name": n, "quantity": q} for n, q in cambios.items()])
+    if stmt is None:
+        _sumar_leyendo(db, cambios)
+    else:
+        db.execute(stmt)
+    return _items(db, GroceryItem.item_name.in_(cambios))
+
+
+def restar_lote(db: Session, cambios: dict[int, int]) -> tuple[list[dict], list[int], list[int]]:
+    """
+    Resta varias cantidades por id: un UPDATE con CASE para todo el lote y
+    un DELETE de los que se quedan a 0 o menos. No hace commit.
+
+    Devuelve (items que quedan, ids borrados, ids que no existen).
+    """
+    db.execute(
+        update(GroceryItem)
+        .where(GroceryItem.id.in_(cambios))
+        .values(quantity=GroceryItem.quantity - case(cambios, value=GroceryItem.id))
+    )
+    items = _items(db, GroceryItem.id.in_(cambios))
+    borrados = [i["item_id"] for i in items if i["quantity"] <= 0]
+    if borrados:
+        db.execute(delete(GroceryItem).where(GroceryItem.id.in_(borrados), GroceryItem.quantity <= 0))
+    encontrados = {i["item_id"] for i in items}
+    no_existen = [i for i in cambios if i not in encontrados]
+    return [i for i in items if i["quantity"] > 0], borrados, no_existen
+
+
+def _select_listado(order_by: str, after, prefix: str | None):
+    """SELECT de columnas (sin objetos ORM) ordenado por id o item_name, ambos indexados."""
+    col = GroceryItem.item_name if order_by == "item_name" else GroceryItem.id
+    stmt = select(*_COLUMNAS).order_by(col)
+    if prefix:
+        # LIKE 'prefix%' con % y _ escapados: usa el índice de item_name
+        stmt = stmt.where(GroceryItem.item_name.startswith(prefix, autoescape=True))
+    if after is not None:
+        stmt = stmt.where(col > after)
+    return stmt
+
+
+def listar(
+    db: Session,
+    limit: int,
+    order_by: str = "id",
+    after=None,
+    prefix: str | None = None,
+) -> tuple[list[dict], object]:
+    """
+    Una página por keyset: `after` es el último id (o item_name) de la
+    página anterior. Devuelve (items, cursor de la siguiente o None).
+    """
+    rows = db.execute(_select_listado(order_by, after, prefix).limit(limit + 1)).all()
+    items = [{"item_id": r.id, "item_name": r.item_name, "quantity": r.quantity} for r in rows[:limit]]
+    siguiente = None
+    if len(rows) > limit:
+        siguiente = items[-1]["item_name" if order_by == "item_name" else "item_id"]
+    return items, siguiente
+
+
+def todos(db: Session) -> list[dict]:
+    return [
+        {"item_id": r.id, "item_name": r.item_name, "quantity": r.quantity}
+        for r in db.execute(select(*_COLUMNAS).order_by(GroceryItem.id))
+    ]
+
+
+def ndjson(order_by: str = "id", prefix: str | None = None):
+    """
+    Generador de trozos NDJSON con todo el listado. Cursor de servidor en
+    bloques de STREAM_YIELD_PER filas: la memoria no crece con la tabla.
+    Abre su propia sesión porque se sigue consumiendo después del endpoint.
+    """
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            _select_listado(order_by, None, prefix).execution_options(yield_per=STREAM_YIELD_PER)
+        )
+        trozo = []
+        tam = 0
+        for filas in result.partitions():
+            # la línea se arma a mano: solo el nombre necesita codificarse como JSON
+            bloque = "".join([
+                f'{{"item_id": {id_}, "item_name": {_cadena_json(nombre)}, "quantity": {cantidad}}}\n'
+                for id_, nombre, cantidad in filas
+            ])
+            trozo.append(bloque)
+            tam += len(bloque)
+            if tam >= STREAM_CHUNK_BYTES:
+                yield "".join(trozo).encode("utf-8")
+                trozo = []
+                tam = 0
+        if trozo:
+            yield "".join(trozo).encode("utf-8")
+    finally:
+        db.close()
@@ -1,47 +1,114 @@
-from fastapi import FastAPI, HTTPException, Depends
+from typing import Literal
+
+from fastapi import FastAPI, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import select
 
 from database import Base, engine, get_db
 from db_models import GroceryItem
+from models import BatchAdd, BatchRemove
+from cache import item_cache
+import crud
 
 app = FastAPI()
 Base.metadata.create_all(bind=engine)
 
+def item_dict(item: GroceryItem) -> dict:
+    return {"item_id": item.id, "item_name": item.item_name, "quantity": item.quantity}
+
 @app.post("/items/{item_name}/{quantity}")
 def add_item(item_name: str, quantity: int, db: Session = Depends(get_db)):
     if quantity <= 0:
         raise HTTPException(status_code=400, detail="Quantity must be greater than 0.")
 
-    # buscar por nombre
-    item = db.execute(select(GroceryItem).where(GroceryItem.item_name == item_name)).scalar_one_or_none()
+    # alta o suma en la BD de una vez (sin carrera con el unique de item_name)
+    data = crud.sumar(db, item_name, quantity)
+    db.commit()
+    item_cache.item_cambiado(data)
+    return {"item": data}
+
+@app.post("/items/batch")
+def add_items_batch(payload: BatchAdd, db: Session = Depends(get_db)):
+    cambios: dict[str, int] = {}
+    for i in payload.items:
+        if i.quantity <= 0:
+            raise HTTPException(status_code=400, detail="Quantity must be greater than 0.")
+        # el mismo nombre dos veces en el lote se suma antes de ir a la BD
+        cambios[i.item_name] = cambios.get(i.item_name, 0) + i.quantity
+
+    items = crud.sumar_lote(db, cambios)
+    db.commit()
+    item_cache.lote(i["item_id"] for i in items)
+    return {"items": items}
 
-    if item:
-        item.quantity += quantity
-    else:
-        item = GroceryItem(item_name=item_name, quantity=quantity)
-        db.add(item)
+@app.delete("/items/batch")
+def remove_items_batch(payload: BatchRemove, db: Session = Depends(get_db)):
+    cambios: dict[int, int] = {}
+    for i in payload.items:
+        if i.quantity <= 0:
+            raise HTTPException(status_code=400, detail="Quantity must be greater than 0.")
+        cambios[i.item_id] = cambios.get(i.item_id, 0) + i.quantity
 
+    items, borrados, no_existen = crud.restar_lote(db, cambios)
+    if no_existen:
+        # todo o nada: si falta alguno no se aplica ningún cambio del lote
+        db.rollback()
+        raise HTTPException(status_code=404, detail=f"Items not found: {no_existen}")
     db.commit()
-    db.refresh(item)
-    return {"item": {"item_id": item.id, "item_name": item.item_name, "quantity": item.quantity}}
+    item_cache.lote([*(i["item_id"] for i in items), *borrados])
+    return {"items": items, "deleted": borrados}
+
+@app.get("/cache/stats")
+def cache_stats():
+    return item_cache.stats()
 
 @app.get("/items/{item_id}")
 def list_item(item_id: int, db: Session = Depends(get_db)):
-    item = db.get(GroceryItem, item_id)
-    if not item:
-        raise HTTPException(status_code=404, detail="Item not found.")
-    return {"item": {"item_id": item.id, "item_name": item.item_name, "quantity": item.quantity}}
+    data = item_cache.get_item(item_id)
+    if data is None:
+        # como el listado: versión antes de leer, para no cachear una fila que ya ha cambiado
+        version = item_cache.version()
+        item = db.get(GroceryItem, item_id)
+        if not item:
+            raise HTTPException(status_code=404, detail="Item not found.")
+        data = item_dict(item)
+        item_cache.set_item(data, version)
+    return {"item": data}
 
 @app.get("/items")
-def list_items(db: Session = Depends(get_db)):
-    items = db.execute(select(GroceryItem)).scalars().all()
-    return {
-        "items": [
-            {"item_id": i.id, "item_name": i.item_name, "quantity": i.quantity}
-            for i in items
-        ]
-    }
+def list_items(
+    limit: int | None = Query(None, ge=1, le=crud.LIST_LIMIT_MAX),
+    order_by: Literal["id", "item_name"] = "id",
+    after: str | None = None,
+    prefix: str | None = None,
+    format: Literal["json", "ndjson"] = "json",
+    db: Session = Depends(get_db),
+):
+    if format == "ndjson":
+        # todo el listado línea a línea, sin cargarlo entero en memoria
+        db.close()
+        return StreamingResponse(crud.ndjson(order_by, prefix), media_type="application/x-ndjson")
+
+    if limit is not None or after is not None or prefix:
+        cursor = None
+        if after is not None and order_by == "id":
+            try:
+                cursor = int(after)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="'after' must be an item_id when order_by=id.")
+        elif after is not None:
+            cursor = after
+        items, next_cursor = crud.listar(db, limit or crud.LIST_LIMIT_MAX, order_by, cursor, prefix)
+        return {"items": items, "next": next_cursor}
+
+    # sin parámetros: el listado completo de siempre (cacheado en Redis)
+    items = item_cache.get_items()
+    if items is None:
+        # versión antes de leer: si alguien escribe mientras, no se cachea un listado viejo
+        version = item_cache.version()
+        items = crud.todos(db)
+        item_cache.set_items(items, version)
+    return {"items": items}
 
 @app.delete("/items/{item_id}")
 def delete_item(item_id: int, db: Session = Depends(get_db)):
@@ -50,23 +117,26 @@ def delete_item(item_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Item not found.")
     db.delete(item)
     db.commit()
+    item_cache.item_borrado(item_id)
     return {"result": "Item deleted."}
 
 @app.delete("/items/{item_id}/{quantity}")
 def remove_quantity(item_id: int, quantity: int, db: Session = Depends(get_db)):
-    item = db.get(GroceryItem, item_id)
-    if not item:
-        raise HTTPException(status_code=404, detail="Item not found.")
-
     if quantity <= 0:
         raise HTTPException(status_code=400, detail="Quantity must be greater than 0.")
 
-    if item.quantity <= quantity:
-        db.delete(item)
-        db.commit()
+    # resta (o borra si no queda nada) en la BD, sin leer antes el item
+    try:
+        data = crud.restar(db, item_id, quantity)
+    except crud.CambioConcurrente:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Item is being modified concurrently, try again.")
+    if data is None:
+        raise HTTPException(status_code=404, detail="Item not found.")
+    db.commit()
+
+    if data["quantity"] == 0:
+        item_cache.item_borrado(item_id)
         return {"result": "Item deleted."}
-    else:
-        item.quantity -= quantity
-        db.commit()
-        db.refresh(item)
-        return {"result": f"{quantity} items removed.", "remaining": item.quantity}
+    item_cache.item_cambiado(data)
+    return {"result": f"{quantity} items removed.", "remaining": data["quantity"]}
@@ -1,7 +1,24 @@
 from typing import Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 class ItemPayload(BaseModel):
     item_id: Optional[int]
     item_name: str
     quantity: int
+
+# lotes: como mucho BATCH_MAX cambios por petición
+BATCH_MAX = 1000
+
+class BatchAddItem(BaseModel):
+    item_name: str
+    quantity: int
+
+class BatchRemoveItem(BaseModel):
+    item_id: int
+    quantity: int
+
+class BatchAdd(BaseModel):
+    items: list[BatchAddItem] = Field(min_length=1, max_length=BATCH_MAX)
+
+class BatchRemove(BaseModel):
+    items: list[BatchRemoveItem] = Field(min_length=1, max_length=BATCH_MAX)
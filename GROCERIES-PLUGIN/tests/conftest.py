@@ -0,0 +1,44 @@
+# conftest.py
+# La app contra una SQLite temporal y la caché contra fakeredis:
+#
+#   pip install -r requirements.txt
+#   python -m pytest tests
+import os
+import sys
+import tempfile
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+# antes de importar database.py: load_dotenv no pisa variables ya definidas
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'tests.db')}"
+os.environ["REDIS_URL"] = ""
+
+import fakeredis  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from database import Base, engine  # noqa: E402
+from cache import ItemCache  # noqa: E402
+import main  # noqa: E402
+
+
+@pytest.fixture
+def servidor():
+    """El 'Redis' de fakeredis; servidor.connected = False lo tira."""
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def cache(servidor, monkeypatch):
+    c = ItemCache(client=fakeredis.FakeRedis(server=servidor, decode_responses=True), ttl=60)
+    monkeypatch.setattr(main, "item_cache", c)
+    return c
+
+
+@pytest.fixture
+def client(cache):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with TestClient(main.app) as c:
+        yield c
@@ -0,0 +1,192 @@
+# test_cache.py
+# Cache-aside de cache.py a través de los endpoints de main.py.
+import time
+
+
+def _alta(client, nombre="leche", cantidad=2) -> dict:
+    return client.post(f"/items/{nombre}/{cantidad}").json()["item"]
+
+
+def _en_redis(cache, item_id):
+    return cache.client.get(cache._k_item(item_id))
+
+
+# --- item ---
+
+def test_item_fallo_y_acierto(client, cache):
+    item = _alta(client)
+    cache.client.delete(cache._k_item(item["item_id"]))
+
+    assert client.get(f"/items/{item['item_id']}").json() == {"item": item}
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert _en_redis(cache, item["item_id"]) is not None
+
+    assert client.get(f"/items/{item['item_id']}").json() == {"item": item}
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_item_inexistente_no_se_cachea(client, cache):
+    assert client.get("/items/999").status_code == 404
+    assert _en_redis(cache, 999) is None
+
+
+def test_relleno_viejo_no_pisa_una_escritura(client, cache):
+    item = _alta(client)
+    # lector: versión y fila leídas antes de que llegue la escritura
+    version = cache.version()
+    viejo = dict(item)
+
+    client.post("/items/leche/3")
+    cache.set_item(viejo, version)
+
+    assert client.get(f"/items/{item['item_id']}").json()["item"]["quantity"] == 5
+
+
+def test_relleno_viejo_no_resucita_un_borrado(client, cache):
+    item = _alta(client)
+    version = cache.version()
+
+    client.delete(f"/items/{item['item_id']}")
+    cache.set_item(item, version)
+
+    assert _en_redis(cache, item["item_id"]) is None
+    assert client.get(f"/items/{item['item_id']}").status_code == 404
+
+
+# --- listado ---
+
+def test_listado_por_version(client, cache):
+    _alta(client, "leche")
+    v = cache.version()
+
+    primero = client.get("/items").json()["items"]
+    assert cache.misses == 1
+    assert cache.client.get(cache._k_lista(v)) is not None
+    assert client.get("/items").json()["items"] == primero
+    assert cache.hits == 1
+
+    _alta(client, "pan")
+    assert cache.version() == v + 1
+    nombres = [i["item_name"] for i in client.get("/items").json()["items"]]
+    assert nombres == ["leche", "pan"]
+    assert cache.misses == 2
+
+
+def test_listado_viejo_no_se_guarda(client, cache):
+    _alta(client)
+    version = cache.version()
+    _alta(client, "pan")
+
+    cache.set_items([{"item_id": 1, "item_name": "leche", "quantity": 2}], version)
+    assert cache.client.get(cache._k_lista(version)) is None
+
+
+# --- invalidación en cada escritura ---
+
+def test_alta_borra_item_y_sube_version(client, cache):
+    item = _alta(client)
+    client.get(f"/items/{item['item_id']}")
+    v = cache.version()
+    client.post("/items/leche/3")
+
+    assert cache.version() == v + 1
+    assert _en_redis(cache, item["item_id"]) is None
+    assert client.get(f"/items/{item['item_id']}").json()["item"]["quantity"] == 5
+    assert '"quantity": 5' in _en_redis(cache, item["item_id"])
+
+
+def test_escrituras_al_reves_no_dejan_un_valor_viejo(client, cache):
+    item = _alta(client)
+    # dos escrituras confirmadas en la BD (2 -> 5 -> 8) cuya invalidación
+    # llega a Redis en orden contrario
+    client.post("/items/leche/3")
+    despues = client.post("/items/leche/3").json()["item"]
+    cache.item_cambiado(despues)
+    cache.item_cambiado({**despues, "quantity": 5})
+
+    assert _en_redis(cache, item["item_id"]) is None
+    assert client.get(f"/items/{item['item_id']}").json()["item"]["quantity"] == 8
+
+
+def test_restar_actualiza_y_borra(client, cache):
+    item = _alta(client, cantidad=3)
+    v = cache.version()
+
+    client.get(f"/items/{item['item_id']}")
+    client.delete(f"/items/{item['item_id']}/1")
+    assert _en_redis(cache, item["item_id"]) is None
+    assert client.get(f"/items/{item['item_id']}").json()["item"]["quantity"] == 2
+
+    client.delete(f"/items/{item['item_id']}/2")
+    assert _en_redis(cache, item["item_id"]) is None
+    assert cache.version() == v + 2
+
+
+def test_borrar_quita_el_item(client, cache):
+    item = _alta(client)
+    client.get("/items")
+    v = cache.version()
+
+    client.delete(f"/items/{item['item_id']}")
+    assert _en_redis(cache, item["item_id"]) is None
+    assert cache.version() == v + 1
+    assert client.get("/items").json()["items"] == []
+
+
+def test_lotes_invalidan_una_vez(client, cache):
+    v = cache.version()
+    items = client.post("/items/batch", json={"items": [
+        {"item_name": "leche", "quantity": 1}, {"item_name": "pan", "quantity": 2},
+    ]}).json()["items"]
+    assert cache.version() == v + 1
+    for i in items:
+        client.get(f"/items/{i['item_id']}")
+    assert all(_en_redis(cache, i["item_id"]) is not None for i in items)
+
+    pan = next(i for i in items if i["item_name"] == "pan")
+    client.request("DELETE", "/items/batch", json={"items": [{"item_id": pan["item_id"], "quantity": 2}]})
+    assert cache.version() == v + 2
+    assert _en_redis(cache, pan["item_id"]) is None
+    leche = next(i for i in items if i["item_name"] == "leche")
+    assert _en_redis(cache, leche["item_id"]) is not None  # no estaba en el lote
+
+
+# --- Redis caído ---
+
+def test_sin_redis_se_lee_de_sql(client, cache, servidor):
+    item = _alta(client)
+    servidor.connected = False
+
+    assert client.get(f"/items/{item['item_id']}").json() == {"item": item}
+    assert client.get("/items").json()["items"] == [item]
+    assert cache.errores == 1
+    assert not cache.activa
+    assert client.get("/cache/stats").json()["available"] is False
+
+
+def test_fallo_al_invalidar_desvia_la_cache_un_ttl(client, cache, servidor):
+    item = _alta(client)
+    client.get("/items")
+
+    servidor.connected = False
+    client.post("/items/leche/3")
+    servidor.connected = True
+
+    # Redis vuelve con el item y el listado viejos: no se leen hasta que caduquen
+    assert not cache.activa
+    assert cache._caido_hasta >= time.monotonic() + cache.ttl - 1
+    assert client.get(f"/items/{item['item_id']}").json()["item"]["quantity"] == 5
+    assert client.get("/items").json()["items"][0]["quantity"] == 5
+
+
+def test_escribir_con_la_cache_desviada_alarga_el_desvio(client, cache):
+    item = _alta(client)
+    client.get(f"/items/{item['item_id']}")
+    # desvío corto por un fallo de lectura cualquiera
+    cache._fallo(RuntimeError("timeout"), 1)
+
+    client.post("/items/leche/3")
+
+    assert cache._caido_hasta >= time.monotonic() + cache.ttl - 1
+    assert '"quantity": 2' in _en_redis(cache, item["item_id"])  # sigue viejo en Redis...
+    assert client.get(f"/items/{item['item_id']}").json()["item"]["quantity"] == 5  # ...pero no se lee
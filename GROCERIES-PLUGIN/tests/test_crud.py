@@ -0,0 +1,101 @@
+# test_crud.py
+# Upserts y restas de crud.py a través de los endpoints de main.py.
+import pytest
+from sqlalchemy import delete, false, select
+
+import crud
+from database import SessionLocal
+from db_models import GroceryItem
+
+
+def _alta(client, nombre="leche", cantidad=2) -> dict:
+    return client.post(f"/items/{nombre}/{cantidad}").json()["item"]
+
+
+def _en_bd() -> dict[str, int]:
+    """item_name -> quantity leídos directamente de la BD, sin pasar por la caché."""
+    with SessionLocal() as db:
+        return {n: q for n, q in db.execute(select(GroceryItem.item_name, GroceryItem.quantity))}
+
+
+@pytest.fixture(params=["upsert", "sin_upsert"])
+def dialecto(request, monkeypatch):
+    # sin_upsert: como un dialecto sin ON CONFLICT / ON DUPLICATE KEY (SELECT y después escribir)
+    if request.param == "sin_upsert":
+        monkeypatch.setattr(crud, "_upsert", lambda db, filas: None)
+    return request.param
+
+
+# --- sumar ---
+
+def test_alta_suma_al_mismo_nombre(client, dialecto):
+    primero = _alta(client, "leche", 2)
+    segundo = _alta(client, "leche", 3)
+
+    assert segundo == {"item_id": primero["item_id"], "item_name": "leche", "quantity": 5}
+    assert _en_bd() == {"leche": 5}
+
+
+def test_lote_suma_existentes_y_da_de_alta(client, dialecto):
+    leche = _alta(client, "leche", 2)
+    items = client.post("/items/batch", json={"items": [
+        {"item_name": "leche", "quantity": 1},
+        {"item_name": "pan", "quantity": 2},
+        {"item_name": "pan", "quantity": 3},
+    ]}).json()["items"]
+
+    por_nombre = {i["item_name"]: i for i in items}
+    assert por_nombre["leche"] == {"item_id": leche["item_id"], "item_name": "leche", "quantity": 3}
+    assert por_nombre["pan"]["quantity"] == 5
+    assert _en_bd() == {"leche": 3, "pan": 5}
+
+
+def test_lote_con_cantidad_no_valida_no_escribe(client):
+    r = client.post("/items/batch", json={"items": [
+        {"item_name": "leche", "quantity": 1}, {"item_name": "pan", "quantity": 0},
+    ]})
+    assert r.status_code == 400
+    assert _en_bd() == {}
+
+
+# --- restar ---
+
+def test_restar_lote_resta_y_borra(client):
+    leche = _alta(client, "leche", 3)
+    pan = _alta(client, "pan", 2)
+
+    r = client.request("DELETE", "/items/batch", json={"items": [
+        {"item_id": leche["item_id"], "quantity": 1}, {"item_id": pan["item_id"], "quantity": 5},
+    ]}).json()
+
+    assert r == {"items": [{**leche, "quantity": 2}], "deleted": [pan["item_id"]]}
+    assert _en_bd() == {"leche": 2}
+
+
+def test_restar_lote_todo_o_nada(client, cache):
+    leche = _alta(client, "leche", 3)
+    pan = _alta(client, "pan", 1)
+    version = cache.version()
+
+    r = client.request("DELETE", "/items/batch", json={"items": [
+        {"item_id": leche["item_id"], "quantity": 1},
+        {"item_id": pan["item_id"], "quantity": 1},
+        {"item_id": 999, "quantity": 1},
+    ]})
+
+    assert r.status_code == 404
+    assert "999" in r.json()["detail"]
+    # ni la resta de leche ni el borrado de pan se han quedado en la BD
+    assert _en_bd() == {"leche": 3, "pan": 1}
+    assert cache.version() == version
+
+
+def test_restar_con_el_item_cambiando_da_409(client, monkeypatch):
+    item = _alta(client, "leche", 2)
+    # el DELETE no encuentra nunca la fila: como si otro sumara cantidad entre el UPDATE y el DELETE
+    monkeypatch.setattr(crud, "delete", lambda tabla: delete(tabla).where(false()))
+
+    r = client.delete(f"/items/{item['item_id']}/5")
+
+    assert r.status_code == 409
+    assert _en_bd() == {"leche": 2}
@@ -0,0 +1,57 @@
+from collections import defaultdict
+
+ESTRATEGIAS = ("afinidad", "alfabetica")
+
+
+def repartir(alumnos: list[dict], vacantes: list[dict], estrategia: str = "afinidad") -> tuple[list[dict], list[dict]]:
+    """
+    Reparto automático de alumnos sin vacante en las vacantes con plazas libres.
+
+    Se agrupa todo por (id_ciclo, curso) y, dentro de cada grupo, los alumnos
+    se recorren por orden alfabético (apellidos, nombre, id_alumno). A cada
+    alumno se le da la primera vacante con plaza según:
+
+    - "afinidad": misma provincia que el alumno, luego misma zona que su
+      centro educativo, y a igualdad la de id_vacante más bajo.
+    - "alfabetica": solo por id_vacante.
+
+    Es determinista: con los mismos datos sale siempre el mismo reparto.
+    Devuelve (asignaciones, alumnos_sin_plaza).
+    """
+    libres = {v["id_vacante"]: int(v["num_vacantes"]) - int(v["ocupadas"]) for v in vacantes}
+
+    vacantes_por_grupo = defaultdict(list)
+    for v in sorted(vacantes, key=lambda v: v["id_vacante"]):
+        if libres[v["id_vacante"]] > 0:
+            vacantes_por_grupo[(int(v["id_ciclo"]), int(v["curso"]))].append(v)
+
+    def prioridad(alumno: dict, v: dict) -> tuple:
+        if estrategia == "alfabetica":
+            return (v["id_vacante"],)
+        misma_provincia = alumno["id_provincia"] is not None and alumno["id_provincia"] == v["id_provincia"]
+        misma_zona = alumno["id_zona_centro"] is not None and alumno["id_zona_centro"] == v["id_zona"]
+        return (not misma_provincia, not misma_zona, v["id_vacante"])
+
+    asignaciones = []
+    sin_plaza = []
+
+    orden = sorted(alumnos, key=lambda a: (a["apellidos"], a["nombre"], a["id_alumno"]))
+    for a in orden:
+        candidatas = vacantes_por_grupo.get((int(a["id_ciclo"]), int(a["curso"])))
+        if not candidatas:
+            sin_plaza.append(a)
+            continue
+
+        elegida = min(candidatas, key=lambda v: prioridad(a, v))
+        libres[elegida["id_vacante"]] -= 1
+        if libres[elegida["id_vacante"]] == 0:
+            candidatas.remove(elegida)
+
+        asignaciones.append({
+            "id_alumno": a["id_alumno"],
+            "alumno": f"{a['nombre']} {a['apellidos']}",
+            "id_vacante": elegida["id_vacante"],
+            "entidad": elegida["entidad"],
+        })
+
+    return asignaciones, sin_plaza
@@ -0,0 +1,164 @@
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+
+from app.db.session import SessionLocal
+from app.db.consultas import consultas
+from app.core.config import (
+    AUDITORIA_COLA_MAX,
+    AUDITORIA_LOTE,
+    AUDITORIA_INTERVALO_MS,
+    AUDITORIA_TIPO_LOG,
+    AUDITORIA_PARADA_S,
+)
+from app.core.metricas import metricas
+
+logger = logging.getLogger(__name__)
+
+# como mucho un aviso de cola llena cada tantos segundos
+AVISO_CADA_S = 30
+
+
+class Auditoria:
+    """
+    Registro de quién crea, cambia, asigna o borra qué, en sgi_logs.
+
+    - registrar() solo mete el evento en una cola en memoria (no toca la BD),
+      así que no añade latencia a los endpoints.
+    - Un hilo aparte vuelca la cola con INSERT multi-fila cada `lote` eventos
+      o cada `intervalo_ms`, lo que llegue antes.
+    - La cola está acotada: si se llena (BD caída o muy lenta) los eventos
+      nuevos se descartan y se cuentan, con aviso al log y en /metrics.
+    - Al parar se vuelca lo pendiente (hasta `AUDITORIA_PARADA_S` segundos).
+
+    Lo que se pierde si el proceso muere de golpe es como mucho lo que había
+    en la cola: es un registro de auditoría, no parte de la transacción.
+    """
+
+    def __init__(self, max_cola: int, lote: int, intervalo_ms: float, id_tipo_log: int):
+        self.lote = lote
+        self.intervalo = intervalo_ms / 1000
+        self.id_tipo_log = id_tipo_log
+        self._cola: queue.Queue[dict] = queue.Queue(maxsize=max_cola)
+        self._parar = threading.Event()
+        self._hilo: threading.Thread | None = None
+        self._ultimo_aviso = 0.0
+        self.encolados = 0
+        self.escritos = 0
+        self.descartados = 0
+        self.fallidos = 0
+
+    def registrar(
+        self,
+        user: dict | None,
+        accion: str,
+        entidad: str,
+        id: int | None = None,
+        **datos,
+    ) -> None:
+        """
+        Apunta un evento; `datos` va tal cual al contenido (ids relacionados,
+        antes/después...). Llamar después del commit.
+        """
+        contenido = {"accion": accion, "entidad": entidad, "id": id, **datos}
+        evento = {
+            "fecha": datetime.now().replace(microsecond=0),
+            "usuario": user["usuario"] if user else None,
+            "id_tipo_log": self.id_tipo_log,
+            # sgi_logs es latin1: JSON en ASCII para no perder tildes
+            "contenido": json.dumps(contenido, default=str, separators=(",", ":")),
+        }
+        try:
+            self._cola.put_nowait(evento)
+            self.encolados += 1
+        except queue.Full:
+            self.descartados += 1
+            ahora = time.monotonic()
+            if ahora - self._ultimo_aviso >= AVISO_CADA_S:
+                self._ultimo_aviso = ahora
+                logger.warning(
+                    "Cola de auditoría llena (%d): se descartan eventos (%d en total)",
+                    self._cola.maxsize, self.descartados,
+                )
+
+    def arrancar(self) -> None:
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        self._parar.clear()
+        self._hilo = threading.Thread(target=self._bucle, name="auditoria", daemon=True)
+        self._hilo.start()
+
+    def parar(self) -> None:
+        """Vuelca lo pendiente y para el hilo (desde el lifespan, al apagar)."""
+        if self._hilo is None:
+            return
+        self._parar.set()
+        self._hilo.join(timeout=AUDITORIA_PARADA_S)
+        if self._hilo.is_alive():
+            logger.warning("La auditoría no terminó de volcar en %ss: %d eventos sin escribir",
+                           AUDITORIA_PARADA_S, self._cola.qsize())
+        self._hilo = None
+
+    def _siguiente_lote(self) -> list[dict]:
+        """Espera al primer evento y junta más hasta `lote` o hasta que pase `intervalo`."""
+        try:
+            eventos = [self._cola.get(timeout=self.intervalo)]
+        except queue.Empty:
+            return []
+        limite = time.monotonic() + self.intervalo
+        while len(eventos) < self.lote:
+            # al parar no se espera: se coge lo que haya
+            restante = 0 if self._parar.is_set() else limite - time.monotonic()
+            try:
+                eventos.append(self._cola.get(timeout=restante) if restante > 0 else self._cola.get_nowait())
+            except queue.Empty:
+                break
+        return eventos
+
+    def _bucle(self) -> None:
+        while True:
+            eventos = self._siguiente_lote()
+            if eventos:
+                self._volcar(eventos)
+            elif self._parar.is_set():
+                return
+
+    def _volcar(self, eventos: list[dict]) -> None:
+        db = SessionLocal()
+        try:
+            # executemany: pymysql lo manda como un único INSERT ... VALUES (...), (...)
+            consultas.ejecutar(db, "logs.insertar", eventos)
+            db.commit()
+            self.escritos += len(eventos)
+        except Exception:
+            db.rollback()
+            self.fallidos += len(eventos)
+            logger.exception("No se pudieron escribir %d eventos de auditoría", len(eventos))
+        finally:
+            db.close()
+
+    def prometheus(self) -> list[str]:
+        return [
+            "# TYPE sge_audit_events_total counter",
+            f"sge_audit_events_total {self.encolados}",
+            "# TYPE sge_audit_written_total counter",
+            f"sge_audit_written_total {self.escritos}",
+            "# TYPE sge_audit_dropped_total counter",
+            f"sge_audit_dropped_total {self.descartados}",
+            "# TYPE sge_audit_failed_total counter",
+            f"sge_audit_failed_total {self.fallidos}",
+            "# TYPE sge_audit_queue_size gauge",
+            f"sge_audit_queue_size {self._cola.qsize()}",
+        ]
+
+
+auditoria = Auditoria(
+    max_cola=AUDITORIA_COLA_MAX,
+    lote=AUDITORIA_LOTE,
+    intervalo_ms=AUDITORIA_INTERVALO_MS,
+    id_tipo_log=AUDITORIA_TIPO_LOG,
+)
+metricas.colectores.append(auditoria.prometheus)
@@ -0,0 +1,241 @@
+import heapq
+import logging
+import math
+import threading
+import time
+import unicodedata
+from collections import Counter
+
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.db.consultas import consultas
+from app.core.config import BUSCADOR_TTL, BUSCADOR_SIMILITUD_MIN
+
+logger = logging.getLogger(__name__)
+
+def normalizar(texto: str | None) -> str:
+    """Minúsculas, sin tildes y solo letras/números ("Núñez-Pérez" -> "nunez perez")."""
+    if not texto:
+        return ""
+    sin_tildes = "".join(
+        c for c in unicodedata.normalize("NFKD", texto) if not unicodedata.combining(c)
+    )
+    return "".join(c if c.isalnum() else " " for c in sin_tildes.lower())
+
+
+def trigramas(texto: str) -> set[str]:
+    """Trigramas de cada palabra con un espacio delante y detrás (" ana " -> " an", "ana", "na ")."""
+    grams = set()
+    for palabra in texto.split():
+        p = f" {palabra} "
+        grams.update(p[i:i + 3] for i in range(len(p) - 2))
+    return grams
+
+
+def _texto_nif(nif: str | None) -> str:
+    # el NIF/NIE como una sola palabra: "12345678-Z" -> "12345678z"
+    return "".join(normalizar(nif).split())
+
+
+class BuscadorAlumnos:
+    """
+    Índice de trigramas en memoria para GET /alumnos/buscar.
+
+    - trigrama -> ids de alumno que lo contienen (nombre, apellidos y NIF/NIE)
+    - id_alumno -> datos que se devuelven (sin ir a BD al buscar)
+    - (id_ciclo, curso) -> ids, para filtrar dentro del índice
+
+    La puntuación es la fracción de trigramas de la búsqueda que tiene el
+    alumno: sin tildes ni mayúsculas y con tolerancia a erratas ("garcya"
+    encuentra "García"). Se construye entero al arrancar y cada `ttl`
+    segundos (cambios hechos por otros workers); los endpoints de alumnos lo
+    mantienen al día con poner() / quitar(). La reconstrucción la hace un
+    solo hilo y, mientras, se busca en el índice anterior; lo que se ponga o
+    quite durante la carga se repite sobre el nuevo.
+    """
+
+    def __init__(self, ttl: float, similitud_min: float):
+        self.ttl = ttl
+        self.similitud_min = similitud_min
+        self._por_trigrama: dict[str, set[int]] = {}
+        self._alumnos: dict[int, dict] = {}
+        self._num_trigramas: dict[int, int] = {}
+        self._por_ciclo_curso: dict[tuple[int, int], set[int]] = {}
+        self._cargado = 0.0
+        self._generacion = 0                             # cargas completas hechas (0: todavía ninguna)
+        self._pendientes: list[tuple] | None = None      # (id_alumno, alumno o None) durante la carga
+        # las búsquedas recorren los conjuntos: mientras, nadie los puede tocar
+        self._lock = threading.Lock()
+        self._recargando = threading.Lock()
+
+    @staticmethod
+    def _trigramas_alumno(a: dict) -> set[str]:
+        return trigramas(f"{normalizar(a['nombre'])} {normalizar(a['apellidos'])} {_texto_nif(a['nif_nie'])}")
+
+    def cargar(self, db: Session | None = None) -> None:
+        """Carga completa (al arrancar). Si hay otra en marcha, espera a que acabe."""
+        with self._recargando:
+            self._cargar(db)
+
+    def _cargar(self, db: Session | None) -> None:
+        # desde antes de leer: las altas, cambios y bajas que quizá no estén en la lectura
+        with self._lock:
+            self._pendientes = []
+        try:
+            propia = db is None
+            if propia:
+                db = SessionLocal()
+            try:
+                rows = consultas.ejecutar(db, "alumnos.para_buscador").mappings().all()
+            finally:
+                if propia:
+                    db.close()
+
+            # se construye aparte y se cambia de golpe, como el índice de entidades
+            por_trigrama: dict[str, set[int]] = {}
+            alumnos: dict[int, dict] = {}
+            num_trigramas: dict[int, int] = {}
+            por_ciclo_curso: dict[tuple[int, int], set[int]] = {}
+            for r in rows:
+                a = dict(r)
+                id_alumno = a["id_alumno"]
+                alumnos[id_alumno] = a
+                por_ciclo_curso.setdefault((a["id_ciclo"], a["curso"]), set()).add(id_alumno)
+                grams = self._trigramas_alumno(a)
+                num_trigramas[id_alumno] = len(grams)
+                for g in grams:
+                    por_trigrama.setdefault(g, set()).add(id_alumno)
+
+            with self._lock:
+                self._por_trigrama = por_trigrama
+                self._alumnos = alumnos
+                self._num_trigramas = num_trigramas
+                self._por_ciclo_curso = por_ciclo_curso
+                # en el mismo orden en que llegaron (unos pocos: solo los de la carga)
+                for id_alumno, a in self._pendientes:
+                    self._quitar(id_alumno)
+                    if a is not None:
+                        self._poner(a)
+                self._cargado = time.monotonic()
+                self._generacion += 1
+        finally:
+            with self._lock:
+                self._pendientes = None
+
+    def _vigente(self, db: Session) -> None:
+        if time.monotonic() - self._cargado < self.ttl:
+            return
+        # solo un hilo reconstruye; si ya hay índice, los demás no esperan y usan el de antes
+        if self._recargando.acquire(blocking=not self._generacion):
+            try:
+                if time.monotonic() - self._cargado >= self.ttl:
+                    self._cargar(db)
+            except Exception:
+                if not self._generacion:
+                    raise
+                logger.exception("No se pudo recargar el índice de búsqueda de alumnos; se sigue con el anterior")
+            finally:
+                self._recargando.release()
+
+    def _quitar(self, id_alumno: int) -> None:
+        anterior = self._alumnos.pop(id_alumno, None)
+        if anterior is None:
+            return
+        self._num_trigramas.pop(id_alumno, None)
+        self._por_ciclo_curso.get((anterior["id_ciclo"], anterior["curso"]), set()).discard(id_alumno)
+        for g in self._trigramas_alumno(anterior):
+            ids = self._por_trigrama.get(g)
+            if ids is not None:
+                ids.discard(id_alumno)
+                if not ids:
+                    del self._por_trigrama[g]
+
+    def _poner(self, a: dict) -> None:
+        self._alumnos[a["id_alumno"]] = a
+        self._por_ciclo_curso.setdefault((a["id_ciclo"], a["curso"]), set()).add(a["id_alumno"])
+        grams = self._trigramas_alumno(a)
+        self._num_trigramas[a["id_alumno"]] = len(grams)
+        for g in grams:
+            self._por_trigrama.setdefault(g, set()).add(a["id_alumno"])
+
+    def poner(self, alumno: dict) -> None:
+        """Alta o modificación (necesita id_alumno, nombre, apellidos, nif_nie, id_ciclo, curso)."""
+        a = {k: alumno[k] for k in ("id_alumno", "nombre", "apellidos", "nif_nie", "id_ciclo", "curso")}
+        with self._lock:
+            self._quitar(a["id_alumno"])
+            self._poner(a)
+            if self._pendientes is not None:
+                self._pendientes.append((a["id_alumno"], a))
+
+    def quitar(self, id_alumno: int) -> None:
+        with self._lock:
+            self._quitar(id_alumno)
+            if self._pendientes is not None:
+                self._pendientes.append((id_alumno, None))
+
+    def invalidar(self) -> None:
+        with self._lock:
+            self._cargado = 0.0
+
+    def _filtro(self, id_ciclo: int | None, curso: int | None) -> set[int] | None:
+        if id_ciclo is None and curso is None:
+            return None
+        ids = set()
+        for (c, k), grupo in self._por_ciclo_curso.items():
+            if (id_ciclo is None or c == id_ciclo) and (curso is None or k == curso):
+                ids |= grupo
+        return ids
+
+    def buscar(
+        self,
+        db: Session,
+        q: str,
+        limit: int = 10,
+        id_ciclo: int | None = None,
+        curso: int | None = None,
+    ) -> list[dict]:
+        self._vigente(db)
+
+        grams = trigramas(normalizar(q))
+        if not grams:
+            return []
+        # para llegar a la similitud mínima hay que tener al menos `minimo` trigramas
+        minimo = max(1, math.ceil(len(grams) * self.similitud_min))
+
+        with self._lock:
+            filtro = self._filtro(id_ciclo, curso)
+            listas = sorted((self._por_trigrama.get(g, set()) for g in grams), key=len)
+
+            # quien tenga `minimo` de los n trigramas está en alguno de los n-minimo+1
+            # menos frecuentes: solo esos son candidatos y el resto solo suma
+            corte = len(listas) - minimo + 1
+            cuentas = Counter()
+            for ids in listas[:corte]:
+                cuentas.update(ids if filtro is None else ids & filtro)
+            candidatos = cuentas.keys()
+            for ids in listas[corte:]:
+                cuentas.update(ids & candidatos)
+
+            # a igualdad de trigramas comunes, antes el que tiene menos de sobra
+            num = self._num_trigramas
+            mejores = heapq.nlargest(
+                limit,
+                ((n, i) for i, n in cuentas.items() if n >= minimo),
+                key=lambda x: (x[0], -num[x[1]]),
+            )
+            return [
+                {**self._alumnos[i], "puntuacion": round(n / len(grams), 3)}
+                for n, i in mejores
+            ]
+
+    def estado(self) -> dict:
+        with self._lock:
+            return {
+                "alumnos": len(self._alumnos),
+                "trigramas": len(self._por_trigrama),
+                "edad_s": round(time.monotonic() - self._cargado, 1),
+            }
+
+
+buscador_alumnos = BuscadorAlumnos(ttl=BUSCADOR_TTL, similitud_min=BUSCADOR_SIMILITUD_MIN)
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import threading
+import time
+
+from app.db.session import SessionLocal
+from app.db.consultas import consultas
+from app.core.config import CATALOGOS_TTL
+
+# catálogos disponibles; cada uno se carga con la consulta "catalogos.<nombre>" (app/db/consultas.py)
+CATALOGOS = (
+    "provincias", "ciclos", "centros", "entidades", "zonas", "tipos-entidad",
+    "modos-reunion", "motivos-reunion",
+)
+
+
+def _json(contenido) -> bytes:
+    # mismo formato que JSONResponse de Starlette
+    return json.dumps(contenido, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+class Catalogo:
+    """Un catálogo ya cargado: los datos, la respuesta serializada y su ETag."""
+
+    def __init__(self, data: list[dict]):
+        self.data = data
+        self.body = _json({"ok": True, "message": None, "data": data})
+        self.etag = _etag(self.body)
+        self.cargado = time.monotonic()
+
+
+class CacheCatalogos:
+    """
+    Tablas auxiliares (desplegables del frontend) en memoria.
+
+    Cada catálogo se carga la primera vez que se pide y se recarga cuando
+    pasan `ttl` segundos o con recargar(). Como la respuesta va ya
+    serializada, un 200 no vuelve a pasar por json y un 304 no toca MySQL.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._catalogos: dict[str, Catalogo] = {}
+        self._todos: tuple[tuple, bytes, str] | None = None
+        self._lock = threading.Lock()
+
+    def _cargar(self, nombre: str) -> Catalogo:
+        db = SessionLocal()
+        try:
+            rows = consultas.ejecutar(db, f"catalogos.{nombre}").mappings().all()
+        finally:
+            db.close()
+        return Catalogo([dict(r) for r in rows])
+
+    def get(self, nombre: str) -> Catalogo:
+        cat = self._catalogos.get(nombre)
+        if cat is not None and time.monotonic() - cat.cargado < self.ttl:
+            return cat
+
+        with self._lock:
+            # otro hilo puede haberlo recargado mientras esperábamos
+            cat = self._catalogos.get(nombre)
+            if cat is None or time.monotonic() - cat.cargado >= self.ttl:
+                cat = self._cargar(nombre)
+                self._catalogos[nombre] = cat
+            return cat
+
+    def todos(self) -> tuple[bytes, str]:
+        """Respuesta combinada de /catalogos/all (body, etag)."""
+        cats = {nombre: self.get(nombre) for nombre in CATALOGOS}
+        clave = tuple(c.etag for c in cats.values())
+
+        todos = self._todos
+        if todos is None or todos[0] != clave:
+            body = _json({"ok": True, "message": None, "data": {n: c.data for n, c in cats.items()}})
+            todos = (clave, body, _etag(body))
+            self._todos = todos
+
+        return todos[1], todos[2]
+
+    def recargar(self, nombre: str | None = None) -> None:
+        with self._lock:
+            nombres = [nombre] if nombre else list(CATALOGOS)
+            for n in nombres:
+                self._catalogos[n] = self._cargar(n)
+
+    def invalidar(self, *nombres: str) -> None:
+        """Se recargan de BD la próxima vez que se pidan (p.ej. después de crear una entidad)."""
+        with self._lock:
+            for n in nombres:
+                self._catalogos.pop(n, None)
+
+    def estado(self) -> dict:
+        ahora = time.monotonic()
+        return {
+            n: {"filas": len(c.data), "etag": c.etag, "edad_s": round(ahora - c.cargado, 1)}
+            for n, c in self._catalogos.items()
+        }
+
+
+catalogos_cache = CacheCatalogos(ttl=CATALOGOS_TTL)
@@ -0,0 +1,83 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()  # lee el .env
+
+# caché de tokens de sesión (app/core/security.py)
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", "60"))          # segundos que vale un token válido cacheado
+TOKEN_CACHE_NEG_TTL = float(os.getenv("TOKEN_CACHE_NEG_TTL", "5"))   # segundos que se recuerda un token inválido
+TOKEN_CACHE_MAX = int(os.getenv("TOKEN_CACHE_MAX", "1000"))          # nº máximo de tokens en memoria (LRU)
+
+# exportaciones CSV / NDJSON (app/core/exportar.py)
+EXPORT_CHUNK_BYTES = int(os.getenv("EXPORT_CHUNK_BYTES", "65536"))  # tamaño de cada trozo enviado al cliente
+EXPORT_YIELD_PER = int(os.getenv("EXPORT_YIELD_PER", "1000"))       # filas que se piden al cursor de servidor cada vez
+
+# importación masiva de alumnos (POST /alumnos/bulk)
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "500"))  # filas por executemany
+BULK_MAX_FILAS = int(os.getenv("BULK_MAX_FILAS", "5000"))   # filas máximas por petición
+
+# caché de catálogos (app/core/catalogos.py)
+CATALOGOS_TTL = float(os.getenv("CATALOGOS_TTL", "600"))        # segundos hasta recargar un catálogo de BD
+CATALOGOS_MAX_AGE = int(os.getenv("CATALOGOS_MAX_AGE", "60"))   # Cache-Control max-age para el navegador
+
+# índice de tipos de entidad (app/core/entidades_index.py)
+ENTIDADES_INDEX_TTL = float(os.getenv("ENTIDADES_INDEX_TTL", "600"))  # segundos hasta reconstruir el índice entero
+
+# instrumentación y /metrics (app/core/metricas.py)
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))          # a partir de aquí una sentencia SQL es "lenta"
+
+# pool de conexiones (app/db/session.py, app/db/pool.py)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))                # conexiones que se mantienen abiertas
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))          # extra en picos (se cierran al devolverse)
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))        # segundos esperando conexión antes de dar error
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))        # reabrir conexiones más viejas (wait_timeout de MySQL)
+DB_PRE_PING = os.getenv("DB_PRE_PING", "inactiva")                 # siempre | inactiva | nunca
+DB_PRE_PING_IDLE = float(os.getenv("DB_PRE_PING_IDLE", "30"))      # con "inactiva": ping solo si lleva más de esto sin usarse
+DB_POOL_WARMUP = int(os.getenv("DB_POOL_WARMUP", str(DB_POOL_SIZE)))  # conexiones que se abren al arrancar
+DB_POOL_SLOW_WAIT_MS = float(os.getenv("DB_POOL_SLOW_WAIT_MS", "100"))  # se avisa en el log si coger conexión tarda más
+
+# compresión de respuestas (app/middlewares/compresion.py)
+COMPRESION_MIN_BYTES = int(os.getenv("COMPRESION_MIN_BYTES", "1024"))  # por debajo no compensa comprimir
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))   # solo si está instalado brotli
+ZSTD_LEVEL = int(os.getenv("ZSTD_LEVEL", "3"))           # solo si está instalado zstandard
+
+# registro de consultas (app/db/consultas.py)
+EXPLAIN_AL_ARRANCAR = os.getenv("EXPLAIN_AL_ARRANCAR", "false").lower() in ("1", "true")  # EXPLAIN de todas al arrancar (avisos al log)
+
+# búsqueda de alumnos (app/core/buscador_alumnos.py)
+BUSCADOR_TTL = float(os.getenv("BUSCADOR_TTL", "600"))                     # segundos hasta reconstruir el índice entero
+BUSCADOR_SIMILITUD_MIN = float(os.getenv("BUSCADOR_SIMILITUD_MIN", "0.4"))  # fracción mínima de trigramas que deben coincidir
+BUSCADOR_MAX_RESULTADOS = int(os.getenv("BUSCADOR_MAX_RESULTADOS", "50"))   # tope de ?limit=
+
+# eventos en vivo de vacantes, GET /vacantes/stream (app/core/eventos.py)
+SSE_HEARTBEAT_S = float(os.getenv("SSE_HEARTBEAT_S", "15"))   # segundos sin eventos antes de mandar un ping
+SSE_COLA_MAX = int(os.getenv("SSE_COLA_MAX", "100"))          # eventos pendientes por cliente antes de desconectarlo
+SSE_HISTORIAL = int(os.getenv("SSE_HISTORIAL", "500"))        # eventos que se guardan para reenviar al reconectar
+
+# auditoría de cambios en sgi_logs (app/core/auditoria.py)
+AUDITORIA_COLA_MAX = int(os.getenv("AUDITORIA_COLA_MAX", "10000"))             # eventos pendientes antes de empezar a descartar
+AUDITORIA_LOTE = int(os.getenv("AUDITORIA_LOTE", "200"))                       # eventos por INSERT multi-fila
+AUDITORIA_INTERVALO_MS = float(os.getenv("AUDITORIA_INTERVALO_MS", "500"))     # se vuelca como mucho tras este tiempo
+AUDITORIA_TIPO_LOG = int(os.getenv("AUDITORIA_TIPO_LOG", "3"))                 # id_tipo_log en sgi_tipos_log ("Aplicacion")
+AUDITORIA_PARADA_S = float(os.getenv("AUDITORIA_PARADA_S", "5"))               # espera máxima al volcar lo pendiente al apagar
+
+# uso de opciones de menú, POST /uso/opciones (app/core/uso_opciones.py)
+USO_BUCKET_S = int(os.getenv("USO_BUCKET_S", "60"))                  # clics en la misma opción dentro de este cubo = una fila
+USO_INTERVALO_S = float(os.getenv("USO_INTERVALO_S", "10"))          # cada cuánto se vuelca a sgi_historico_opciones
+USO_MAX_PENDIENTES = int(os.getenv("USO_MAX_PENDIENTES", "5000"))    # se vuelca antes si hay tantas filas pendientes
+USO_LOTE = int(os.getenv("USO_LOTE", "500"))                         # filas por INSERT IGNORE
+USO_MAX_EVENTOS = int(os.getenv("USO_MAX_EVENTOS", "500"))           # eventos máximos por petición
+USO_MAX_ANTIGUEDAD_H = float(os.getenv("USO_MAX_ANTIGUEDAD_H", "24"))  # se descartan eventos más viejos (cola offline del cliente)
+USO_RESUMEN_TTL = float(os.getenv("USO_RESUMEN_TTL", "300"))         # segundos hasta recalcular GET /uso/opciones/resumen
+USO_RESUMEN_DIAS = int(os.getenv("USO_RESUMEN_DIAS", "30"))          # días de histórico que entran en el resumen
+
+# reuniones (app/routers/reuniones.py)
+REUNIONES_MAX_DIAS = int(os.getenv("REUNIONES_MAX_DIAS", "366"))  # rango máximo de GET /reuniones?desde=&hasta=
+
+# listados de entidades y contactos con facetas (app/core/facetas.py)
+FACETAS_TTL = float(os.getenv("FACETAS_TTL", "600"))                      # segundos hasta reconstruir los índices enteros
+FACETAS_MAX_RESULTADOS = int(os.getenv("FACETAS_MAX_RESULTADOS", "200"))  # tope de ?limit=
+
+# permisos por rol y menú, GET /menu (app/core/permisos.py)
+PERMISOS_TTL = float(os.getenv("PERMISOS_TTL", "300"))  # segundos hasta recargar la matriz de sgi_vista_rol_menu
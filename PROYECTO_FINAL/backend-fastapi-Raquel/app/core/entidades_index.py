@@ -0,0 +1,183 @@
+import logging
+import threading
+import time
+
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.db.consultas import consultas
+from app.core.config import ENTIDADES_INDEX_TTL
+
+logger = logging.getLogger(__name__)
+
+TIPO_CENTRO_EDUCATIVO = "CENTRO EDUCATIVO"
+
+
+def normalizar_tipo(nombre: str) -> str:
+    return " ".join(nombre.split()).upper()
+
+
+class IndiceEntidades:
+    """
+    Índice en memoria para las comprobaciones de tipo de entidad:
+
+    - id_entidad -> id_tipo_entidad
+    - nombre del tipo (normalizado) -> id_tipo_entidad
+    - id_motivo_nodual -> id_tipo_entidad (los motivos van ligados a un tipo)
+
+    Se construye entero al arrancar y cada `ttl` segundos. Las entidades que
+    no están (creadas después de la carga) se buscan en BD y se añaden, y
+    refrescar_entidad() / invalidar() sirven para cuando cambian.
+
+    Como las facetas: una sola recarga a la vez (los demás siguen con el
+    índice anterior) y lo leído de BD solo se guarda si nadie ha cambiado el
+    índice entre la lectura y el guardado.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._tipo_por_entidad: dict[int, int] = {}
+        self._tipo_por_nombre: dict[str, int] = {}
+        self._tipo_por_motivo: dict[int, int] = {}
+        self._cargado = 0.0
+        self._generacion = 0                      # cargas completas hechas (0: todavía ninguna)
+        self._cambios = 0                         # cargas completas + refrescos
+        self._pendientes: set[int] | None = None  # entidades refrescadas durante la carga en marcha
+        self._lock = threading.Lock()
+        self._recargando = threading.Lock()
+
+    def cargar(self, db: Session | None = None) -> None:
+        """Carga completa (al arrancar). Si hay otra en marcha, espera a que acabe."""
+        with self._recargando:
+            self._cargar(db)
+
+    def _cargar(self, db: Session | None) -> None:
+        propia = db is None
+        if propia:
+            db = SessionLocal()
+        try:
+            # desde antes de leer: los refrescos de entidades que quizá no estén en la lectura
+            with self._lock:
+                self._pendientes = set()
+            try:
+                entidades = consultas.ejecutar(db, "entidades.tipos_todas").all()
+                tipos = consultas.ejecutar(db, "tipos_entidad.todos").all()
+                motivos = consultas.ejecutar(db, "motivos_nodual.todos").all()
+
+                # se construye aparte y se cambia de golpe: los lectores nunca ven un índice a medias
+                with self._lock:
+                    self._tipo_por_entidad = {int(e): int(t) for e, t in entidades}
+                    self._tipo_por_nombre = {normalizar_tipo(n): int(t) for t, n in tipos}
+                    self._tipo_por_motivo = {int(m): int(t) for m, t in motivos}
+                    self._cargado = time.monotonic()
+                    self._generacion += 1
+                    self._cambios += 1
+            finally:
+                with self._lock:
+                    pendientes, self._pendientes = self._pendientes, None
+            if pendientes:
+                self.refrescar_entidades(db, pendientes)
+        finally:
+            if propia:
+                db.close()
+
+    def _vigente(self, db: Session) -> None:
+        if time.monotonic() - self._cargado < self.ttl:
+            return
+        # solo un hilo reconstruye; si ya hay índice, los demás no esperan y usan el de antes
+        if self._recargando.acquire(blocking=not self._generacion):
+            try:
+                if time.monotonic() - self._cargado >= self.ttl:
+                    self._cargar(db)
+            except Exception:
+                if not self._generacion:
+                    raise
+                logger.exception("No se pudo recargar el índice de entidades; se sigue con el anterior")
+            finally:
+                self._recargando.release()
+
+    def asegurar(self, db: Session, ids_entidad) -> dict[int, int]:
+        """
+        Tipo de esas entidades (las que no existen no salen). Las que aún no están
+        en el índice se traen de BD en una consulta.
+        """
+        self._vigente(db)
+        indice = self._tipo_por_entidad
+        tipos = {}
+        faltan = []
+        for i in {int(i) for i in ids_entidad}:
+            t = indice.get(i)
+            if t is None:
+                faltan.append(i)
+            else:
+                tipos[i] = t
+        if not faltan:
+            return tipos
+
+        cambios = self._cambios
+        leidos = {int(e): int(t) for e, t in consultas.ejecutar(db, "entidades.tipos_en", {"ids": faltan}).all()}
+
+        with self._lock:
+            # si entre medias se ha refrescado o recargado algo, lo leído puede ser de antes
+            # de ese commit: vale para esta petición, pero no se guarda en el índice
+            if self._cambios == cambios:
+                for e, t in leidos.items():
+                    self._tipo_por_entidad.setdefault(e, t)
+        tipos.update(leidos)
+        return tipos
+
+    def tipo_de_entidad(self, db: Session, id_entidad: int) -> int | None:
+        return self.asegurar(db, [id_entidad]).get(int(id_entidad))
+
+    def id_tipo(self, db: Session, nombre: str) -> int | None:
+        self._vigente(db)
+        return self._tipo_por_nombre.get(normalizar_tipo(nombre))
+
+    def tipo_de_motivo_nodual(self, db: Session, id_motivo_nodual: int) -> int | None:
+        self._vigente(db)
+        return self._tipo_por_motivo.get(int(id_motivo_nodual))
+
+    def es_de_tipo(self, db: Session, id_entidad: int, nombre_tipo: str) -> bool:
+        tipo = self.id_tipo(db, nombre_tipo)
+        return tipo is not None and self.tipo_de_entidad(db, id_entidad) == tipo
+
+    def motivo_valido_para_entidad(self, db: Session, id_motivo_nodual: int, id_entidad: int) -> bool:
+        """En sgi_motivos_nodual cada motivo es de un tipo de entidad: tiene que coincidir."""
+        tipo_motivo = self.tipo_de_motivo_nodual(db, id_motivo_nodual)
+        return tipo_motivo is not None and self.tipo_de_entidad(db, id_entidad) == tipo_motivo
+
+    def refrescar_entidad(self, db: Session, id_entidad: int) -> None:
+        """Llamar después del commit al crear/editar/borrar una entidad."""
+        self.refrescar_entidades(db, [id_entidad])
+
+    def refrescar_entidades(self, db: Session, ids_entidad) -> None:
+        """Vuelve a leer de BD esas entidades (las que ya no están se quitan)."""
+        ids = list({int(i) for i in ids_entidad if i is not None})
+        if not ids:
+            return
+        while True:
+            generacion = self._generacion
+            leidos = {int(e): int(t) for e, t in consultas.ejecutar(db, "entidades.tipos_en", {"ids": ids}).all()}
+            with self._lock:
+                if self._pendientes is not None:
+                    # hay una carga completa en marcha que puede haber leído antes del commit
+                    self._pendientes.update(ids)
+                if self._generacion == generacion:
+                    for i in ids:
+                        if i in leidos:
+                            self._tipo_por_entidad[i] = leidos[i]
+                        else:
+                            self._tipo_por_entidad.pop(i, None)
+                    self._cambios += 1
+                    return
+            # entre la lectura y aquí se ha cambiado el índice entero por uno que puede
+            # ser más nuevo que lo leído: se vuelve a leer (en otra transacción)
+            db.rollback()
+
+    def invalidar(self) -> None:
+        """Fuerza la reconstrucción completa en la próxima consulta (p.ej. cambian los tipos)."""
+        with self._lock:
+            self._cargado = 0.0
+
+
+indice_entidades = IndiceEntidades(ttl=ENTIDADES_INDEX_TTL)
@@ -0,0 +1,155 @@
+import asyncio
+import json
+import logging
+import threading
+from collections import deque
+
+from app.core.config import SSE_HEARTBEAT_S, SSE_COLA_MAX, SSE_HISTORIAL
+from app.core.metricas import metricas
+
+logger = logging.getLogger(__name__)
+
+
+class Evento:
+    __slots__ = ("id", "tipo", "texto")
+
+    def __init__(self, id: int, tipo: str, data: dict):
+        self.id = id
+        self.tipo = tipo
+        # se serializa una vez y se manda igual a todos los clientes
+        self.texto = f"id: {id}\nevent: {tipo}\ndata: {json.dumps(data, ensure_ascii=False, separators=(',', ':'))}\n\n"
+
+
+class Cliente:
+    __slots__ = ("cola", "desde")
+
+    def __init__(self, desde: int):
+        self.cola: asyncio.Queue[Evento | None] = asyncio.Queue(maxsize=SSE_COLA_MAX)
+        # ya tiene (o ha recibido del historial) los eventos hasta este id
+        self.desde = desde
+
+
+class Difusor:
+    """
+    Reparte eventos a los clientes conectados por Server-Sent Events.
+
+    - publicar() se llama desde los endpoints síncronos (threadpool) después
+      del commit; el reparto se hace en el event loop.
+    - Cada cliente tiene su cola acotada: si se llena (cliente lento o
+      colgado) se le desconecta y al reconectar recibe lo pendiente del
+      historial (Last-Event-ID) o un "resync" si ya no está.
+    - Los clientes conectados no cuestan nada a la BD.
+
+    Es en proceso: con varios workers, cada uno avisa de los cambios que hace
+    él (el "resync" y el GET /vacantes de siempre siguen valiendo de respaldo).
+    """
+
+    def __init__(self, historial: int):
+        self._clientes: set[Cliente] = set()
+        self._historial: deque[Evento] = deque(maxlen=historial)
+        self._ultimo_id = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock = threading.Lock()
+        self.publicados = 0
+        self.descartados = 0
+
+    @property
+    def hay_clientes(self) -> bool:
+        return bool(self._clientes)
+
+    def publicar(self, tipo: str, data: dict) -> None:
+        with self._lock:
+            self._ultimo_id += 1
+            evento = Evento(self._ultimo_id, tipo, data)
+            self._historial.append(evento)
+            self.publicados += 1
+            loop = self._loop
+            # dentro del lock: un suscribir() a medias o ya ha entrado (y recibe
+            # este evento) o entrará después con desde >= este id
+            hay_clientes = bool(self._clientes)
+
+        if loop is not None and hay_clientes:
+            try:
+                loop.call_soon_threadsafe(self._repartir, evento)
+            except RuntimeError:
+                # el loop ya se ha cerrado (apagando el proceso)
+                pass
+
+    def _repartir(self, evento: Evento) -> None:
+        for cliente in list(self._clientes):
+            if evento.id <= cliente.desde:
+                continue
+            try:
+                cliente.cola.put_nowait(evento)
+            except asyncio.QueueFull:
+                self._descartar(cliente)
+
+    def _descartar(self, cliente: Cliente) -> None:
+        self._clientes.discard(cliente)
+        self.descartados += 1
+        logger.warning("Cliente SSE descartado: no consume eventos (cola llena)")
+        while not cliente.cola.empty():
+            cliente.cola.get_nowait()
+        cliente.cola.put_nowait(None)
+
+    def suscribir(self, ultimo_id: int | None) -> tuple[Cliente, list[Evento] | None]:
+        """
+        Alta de un cliente (desde el event loop). Devuelve también los eventos
+        posteriores a `ultimo_id` que aún están en el historial, o None si
+        faltan eventos y el cliente tiene que recargar entero.
+        """
+        self._loop = asyncio.get_running_loop()
+        with self._lock:
+            pendientes: list[Evento] | None = []
+            if ultimo_id is not None and ultimo_id > self._ultimo_id:
+                # ids de antes de un reinicio del proceso
+                pendientes = None
+            elif ultimo_id is not None and ultimo_id < self._ultimo_id:
+                pendientes = [e for e in self._historial if e.id > ultimo_id]
+                if not pendientes or pendientes[0].id != ultimo_id + 1:
+                    pendientes = None
+            cliente = Cliente(desde=self._ultimo_id)
+            self._clientes.add(cliente)
+        return cliente, pendientes
+
+    def baja(self, cliente: Cliente) -> None:
+        self._clientes.discard(cliente)
+
+    async def stream(self, ultimo_id: int | None = None):
+        """Generador para StreamingResponse(media_type="text/event-stream")."""
+        cliente, pendientes = self.suscribir(ultimo_id)
+        try:
+            # el cliente reintenta a los 3 s si se corta la conexión
+            yield "retry: 3000\n\n"
+            if pendientes is None:
+                yield f"id: {cliente.desde}\nevent: resync\ndata: {{}}\n\n"
+            else:
+                for e in pendientes:
+                    yield e.texto
+
+            while True:
+                try:
+                    evento = await asyncio.wait_for(cliente.cola.get(), timeout=SSE_HEARTBEAT_S)
+                except asyncio.TimeoutError:
+                    # comentario SSE: mantiene viva la conexión a través de proxies
+                    yield ": ping\n\n"
+                    continue
+                if evento is None:
+                    return
+                yield evento.texto
+        finally:
+            self.baja(cliente)
+
+    def prometheus(self) -> list[str]:
+        return [
+            "# TYPE sge_sse_clients gauge",
+            f"sge_sse_clients {len(self._clientes)}",
+            "# TYPE sge_sse_events_total counter",
+            f"sge_sse_events_total {self.publicados}",
+            "# TYPE sge_sse_dropped_clients_total counter",
+            f"sge_sse_dropped_clients_total {self.descartados}",
+        ]
+
+
+difusor_vacantes = Difusor(historial=SSE_HISTORIAL)
+metricas.colectores.append(difusor_vacantes.prometheus)
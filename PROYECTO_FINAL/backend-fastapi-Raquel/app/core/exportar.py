@@ -0,0 +1,85 @@
+import csv
+import io
+
+from fastapi.responses import StreamingResponse
+
+from app.db.session import SessionLocal
+from app.db.consultas import consultas
+from app.core.config import EXPORT_CHUNK_BYTES, EXPORT_YIELD_PER
+from app.core.respuestas import dumps
+
+FORMATOS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _filas(consulta: str, sql: str, params: dict):
+    """
+    Lee el SELECT con un cursor de servidor (stream_results) en bloques de
+    EXPORT_YIELD_PER filas. Abre su propia sesión porque el generador se
+    sigue consumiendo después de que termine el endpoint.
+    """
+    db = SessionLocal()
+    try:
+        result = consultas.ejecutar_sql(
+            db, consulta, sql, params, stream_results=True, yield_per=EXPORT_YIELD_PER,
+        )
+        yield list(result.keys())
+        for part in result.mappings().partitions():
+            yield from part
+    finally:
+        db.close()
+
+
+def _trozos_csv(filas):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    columnas = next(filas)
+    writer.writerow(columnas)
+
+    for r in filas:
+        writer.writerow([r[c] for c in columnas])
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _trozos_ndjson(filas):
+    next(filas)  # en NDJSON las columnas ya van en cada línea
+    trozo = []
+    tam = 0
+
+    for r in filas:
+        # la misma serialización que las respuestas JSON: fechas y decimales salen igual
+        linea = dumps(r) + b"\n"
+        trozo.append(linea)
+        tam += len(linea)
+        if tam >= EXPORT_CHUNK_BYTES:
+            yield b"".join(trozo)
+            trozo = []
+            tam = 0
+
+    if trozo:
+        yield b"".join(trozo)
+
+
+def respuesta_exportacion(sql: str, params: dict, formato: str, nombre: str) -> StreamingResponse:
+    """
+    StreamingResponse en CSV o NDJSON para un SELECT: la memoria se mantiene
+    plana (un bloque de filas + un trozo de salida) sea cual sea la tabla.
+    El SELECT cuenta en el registro de consultas como "<nombre>.export".
+    """
+    filas = _filas(f"{nombre}.export", sql, params)
+    trozos = _trozos_csv(filas) if formato == "csv" else _trozos_ndjson(filas)
+
+    return StreamingResponse(
+        trozos,
+        media_type=FORMATOS[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nombre}.{formato}"'},
+    )
@@ -0,0 +1,400 @@
+import heapq
+import logging
+import threading
+import time
+from itertools import chain, islice
+
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.db.consultas import consultas
+from app.core.buscador_alumnos import normalizar
+from app.core.config import FACETAS_TTL
+
+logger = logging.getLogger(__name__)
+
+
+def mascara(posiciones, n: int) -> int:
+    """Bitmap (un int de Python) con los bits de `posiciones` a 1, de una vez y no bit a bit."""
+    if not n:
+        return 0
+    bits = bytearray(b"0") * n
+    for p in posiciones:
+        bits[n - 1 - p] = 49  # "1"
+    return int(bits, 2)
+
+
+def posiciones(bitmap: int):
+    """Posiciones de los bits a 1, de menor a mayor."""
+    bits = bin(bitmap)[:1:-1]
+    p = bits.find("1")
+    while p != -1:
+        yield p
+        p = bits.find("1", p + 1)
+
+
+class IndiceFacetas:
+    """
+    Búsqueda con facetas en memoria (listados de entidades y contactos).
+
+    Cada fila tiene una posición fija y cada valor de cada dimensión un
+    bitmap (un int de Python) con las posiciones de las filas que lo tienen.
+    Filtrar es hacer AND/OR de bitmaps y contar es bit_count(), así que los
+    totales de todas las facetas salen en memoria, sin un COUNT ... GROUP BY
+    por faceta en cada pulsación.
+
+    - dimensiones: campo del id -> campo de la etiqueta (None: el propio
+      valor es el texto, p.ej. localidad, y se compara sin tildes/mayúsculas).
+    - multiples: dimensiones con varios valores por fila, cargadas con su
+      propia consulta de (id, valor, etiqueta) (p.ej. las familias de los
+      contactos de una entidad).
+
+    Se construye entero al arrancar y cada `ttl` segundos (cambios hechos
+    fuera de esta API); los endpoints que escriben lo mantienen al día con
+    refrescar(). La reconstrucción la hace un solo hilo y, mientras, las
+    búsquedas siguen con el índice anterior; lo que se refresque durante la
+    carga se vuelve a leer sobre el índice nuevo.
+    """
+
+    def __init__(
+        self,
+        clave: str,
+        consulta: str,
+        dimensiones: dict[str, str | None],
+        campos_texto: tuple[str, ...],
+        campos_orden: tuple[str, ...],
+        ttl: float,
+        multiples: dict[str, str] | None = None,
+    ):
+        # consulta / multiples: nombres en app/db/consultas.py; "<nombre>_en" es la misma con WHERE id IN :ids
+        self.clave = clave
+        self.consulta = consulta
+        self.dimensiones = dimensiones
+        self.campos_texto = campos_texto
+        self.campos_orden = campos_orden
+        self.ttl = ttl
+        self.multiples = multiples or {}
+
+        self._pos: dict[int, int] = {}            # id -> posición
+        self._filas: list[dict | None] = []       # posición -> fila que se devuelve
+        self._textos: list[str] = []              # posición -> texto normalizado para ?q=
+        self._orden: list[tuple] = []             # posición -> clave de orden
+        self._valores: list[dict] = []            # posición -> {dimensión: [valores]} (para quitarla)
+        self._desordenadas: set[int] = set()      # altas y renombradas desde la carga (el resto va por posición)
+        self._bitmaps: dict[str, dict] = {d: {} for d in dimensiones}
+        self._etiquetas: dict[str, dict] = {d: {} for d in dimensiones}
+        self._vivas = 0                           # bitmap de las posiciones ocupadas
+        self._cargado = 0.0
+        self._generacion = 0                      # cargas completas hechas (0: todavía ninguna)
+        self._pendientes: set[int] | None = None  # ids refrescados durante la carga en marcha
+        # las búsquedas recorren los diccionarios de bitmaps: mientras, nadie los puede tocar
+        self._lock = threading.Lock()
+        self._recargando = threading.Lock()
+
+    # --- carga ------------------------------------------------------------
+
+    def _leer(self, db: Session, ids: list[int] | None) -> tuple[list[dict], dict[str, dict]]:
+        if ids is None:
+            rows = consultas.ejecutar(db, self.consulta).mappings().all()
+        else:
+            rows = consultas.ejecutar(db, f"{self.consulta}_en", {"ids": ids}).mappings().all()
+
+        extras: dict[str, dict] = {}
+        for dim, nombre in self.multiples.items():
+            if ids is None:
+                pares = consultas.ejecutar(db, nombre).all()
+            else:
+                pares = consultas.ejecutar(db, f"{nombre}_en", {"ids": ids}).all()
+            por_fila = extras[dim] = {}
+            for id_fila, valor, etiqueta in pares:
+                por_fila.setdefault(id_fila, []).append((valor, etiqueta))
+        return [dict(r) for r in rows], extras
+
+    def _clave_valor(self, dim: str, valor):
+        # localidad y demás dimensiones de texto: "MÁLAGA" y "Malaga" son la misma
+        if self.dimensiones[dim] is None:
+            return " ".join(normalizar(str(valor)).split())
+        return valor
+
+    def _valores_fila(self, fila: dict, extras: dict[str, dict]) -> dict[str, list[tuple]]:
+        """{dimensión: [(valor, etiqueta)]} de una fila, sin nulos ni vacíos."""
+        valores = {}
+        for dim, campo_etiqueta in self.dimensiones.items():
+            if dim in self.multiples:
+                pares = extras[dim].get(fila[self.clave], ())
+            else:
+                pares = [(fila[dim], fila[dim] if campo_etiqueta is None else fila[campo_etiqueta])]
+            valores[dim] = [
+                (self._clave_valor(dim, v), e)
+                for v, e in pares
+                if v is not None and v != ""
+            ]
+        return valores
+
+    def _texto(self, fila: dict) -> str:
+        return " ".join(normalizar(fila.get(c)) for c in self.campos_texto)
+
+    def _orden_fila(self, fila: dict) -> tuple:
+        return tuple(normalizar(fila.get(c)) for c in self.campos_orden) + (fila[self.clave],)
+
+    def cargar(self, db: Session | None = None) -> None:
+        """Carga completa (al arrancar). Si hay otra en marcha, espera a que acabe."""
+        with self._recargando:
+            self._cargar(db)
+
+    def _cargar(self, db: Session | None) -> None:
+        propia = db is None
+        if propia:
+            db = SessionLocal()
+        try:
+            # desde antes de leer: los refrescos de filas que quizá no estén en la lectura
+            with self._lock:
+                self._pendientes = set()
+            try:
+                filas, extras = self._leer(db, None)
+                self._construir(filas, extras)
+            finally:
+                with self._lock:
+                    pendientes, self._pendientes = self._pendientes, None
+            if pendientes:
+                self.refrescar(db, pendientes)
+        finally:
+            if propia:
+                db.close()
+
+    def _construir(self, filas: list[dict], extras: dict[str, dict]) -> None:
+        # en orden: las posiciones bajas son las primeras del listado (la clave lleva el id, no hay empates)
+        ordenadas = sorted((self._orden_fila(f), f) for f in filas)
+        orden = [o for o, _ in ordenadas]
+        filas = [f for _, f in ordenadas]
+        n = len(filas)
+        pos = {}
+        valores = []
+        por_valor = {d: {} for d in self.dimensiones}
+        etiquetas = {d: {} for d in self.dimensiones}
+        for p, fila in enumerate(filas):
+            pos[fila[self.clave]] = p
+            vf = self._valores_fila(fila, extras)
+            valores.append({d: [v for v, _ in pares] for d, pares in vf.items()})
+            for d, pares in vf.items():
+                for v, e in pares:
+                    por_valor[d].setdefault(v, []).append(p)
+                    etiquetas[d].setdefault(v, e)
+
+        bitmaps = {d: {v: mascara(ps, n) for v, ps in vs.items()} for d, vs in por_valor.items()}
+        textos = [self._texto(f) for f in filas]
+
+        # se construye aparte y se cambia de golpe, como el índice de entidades
+        with self._lock:
+            self._pos = pos
+            self._filas = filas
+            self._textos = textos
+            self._orden = orden
+            self._valores = valores
+            self._bitmaps = bitmaps
+            self._etiquetas = etiquetas
+            self._vivas = (1 << n) - 1
+            self._desordenadas = set()
+            self._cargado = time.monotonic()
+            self._generacion += 1
+
+    def _vigente(self, db: Session) -> None:
+        if time.monotonic() - self._cargado < self.ttl:
+            return
+        # solo un hilo reconstruye; si ya hay índice, los demás no esperan y usan el de antes
+        if self._recargando.acquire(blocking=not self._generacion):
+            try:
+                if time.monotonic() - self._cargado >= self.ttl:
+                    self._cargar(db)
+            except Exception:
+                if not self._generacion:
+                    raise
+                logger.exception("No se pudo recargar el índice de %s; se sigue con el anterior", self.clave)
+            finally:
+                self._recargando.release()
+
+    def _quitar(self, p: int) -> None:
+        bit = 1 << p
+        for d, vs in self._valores[p].items():
+            bitmaps = self._bitmaps[d]
+            for v in vs:
+                bm = bitmaps[v] & ~bit
+                if bm:
+                    bitmaps[v] = bm
+                else:
+                    del bitmaps[v]
+        self._vivas &= ~bit
+        self._filas[p] = None
+        self._valores[p] = {}
+
+    def refrescar(self, db: Session, ids) -> None:
+        """
+        Vuelve a leer de BD esas filas (altas, cambios y bajas: las que ya no
+        están se quitan). Llamar después del commit.
+        """
+        ids = list({int(i) for i in ids if i is not None})
+        if not ids:
+            return
+        self._vigente(db)
+        while True:
+            generacion = self._generacion
+            filas, extras = self._leer(db, ids)
+            with self._lock:
+                if self._pendientes is not None:
+                    # hay una carga completa en marcha que puede haber leído antes del commit
+                    self._pendientes.update(ids)
+                if self._generacion == generacion:
+                    self._aplicar(ids, filas, extras)
+                    return
+            # entre la lectura y aquí se ha cambiado el índice entero por uno que puede
+            # ser más nuevo que lo leído: se vuelve a leer (en otra transacción)
+            db.rollback()
+
+    def _aplicar(self, ids: list[int], filas: list[dict], extras: dict[str, dict]) -> None:
+        for id_fila in ids:
+            p = self._pos.get(id_fila)
+            if p is not None and self._filas[p] is not None:
+                self._quitar(p)
+
+        for fila in filas:
+            p = self._pos.get(fila[self.clave])
+            if p is None:
+                # las nuevas van al final hasta la próxima carga completa (el orden se aplica igual)
+                p = self._pos[fila[self.clave]] = len(self._filas)
+                self._filas.append(None)
+                self._textos.append("")
+                self._orden.append(())
+                self._valores.append({})
+            bit = 1 << p
+            vf = self._valores_fila(fila, extras)
+            for d, pares in vf.items():
+                bitmaps = self._bitmaps[d]
+                for v, e in pares:
+                    bitmaps[v] = bitmaps.get(v, 0) | bit
+                    self._etiquetas[d].setdefault(v, e)
+            orden = self._orden_fila(fila)
+            if orden != self._orden[p]:
+                self._desordenadas.add(p)
+            self._filas[p] = fila
+            self._textos[p] = self._texto(fila)
+            self._orden[p] = orden
+            self._valores[p] = {d: [v for v, _ in pares] for d, pares in vf.items()}
+            self._vivas |= bit
+
+    def ids_donde(self, campo: str, valor) -> list[int]:
+        """Ids de las filas con fila[campo] == valor (p.ej. los contactos de una entidad que cambia)."""
+        with self._lock:
+            return [f[self.clave] for f in self._filas if f is not None and f.get(campo) == valor]
+
+    def invalidar(self) -> None:
+        with self._lock:
+            self._cargado = 0.0
+
+    # --- búsqueda ---------------------------------------------------------
+
+    def buscar(
+        self,
+        db: Session,
+        filtros: dict[str, list],
+        q: str | None = None,
+        limit: int = 50,
+        offset: int = 0,
+    ) -> dict:
+        """
+        Filas que cumplen todos los filtros (varios valores de una misma
+        dimensión: cualquiera de ellos), ordenadas, y los totales de cada
+        faceta. El total de cada valor se calcula con los filtros de las
+        demás dimensiones pero no con el de la suya, para que en el lateral
+        se pueda marcar otro valor de la misma dimensión sin perderlos.
+        """
+        self._vigente(db)
+        texto = " ".join(normalizar(q).split()) if q else ""
+
+        with self._lock:
+            base = self._vivas
+            if texto:
+                base &= mascara((p for p, t in enumerate(self._textos) if texto in t), len(self._textos))
+
+            por_dim = {}
+            for dim, valores in filtros.items():
+                if not valores:
+                    continue
+                bitmaps = self._bitmaps[dim]
+                m = 0
+                for v in valores:
+                    m |= bitmaps.get(self._clave_valor(dim, v), 0)
+                por_dim[dim] = m
+
+            resultado = base
+            for m in por_dim.values():
+                resultado &= m
+
+            facetas = {}
+            for dim in self.dimensiones:
+                resto = base
+                for d, m in por_dim.items():
+                    if d != dim:
+                        resto &= m
+                etiquetas = self._etiquetas[dim]
+                cuentas = [
+                    {"valor": v, "etiqueta": etiquetas.get(v), "total": n}
+                    for v, bm in self._bitmaps[dim].items()
+                    if (n := (bm & resto).bit_count())
+                ]
+                cuentas.sort(key=lambda c: (-c["total"], str(c["etiqueta"])))
+                facetas[dim] = cuentas
+
+            # las posiciones de la carga ya están en orden: basta con las primeras offset + limit
+            # y las que han cambiado desde entonces, sin ordenar todo el resultado
+            fuera = self._desordenadas
+            candidatas = chain(
+                islice((p for p in posiciones(resultado) if p not in fuera), offset + limit),
+                (p for p in fuera if resultado >> p & 1),
+            )
+            pagina = heapq.nsmallest(offset + limit, candidatas, key=self._orden.__getitem__)[offset:]
+            return {
+                "total": resultado.bit_count(),
+                "filas": [self._filas[p] for p in pagina],
+                "facetas": facetas,
+            }
+
+    def estado(self) -> dict:
+        with self._lock:
+            return {
+                "filas": self._vivas.bit_count(),
+                "valores": {d: len(vs) for d, vs in self._bitmaps.items()},
+                "edad_s": round(time.monotonic() - self._cargado, 1),
+            }
+
+
+facetas_entidades = IndiceFacetas(
+    clave="id_entidad",
+    consulta="entidades.facetas",
+    dimensiones={
+        "id_zona": "zona",
+        "id_provincia": "provincia",
+        "id_tipo_entidad": "tipo_entidad",
+        "id_familia": "familia",
+        "localidad": None,
+    },
+    # una entidad "es" de las familias profesionales de sus contactos
+    multiples={"id_familia": "entidades.facetas_familias"},
+    campos_texto=("entidad", "codigo", "localidad"),
+    campos_orden=("entidad",),
+    ttl=FACETAS_TTL,
+)
+
+facetas_contactos = IndiceFacetas(
+    clave="id_contacto",
+    consulta="contactos.facetas",
+    dimensiones={
+        "id_zona": "zona",
+        "id_provincia": "provincia",
+        "id_tipo_entidad": "tipo_entidad",   # el de su entidad
+        "id_familia": "familia",
+        "localidad": None,
+    },
+    campos_texto=("nombre", "apellidos", "email", "cargo", "entidad"),
+    campos_orden=("apellidos", "nombre"),
+    ttl=FACETAS_TTL,
+)
@@ -0,0 +1,193 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import SLOW_QUERY_MS
+
+logger = logging.getLogger(__name__)
+
+# execution_option con el nombre de la consulta (app/db/consultas.py) que lanza la sentencia
+OPCION_CONSULTA = "sge_consulta"
+# etiqueta de las sentencias que no pasan por el registro (ORM, health, scripts)
+SIN_REGISTRO = "sin_registro"
+
+# límites (segundos) de los histogramas de latencia
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class TiemposPeticion:
+    """Lo que se va acumulando durante una petición (vive en un ContextVar)."""
+
+    __slots__ = ("inicio", "db_s", "db_n", "auth_s", "serialize_s")
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.db_s = 0.0
+        self.db_n = 0
+        self.auth_s = 0.0
+        self.serialize_s = 0.0
+
+
+# los endpoints síncronos corren en el threadpool con una copia del contexto,
+# pero el objeto es el mismo, así que lo que suman ahí se ve en el middleware
+peticion_actual: ContextVar[TiemposPeticion | None] = ContextVar("peticion_actual", default=None)
+
+
+@contextmanager
+def medir(fase: str):
+    """Suma el tiempo del bloque a la fase (auth, serialize) de la petición en curso."""
+    t = peticion_actual.get()
+    if t is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        setattr(t, f"{fase}_s", getattr(t, f"{fase}_s") + time.perf_counter() - t0)
+
+
+class Histograma:
+    __slots__ = ("cuentas", "suma", "total")
+
+    def __init__(self):
+        self.cuentas = [0] * len(BUCKETS)
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, valor: float) -> None:
+        for i, limite in enumerate(BUCKETS):
+            if valor <= limite:
+                self.cuentas[i] += 1
+                break
+        self.suma += valor
+        self.total += 1
+
+
+class Metricas:
+    """Contadores del proceso que se exponen en /metrics (formato Prometheus)."""
+
+    def __init__(self, lento_s: float):
+        self.lento_s = lento_s
+        self._lock = threading.Lock()
+        self.latencias: dict[tuple[str, str], Histograma] = {}
+        self.peticiones: dict[tuple[str, str, int], int] = {}
+        self.sentencias_por_ruta: dict[tuple[str, str], int] = {}
+        self.db_sentencias = 0
+        self.db_segundos = 0.0
+        self.db_lentas = 0
+        # nombre de la consulta -> [nº de veces lenta, máximo en segundos]; el SQL solo va al log
+        self.lentas_por_consulta: dict[str, list] = {}
+        # otros módulos registran aquí funciones que devuelven líneas extra
+        self.colectores = []
+
+    def registrar_peticion(self, metodo: str, ruta: str, status: int, segundos: float, sentencias: int) -> None:
+        with self._lock:
+            clave = (metodo, ruta)
+            h = self.latencias.get(clave)
+            if h is None:
+                h = self.latencias[clave] = Histograma()
+            h.observar(segundos)
+            self.peticiones[(metodo, ruta, status)] = self.peticiones.get((metodo, ruta, status), 0) + 1
+            self.sentencias_por_ruta[clave] = self.sentencias_por_ruta.get(clave, 0) + sentencias
+
+    def registrar_sentencia(self, sql: str, segundos: float, consulta: str = SIN_REGISTRO) -> None:
+        with self._lock:
+            self.db_sentencias += 1
+            self.db_segundos += segundos
+            lenta = segundos >= self.lento_s
+            if lenta:
+                self.db_lentas += 1
+                total = self.lentas_por_consulta.setdefault(consulta, [0, 0.0])
+                total[0] += 1
+                total[1] = max(total[1], segundos)
+
+        if lenta:
+            logger.warning("Sentencia SQL lenta (%.1f ms) %s: %s", segundos * 1000, consulta, " ".join(sql.split())[:300])
+
+    def prometheus(self) -> str:
+        lineas = []
+
+        with self._lock:
+            lineas.append("# HELP sge_http_request_duration_seconds Latencia de las peticiones por ruta")
+            lineas.append("# TYPE sge_http_request_duration_seconds histogram")
+            for (metodo, ruta), h in sorted(self.latencias.items()):
+                etiquetas = f'method="{metodo}",route="{_escapar(ruta)}"'
+                acumulado = 0
+                for limite, n in zip(BUCKETS, h.cuentas):
+                    acumulado += n
+                    lineas.append(f'sge_http_request_duration_seconds_bucket{{{etiquetas},le="{limite}"}} {acumulado}')
+                lineas.append(f'sge_http_request_duration_seconds_bucket{{{etiquetas},le="+Inf"}} {h.total}')
+                lineas.append(f"sge_http_request_duration_seconds_sum{{{etiquetas}}} {h.suma:.6f}")
+                lineas.append(f"sge_http_request_duration_seconds_count{{{etiquetas}}} {h.total}")
+
+            lineas.append("# HELP sge_http_requests_total Peticiones por ruta y código de estado")
+            lineas.append("# TYPE sge_http_requests_total counter")
+            for (metodo, ruta, status), n in sorted(self.peticiones.items()):
+                lineas.append(f'sge_http_requests_total{{method="{metodo}",route="{_escapar(ruta)}",status="{status}"}} {n}')
+
+            lineas.append("# HELP sge_http_db_statements_total Sentencias SQL lanzadas por ruta")
+            lineas.append("# TYPE sge_http_db_statements_total counter")
+            for (metodo, ruta), n in sorted(self.sentencias_por_ruta.items()):
+                lineas.append(f'sge_http_db_statements_total{{method="{metodo}",route="{_escapar(ruta)}"}} {n}')
+
+            lineas.append("# HELP sge_db_statements_total Sentencias SQL ejecutadas")
+            lineas.append("# TYPE sge_db_statements_total counter")
+            lineas.append(f"sge_db_statements_total {self.db_sentencias}")
+            lineas.append("# HELP sge_db_statement_seconds_total Tiempo total en BD")
+            lineas.append("# TYPE sge_db_statement_seconds_total counter")
+            lineas.append(f"sge_db_statement_seconds_total {self.db_segundos:.6f}")
+            lineas.append(f"# HELP sge_db_slow_statements_total Sentencias por encima de {self.lento_s * 1000:g} ms")
+            lineas.append("# TYPE sge_db_slow_statements_total counter")
+            lineas.append(f"sge_db_slow_statements_total {self.db_lentas}")
+            # por nombre del registro (acotado), no por texto SQL: el texto va solo al log
+            lineas.append("# HELP sge_db_slow_queries_total Sentencias lentas por consulta del registro")
+            lineas.append("# TYPE sge_db_slow_queries_total counter")
+            for consulta, (n, _) in sorted(self.lentas_por_consulta.items()):
+                lineas.append(f'sge_db_slow_queries_total{{query="{_escapar(consulta)}"}} {n}')
+            lineas.append("# HELP sge_db_slow_query_seconds_max La más lenta de cada consulta")
+            lineas.append("# TYPE sge_db_slow_query_seconds_max gauge")
+            for consulta, (_, maximo) in sorted(self.lentas_por_consulta.items()):
+                lineas.append(f'sge_db_slow_query_seconds_max{{query="{_escapar(consulta)}"}} {maximo:.6f}')
+
+        for colector in self.colectores:
+            lineas.extend(colector())
+
+        return "\n".join(lineas) + "\n"
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+metricas = Metricas(lento_s=SLOW_QUERY_MS / 1000)
+
+
+def instrumentar_engine(engine: Engine) -> None:
+    """Cuenta sentencias y tiempo de BD por petición con los eventos del engine."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("sge_t0", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _despues(conn, cursor, statement, parameters, context, executemany):
+        segundos = time.perf_counter() - conn.info["sge_t0"].pop()
+        metricas.registrar_sentencia(statement, segundos, context.execution_options.get(OPCION_CONSULTA, SIN_REGISTRO))
+
+        t = peticion_actual.get()
+        if t is not None:
+            t.db_s += segundos
+            t.db_n += 1
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        # la sentencia falló: no habrá after_cursor_execute
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("sge_t0"):
+            conn.info["sge_t0"].pop()
@@ -0,0 +1,165 @@
+import logging
+import threading
+import time
+from types import MappingProxyType
+from typing import Mapping, NamedTuple
+
+from fastapi import Depends, HTTPException
+
+from app.db.session import SessionLocal
+from app.db.consultas import consultas
+from app.core.catalogos import Catalogo
+from app.core.security import require_token
+from app.core.metricas import metricas
+from app.core.config import PERMISOS_TTL
+
+logger = logging.getLogger(__name__)
+
+PERMISOS = ("post", "put", "delete")
+ROL_SUPERADMIN = "Superadmin"
+
+
+class Matriz(NamedTuple):
+    """Foto inmutable de sgi_vista_rol_menu: se sustituye entera, nunca se modifica."""
+    permisos: Mapping[tuple[int, str], frozenset[str]]   # (id_rol, accion) -> {"post", "put", "delete"}
+    superadmin: frozenset[int]                           # roles con todo permitido
+    menus: Mapping[int, Catalogo]                        # id_rol -> menú ya serializado (con ETag)
+    cargada: float
+
+
+def construir_matriz(opciones: list[dict], roles: list[dict]) -> Matriz:
+    """
+    opciones: filas de la vista ordenadas por grupo; roles: sgi_roles.
+
+    El menú de cada rol es el formato que pinta el navbar del frontend:
+    [{grupo, opciones: [{id_opcion_menu, opcion, accion, texto_tooltip, permisos}]}].
+    """
+    permisos: dict[tuple[int, str], set[str]] = {}
+    grupos: dict[int, dict[int, dict]] = {r["id_rol"]: {} for r in roles}
+
+    for o in opciones:
+        concedidos = {p for p in PERMISOS if o[f"permiso_{p}"]}
+        # la misma opción puede estar en dos grupos: vale la suma
+        permisos.setdefault((o["id_rol"], o["accion"]), set()).update(concedidos)
+
+        grupo = grupos.setdefault(o["id_rol"], {}).setdefault(o["id_grupo_menu"], {
+            "id_grupo_menu": o["id_grupo_menu"],
+            "grupo": o["grupo"],
+            "orden": o["orden"],
+            "opciones": [],
+        })
+        grupo["opciones"].append({
+            "id_opcion_menu": o["id_opcion_menu"],
+            "opcion": o["opcion"],
+            "accion": o["accion"],
+            "texto_tooltip": o["texto_tooltip"],
+            "permisos": sorted(concedidos),
+        })
+
+    return Matriz(
+        permisos=MappingProxyType({k: frozenset(v) for k, v in permisos.items()}),
+        # como en la vista: Superadmin tiene post/put/delete en todo
+        superadmin=frozenset(r["id_rol"] for r in roles if r["rol"] == ROL_SUPERADMIN),
+        menus=MappingProxyType({rol: Catalogo(list(g.values())) for rol, g in grupos.items()}),
+        cargada=time.monotonic(),
+    )
+
+
+class PermisosRol:
+    """
+    Permisos por rol y opción de menú (sgi_rol_menu / sgi_vista_rol_menu) en memoria.
+
+    La matriz se construye aparte y se cambia de golpe (una sola asignación),
+    así que comprobar un permiso es leer un dict sin locks ni BD. Se recarga
+    cada `ttl` segundos (el mantenimiento de roles lo hace el frontend antiguo)
+    o con recargar(); mientras, las comprobaciones siguen con la anterior.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._matriz: Matriz | None = None
+        self._recargando = threading.Lock()
+        self.denegados = 0
+
+    def cargar(self) -> None:
+        db = SessionLocal()
+        try:
+            opciones = consultas.ejecutar(db, "permisos.rol_menu").mappings().all()
+            roles = consultas.ejecutar(db, "permisos.roles").mappings().all()
+        finally:
+            db.close()
+        self._matriz = construir_matriz([dict(o) for o in opciones], [dict(r) for r in roles])
+
+    def matriz(self) -> Matriz:
+        m = self._matriz
+        if m is not None and time.monotonic() - m.cargada < self.ttl:
+            return m
+        # solo un hilo recarga; si ya hay matriz, los demás no esperan y usan la de antes
+        if self._recargando.acquire(blocking=m is None):
+            try:
+                if self._matriz is m:
+                    self.cargar()
+            except Exception:
+                if m is None:
+                    raise
+                logger.exception("No se pudo recargar la matriz de permisos; se sigue con la anterior")
+            finally:
+                self._recargando.release()
+        return self._matriz
+
+    def recargar(self) -> None:
+        """Después de cambiar sgi_rol_menu / sgi_opciones_menu / sgi_grupos_menu."""
+        with self._recargando:
+            self.cargar()
+
+    def puede(self, id_rol: int, accion: str, permiso: str) -> bool:
+        m = self.matriz()
+        return id_rol in m.superadmin or permiso in m.permisos.get((id_rol, accion), ())
+
+    def menu(self, id_rol: int) -> Catalogo:
+        m = self.matriz()
+        menu = m.menus.get(id_rol)
+        return menu if menu is not None else Catalogo([])
+
+    def prometheus(self) -> list[str]:
+        m = self._matriz
+        edad = round(time.monotonic() - m.cargada, 1) if m is not None else -1
+        return [
+            "# TYPE sge_permissions_denied_total counter",
+            f"sge_permissions_denied_total {self.denegados}",
+            "# TYPE sge_permissions_matrix_age_seconds gauge",
+            f"sge_permissions_matrix_age_seconds {edad}",
+        ]
+
+
+permisos_rol = PermisosRol(ttl=PERMISOS_TTL)
+metricas.colectores.append(permisos_rol.prometheus)
+
+
+def requiere_permiso(accion: str, permiso: str):
+    """
+    Dependencia para las rutas que escriben: como require_token, pero además
+    el rol del usuario tiene que tener `permiso` (post/put/delete) en la
+    opción de menú cuya `accion` es esta (sgi_opciones_menu.accion).
+    """
+    if permiso not in PERMISOS:
+        raise ValueError(f"Permiso desconocido: {permiso}")
+
+    def comprobar(user=Depends(require_token)):
+        if not permisos_rol.puede(user["id_rol"], accion, permiso):
+            permisos_rol.denegados += 1
+            raise HTTPException(status_code=403, detail=f"Tu rol no tiene permiso de {permiso} en {accion}")
+        return user
+
+    return comprobar
+
+
+def requiere_superadmin(user=Depends(require_token)):
+    """
+    Dependencia para las operaciones de mantenimiento que no son de ninguna
+    opción de menú (forzar recargas de permisos, catálogos e índices).
+    """
+    if user["id_rol"] not in permisos_rol.matriz().superadmin:
+        permisos_rol.denegados += 1
+        raise HTTPException(status_code=403, detail="Solo Superadmin puede hacer esto")
+    return user
@@ -0,0 +1,61 @@
+import json
+from collections.abc import Mapping
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+from app.core.metricas import medir
+
+try:
+    import orjson
+except ImportError:  # opcional: sin orjson se usa json de la stdlib
+    orjson = None
+
+
+def _a_json(obj: Any) -> Any:
+    """
+    Lo que ni orjson ni json saben serializar solos. Mismas conversiones que
+    jsonable_encoder, para que la salida sea idéntica byte a byte.
+    """
+    if isinstance(obj, Mapping):
+        # RowMapping de .mappings(): sin pasar antes por dict(r) en el endpoint
+        return dict(obj)
+    if isinstance(obj, Decimal):
+        return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, timedelta):
+        return obj.total_seconds()
+    if isinstance(obj, bytes):
+        return obj.decode()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    def dumps(content: Any) -> bytes:
+        return orjson.dumps(content, default=_a_json, option=orjson.OPT_NON_STR_KEYS)
+else:
+    def dumps(content: Any) -> bytes:
+        # los mismos parámetros que JSONResponse.render de Starlette
+        return json.dumps(
+            content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"), default=_a_json,
+        ).encode("utf-8")
+
+
+class RespuestaJSON(JSONResponse):
+    """
+    Respuesta JSON por defecto de la app (default_response_class).
+
+    Si el endpoint devuelve un dict, FastAPI ya le ha pasado jsonable_encoder y
+    esto solo serializa (con orjson si está instalado). Los listados grandes
+    devuelven directamente RespuestaJSON({... "data": rows}) con las RowMapping
+    de SQLAlchemy: así no hay copia a dict en el endpoint ni pasada del encoder,
+    y fechas y decimales se convierten al serializar. El tiempo cuenta como
+    "serialize" en Server-Timing.
+    """
+
+    def render(self, content: Any) -> bytes:
+        with medir("serialize"):
+            return dumps(content)
@@ -1,11 +1,131 @@
+import threading
+import time
+from collections import OrderedDict
+
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from sqlalchemy import text
 from app.db.session import get_db
+from app.db.consultas import consultas
+from app.core.config import TOKEN_CACHE_TTL, TOKEN_CACHE_NEG_TTL, TOKEN_CACHE_MAX
+from app.core.metricas import metricas, medir
 
 security = HTTPBearer(auto_error=False)
 
+
+class TokenCache:
+    """
+    Caché en memoria token -> usuario para no ir a sgi_usuarios en cada petición.
+
+    - LRU acotada a `max_size` entradas.
+    - Los tokens válidos caducan a los `ttl` segundos.
+    - Los tokens inválidos también se guardan (valor None) pero con `neg_ttl`,
+      para que un cliente con un token malo no nos martillee la BD.
+    - Los endpoints son síncronos (threadpool), así que todo va bajo un Lock.
+    """
+
+    def __init__(self, ttl: float, neg_ttl: float, max_size: int):
+        self.ttl = ttl
+        self.neg_ttl = neg_ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[str, tuple[float, dict | None]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str):
+        """Devuelve (encontrado, usuario). usuario es None si el token está cacheado como inválido."""
+        with self._lock:
+            entry = self._data.get(token)
+            if entry is None:
+                self.misses += 1
+                return False, None
+
+            expira, user = entry
+            if expira <= time.monotonic():
+                del self._data[token]
+                self.misses += 1
+                return False, None
+
+            self._data.move_to_end(token)
+            self.hits += 1
+            # copia: que nadie pueda modificar lo que hay en la caché
+            return True, (dict(user) if user is not None else None)
+
+    def set(self, token: str, user: dict | None) -> None:
+        if self.max_size <= 0:
+            return
+        ttl = self.ttl if user is not None else self.neg_ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[token] = (time.monotonic() + ttl, dict(user) if user is not None else None)
+            self._data.move_to_end(token)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def invalidate_token(self, token: str) -> None:
+        with self._lock:
+            self._data.pop(token, None)
+
+    def invalidate_usuario(self, id_usuario: int) -> None:
+        # p.ej. al cambiar `habilitado` o cerrar sesión sin conocer el token
+        with self._lock:
+            for token in [t for t, (_, u) in self._data.items() if u and u["id_usuario"] == id_usuario]:
+                del self._data[token]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._data), "max_size": self.max_size, "hits": self.hits, "misses": self.misses}
+
+
+token_cache = TokenCache(ttl=TOKEN_CACHE_TTL, neg_ttl=TOKEN_CACHE_NEG_TTL, max_size=TOKEN_CACHE_MAX)
+
+
+def _metricas_token_cache() -> list[str]:
+    st = token_cache.stats()
+    return [
+        "# TYPE sge_token_cache_hits_total counter",
+        f"sge_token_cache_hits_total {st['hits']}",
+        "# TYPE sge_token_cache_misses_total counter",
+        f"sge_token_cache_misses_total {st['misses']}",
+        "# TYPE sge_token_cache_size gauge",
+        f"sge_token_cache_size {st['size']}",
+    ]
+
+
+metricas.colectores.append(_metricas_token_cache)
+
+
+def invalidar_token(token: str) -> None:
+    """Llamar cuando se revoca un token (logout, cambio de token_sesion...)."""
+    token_cache.invalidate_token(token.strip())
+
+
+def invalidar_usuario(id_usuario: int) -> None:
+    """Llamar cuando cambian los datos del usuario (habilitado, id_rol...)."""
+    token_cache.invalidate_usuario(id_usuario)
+
+
+def usuario_por_token(db: Session, token: str) -> dict | None:
+    # mirar primero en la caché (la sesión de BD no abre conexión si no se usa)
+    with medir("auth"):
+        encontrado, user = token_cache.get(token)
+
+        # validar contra BD
+        if not encontrado:
+            row = consultas.ejecutar(db, "usuarios.por_token", {"t": token}).fetchone()
+
+            user = {"id_usuario": row[0], "usuario": row[1], "id_rol": row[2]} if row else None
+            token_cache.set(token, user)
+
+    return user
+
+
 def require_token(
     credentials: HTTPAuthorizationCredentials | None = Depends(security),
     db: Session = Depends(get_db),
@@ -15,20 +135,31 @@ def require_token(
         raise HTTPException(status_code=401, detail="Token no enviado")
 
     # 2) credentials.scheme será "Bearer" y credentials.credentials el token
-    token = credentials.credentials.strip()
-
-    # 3) validar contra BD
-    row = db.execute(
-        text("""
-            SELECT id_usuario, usuario, id_rol
-            FROM sgi_usuarios
-            WHERE token_sesion = :t
-            LIMIT 1
-        """),
-        {"t": token},
-    ).fetchone()
-
-    if not row:
+    user = usuario_por_token(db, credentials.credentials.strip())
+
+    if user is None:
+        raise HTTPException(status_code=401, detail="Token inválido")
+
+    return user
+
+
+def require_token_o_query(
+    token: str | None = None,
+    credentials: HTTPAuthorizationCredentials | None = Depends(security),
+    db: Session = Depends(get_db),
+):
+    """
+    Como require_token, pero acepta también ?token=... para EventSource del
+    navegador, que no deja mandar la cabecera Authorization.
+    """
+    if credentials is not None and credentials.credentials:
+        token = credentials.credentials
+    if not token:
+        raise HTTPException(status_code=401, detail="Token no enviado")
+
+    user = usuario_por_token(db, token.strip())
+
+    if user is None:
         raise HTTPException(status_code=401, detail="Token inválido")
 
-    return {"id_usuario": row[0], "usuario": row[1], "id_rol": row[2]}
+    return user
@@ -0,0 +1,43 @@
+import heapq
+from collections import defaultdict
+
+
+def solapes(reuniones: list[dict]) -> dict[int, set[int]]:
+    """
+    Reuniones que se pisan en el tiempo con otra de la misma zona o con
+    alguien en común (contacto principal o asistente), el mismo día.
+
+    Barrido por grupo (día + zona, día + contacto): se ordena por hora de
+    inicio y se mantienen en un montículo las que siguen abiertas, ordenadas
+    por hora de fin. Cada reunión solo se compara con las abiertas, así que
+    cuesta O(n log n + solapes) en vez de comparar todas con todas.
+
+    Cada reunión necesita id_reunion, fecha, hora_inicio, hora_fin, id_zona,
+    id_contacto y asistentes (lista de dicts con id_contacto). Las horas
+    solo se comparan entre sí: vale cualquier formato ordenable ("09:30").
+    Devuelve id_reunion -> ids de las reuniones con las que solapa.
+    """
+    grupos = defaultdict(list)
+    for r in reuniones:
+        grupos[("zona", r["fecha"], r["id_zona"])].append(r)
+        personas = {a["id_contacto"] for a in r.get("asistentes", ())}
+        if r.get("id_contacto") is not None:
+            personas.add(r["id_contacto"])
+        for p in personas:
+            grupos[("contacto", r["fecha"], p)].append(r)
+
+    resultado: dict[int, set[int]] = defaultdict(set)
+    for grupo in grupos.values():
+        if len(grupo) < 2:
+            continue
+        abiertas: list[tuple] = []  # (hora_fin, id_reunion)
+        for r in sorted(grupo, key=lambda r: (r["hora_inicio"], r["id_reunion"])):
+            # las que terminan antes de que empiece esta ya no pisan a nadie más
+            while abiertas and abiertas[0][0] <= r["hora_inicio"]:
+                heapq.heappop(abiertas)
+            for _, otra in abiertas:
+                if otra != r["id_reunion"]:
+                    resultado[r["id_reunion"]].add(otra)
+                    resultado[otra].add(r["id_reunion"])
+            heapq.heappush(abiertas, (r["hora_fin"], r["id_reunion"]))
+    return resultado
@@ -0,0 +1,206 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.db.consultas import consultas
+from app.core.config import (
+    USO_BUCKET_S,
+    USO_INTERVALO_S,
+    USO_MAX_PENDIENTES,
+    USO_LOTE,
+    USO_RESUMEN_TTL,
+    USO_RESUMEN_DIAS,
+)
+from app.core.metricas import metricas
+
+logger = logging.getLogger(__name__)
+
+
+def cubo(fecha: datetime, segundos: int) -> datetime:
+    """Redondea hacia abajo a múltiplos de `segundos` (12:03:41 con 60 -> 12:03:00)."""
+    inicio_dia = fecha.replace(hour=0, minute=0, second=0, microsecond=0)
+    desde_inicio = int((fecha - inicio_dia).total_seconds())
+    return inicio_dia + timedelta(seconds=desde_inicio - desde_inicio % segundos)
+
+
+class UsoOpciones:
+    """
+    Uso de las opciones de menú (sgi_historico_opciones) sin un INSERT por clic.
+
+    - apuntar() junta los eventos en memoria por (opción, usuario, cubo de
+      `bucket_s` segundos): diez clics en la misma opción dentro del mismo
+      minuto son una sola fila, la que admite el UNIQUE de la tabla.
+    - Un hilo vuelca lo pendiente cada `intervalo_s` (o antes si se pasa de
+      `max_pendientes`) con INSERT IGNORE por lotes: lo que ya estaba en BD
+      (otro worker, una reconexión del cliente) se ignora sin error.
+    - Al apagar se vuelca lo que quede.
+    """
+
+    def __init__(self, bucket_s: int, intervalo_s: float, max_pendientes: int, lote: int):
+        self.bucket_s = bucket_s
+        self.intervalo_s = intervalo_s
+        self.max_pendientes = max_pendientes
+        self.lote = lote
+        self._pendientes: set[tuple[int, int, datetime]] = set()
+        self._lock = threading.Lock()
+        self._despertar = threading.Event()
+        self._parar = threading.Event()
+        self._hilo: threading.Thread | None = None
+        self.recibidos = 0
+        self.filas = 0
+        self.fallidos = 0
+
+    def apuntar(self, id_usuario: int, eventos: list[tuple[int, datetime]]) -> int:
+        """Añade (id_opcion_menu, fecha) de un usuario. Devuelve cuántas filas nuevas quedan pendientes."""
+        claves = {(id_opcion, id_usuario, cubo(fecha, self.bucket_s)) for id_opcion, fecha in eventos}
+        with self._lock:
+            antes = len(self._pendientes)
+            self._pendientes |= claves
+            nuevas = len(self._pendientes) - antes
+            self.recibidos += len(eventos)
+            lleno = len(self._pendientes) >= self.max_pendientes
+        if lleno:
+            self._despertar.set()
+        return nuevas
+
+    def arrancar(self) -> None:
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        self._parar.clear()
+        self._hilo = threading.Thread(target=self._bucle, name="uso_opciones", daemon=True)
+        self._hilo.start()
+
+    def parar(self) -> None:
+        if self._hilo is None:
+            return
+        self._parar.set()
+        self._despertar.set()
+        self._hilo.join()
+        self._hilo = None
+
+    def _bucle(self) -> None:
+        while not self._parar.is_set():
+            self._despertar.wait(timeout=self.intervalo_s)
+            self._despertar.clear()
+            self.volcar()
+        self.volcar()
+
+    def volcar(self) -> None:
+        with self._lock:
+            pendientes, self._pendientes = self._pendientes, set()
+        if not pendientes:
+            return
+
+        filas = [
+            {"id_opcion_menu": o, "id_usuario": u, "fecha": f}
+            for o, u, f in sorted(pendientes, key=lambda k: k[2])
+        ]
+        db = SessionLocal()
+        try:
+            for inicio in range(0, len(filas), self.lote):
+                consultas.ejecutar(db, "uso_opciones.insertar", filas[inicio:inicio + self.lote])
+            db.commit()
+            self.filas += len(filas)
+        except Exception:
+            db.rollback()
+            self.fallidos += len(filas)
+            logger.exception("No se pudo guardar el uso de %d opciones de menú", len(filas))
+        finally:
+            db.close()
+
+    def pendientes(self) -> int:
+        with self._lock:
+            return len(self._pendientes)
+
+    def prometheus(self) -> list[str]:
+        return [
+            "# TYPE sge_menu_usage_events_total counter",
+            f"sge_menu_usage_events_total {self.recibidos}",
+            "# TYPE sge_menu_usage_rows_total counter",
+            f"sge_menu_usage_rows_total {self.filas}",
+            "# TYPE sge_menu_usage_failed_total counter",
+            f"sge_menu_usage_failed_total {self.fallidos}",
+            "# TYPE sge_menu_usage_pending gauge",
+            f"sge_menu_usage_pending {self.pendientes()}",
+        ]
+
+
+class ResumenUso:
+    """
+    Opciones más usadas por rol en los últimos `dias` días. Es un GROUP BY
+    sobre todo el histórico, así que no se lanza por petición: se guarda el
+    resultado y se recalcula cuando tiene más de `ttl` segundos.
+    """
+
+    def __init__(self, ttl: float, dias: int):
+        self.ttl = ttl
+        self.dias = dias
+        self._por_rol: dict[int, dict] = {}
+        self._generado: datetime | None = None
+        self._cargado = 0.0
+        self._lock = threading.Lock()
+        self._recargando = threading.Lock()
+
+    def cargar(self, db: Session | None = None) -> None:
+        propia = db is None
+        if propia:
+            db = SessionLocal()
+        try:
+            desde = datetime.now() - timedelta(days=self.dias)
+            rows = consultas.ejecutar(db, "uso_opciones.por_rol", {"desde": desde}).mappings().all()
+        finally:
+            if propia:
+                db.close()
+
+        # ya viene ordenado por rol y usos
+        por_rol: dict[int, dict] = {}
+        for r in rows:
+            rol = por_rol.setdefault(r["id_rol"], {"id_rol": r["id_rol"], "rol": r["rol"], "opciones": []})
+            rol["opciones"].append({
+                "id_opcion_menu": r["id_opcion_menu"],
+                "opcion": r["opcion"],
+                "usos": int(r["usos"]),
+                "usuarios": int(r["usuarios"]),
+            })
+
+        with self._lock:
+            self._por_rol = por_rol
+            self._generado = datetime.now().replace(microsecond=0)
+            self._cargado = time.monotonic()
+
+    def _vigente(self, db: Session) -> None:
+        if time.monotonic() - self._cargado < self.ttl:
+            return
+        # solo un hilo recalcula; si ya hay datos, los demás no esperan y devuelven los de antes
+        if not self._recargando.acquire(blocking=self._generado is None):
+            return
+        try:
+            if time.monotonic() - self._cargado >= self.ttl:
+                self.cargar(db)
+        finally:
+            self._recargando.release()
+
+    def top(self, db: Session, limit: int, id_rol: int | None = None) -> dict:
+        self._vigente(db)
+
+        with self._lock:
+            roles = [
+                {**r, "opciones": r["opciones"][:limit]}
+                for r in self._por_rol.values()
+                if id_rol is None or r["id_rol"] == id_rol
+            ]
+            return {"generado": self._generado, "dias": self.dias, "roles": roles}
+
+
+uso_opciones = UsoOpciones(
+    bucket_s=USO_BUCKET_S,
+    intervalo_s=USO_INTERVALO_S,
+    max_pendientes=USO_MAX_PENDIENTES,
+    lote=USO_LOTE,
+)
+resumen_uso = ResumenUso(ttl=USO_RESUMEN_TTL, dias=USO_RESUMEN_DIAS)
+metricas.colectores.append(uso_opciones.prometheus)
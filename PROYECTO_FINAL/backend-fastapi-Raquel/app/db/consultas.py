@@ -0,0 +1,966 @@
+"""
+Registro central de las sentencias SQL de la API.
+
+Cada sentencia se escribe una sola vez aquí, se compila (text() + bindparams)
+al importar el módulo y los endpoints la llaman por nombre:
+
+    consultas.ejecutar(db, "vacantes.existe", {"id": id_vacante})
+
+Los SELECT que se montan según filtros (listados, exportaciones, reparto
+automático) se registran como "dinámicos": el SQL lo construye el router,
+pero pasa por ejecutar_sql() con un nombre fijo para que cuente igual en
+las estadísticas.
+
+Por cada nombre se guardan llamadas, tiempo total y máximo (en /metrics).
+revisar_planes() lanza EXPLAIN sobre todas y marca los recorridos de tabla
+completos (python -m app.scripts.explicar_consultas).
+"""
+import logging
+import re
+import threading
+import time
+from collections.abc import Callable
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import TextClause
+
+from app.core.metricas import metricas, OPCION_CONSULTA
+from app.db.sqlite_compat import traducir
+
+logger = logging.getLogger(__name__)
+
+# textos distintos de consultas dinámicas que se guardan ya compilados
+MAX_DINAMICAS = 256
+
+
+class Consulta:
+    """Una sentencia con nombre y sus estadísticas de uso."""
+
+    def __init__(
+        self,
+        nombre: str,
+        sql: str | None,
+        listas: tuple[str, ...] = (),
+        ejemplo: dict | Callable[[], tuple[str, dict]] | None = None,
+        escaneo_ok: bool = False,
+    ):
+        self.nombre = nombre
+        self.sql = sql
+        self.listas = listas
+        self.stmt = compilar(sql, listas) if sql is not None else None
+        # parámetros para EXPLAIN; en las dinámicas, función que da (sql, params) de ejemplo
+        self.ejemplo = ejemplo
+        # recorrer la tabla entera es lo esperado (catálogos, listados completos)
+        self.escaneo_ok = escaneo_ok
+        self.llamadas = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+
+    @property
+    def dinamica(self) -> bool:
+        return self.sql is None
+
+    def registrar(self, segundos: float) -> None:
+        self.llamadas += 1
+        self.total_s += segundos
+        if segundos > self.max_s:
+            self.max_s = segundos
+
+
+def compilar(sql: str, listas: tuple[str, ...] = ()) -> TextClause:
+    stmt = text(sql)
+    if listas:
+        # IN :ids con una lista de valores
+        stmt = stmt.bindparams(*(bindparam(n, expanding=True) for n in listas))
+    return stmt
+
+
+class RegistroConsultas:
+    def __init__(self):
+        self._consultas: dict[str, Consulta] = {}
+        self._compiladas: dict[str, TextClause] = {}
+        self._lock = threading.Lock()
+
+    def registrar(
+        self,
+        nombre: str,
+        sql: str,
+        *,
+        listas: tuple[str, ...] = (),
+        ejemplo: dict | None = None,
+        escaneo_ok: bool = False,
+    ) -> Consulta:
+        if nombre in self._consultas:
+            raise ValueError(f"Consulta registrada dos veces: {nombre}")
+        c = Consulta(nombre, sql, listas, ejemplo, escaneo_ok)
+        self._consultas[nombre] = c
+        return c
+
+    def dinamica(
+        self,
+        nombre: str,
+        ejemplo: Callable[[], tuple[str, dict]] | None = None,
+        escaneo_ok: bool = False,
+    ) -> Consulta:
+        """Consulta cuyo SQL se monta en cada llamada (ver ejecutar_sql)."""
+        if nombre in self._consultas:
+            raise ValueError(f"Consulta registrada dos veces: {nombre}")
+        c = Consulta(nombre, None, ejemplo=ejemplo, escaneo_ok=escaneo_ok)
+        self._consultas[nombre] = c
+        return c
+
+    def __getitem__(self, nombre: str) -> Consulta:
+        return self._consultas[nombre]
+
+    def __iter__(self):
+        return iter(list(self._consultas.values()))
+
+    def ejecutar(self, db: Session, nombre: str, params: dict | list | None = None):
+        c = self._consultas[nombre]
+        return self._medir(c, db, c.stmt, params)
+
+    def ejecutar_sql(self, db: Session, nombre: str, sql: str, params: dict | None = None, **opciones):
+        """
+        Ejecuta el SQL montado por el router a nombre de una consulta dinámica.
+        `opciones` son execution_options (p.ej. stream_results en las exportaciones).
+        """
+        c = self._consultas[nombre]
+        if not c.dinamica:
+            raise ValueError(f"{nombre} no es una consulta dinámica")
+        stmt = self.compilada(sql)
+        if opciones:
+            stmt = stmt.execution_options(**opciones)
+        return self._medir(c, db, stmt, params)
+
+    def compilada(self, sql: str) -> TextClause:
+        """text(sql) reutilizado entre llamadas con el mismo texto."""
+        stmt = self._compiladas.get(sql)
+        if stmt is None:
+            stmt = text(sql)
+            with self._lock:
+                if len(self._compiladas) >= MAX_DINAMICAS:
+                    self._compiladas.clear()
+                self._compiladas[sql] = stmt
+        return stmt
+
+    def _medir(self, c: Consulta, db: Session, stmt, params):
+        t0 = time.perf_counter()
+        try:
+            # el nombre llega a metricas.registrar_sentencia para etiquetar las lentas
+            return db.execute(stmt, params, execution_options={OPCION_CONSULTA: c.nombre})
+        finally:
+            segundos = time.perf_counter() - t0
+            with self._lock:
+                c.registrar(segundos)
+
+    def resumen(self) -> list[dict]:
+        with self._lock:
+            return [
+                {
+                    "consulta": c.nombre,
+                    "llamadas": c.llamadas,
+                    "total_ms": round(c.total_s * 1000, 3),
+                    "media_ms": round(c.total_s / c.llamadas * 1000, 3) if c.llamadas else 0.0,
+                    "max_ms": round(c.max_s * 1000, 3),
+                }
+                for c in self._consultas.values()
+            ]
+
+    def prometheus(self) -> list[str]:
+        with self._lock:
+            usadas = [c for c in self._consultas.values() if c.llamadas]
+            lineas = [
+                "# HELP sge_db_query_calls_total Ejecuciones de cada consulta del registro",
+                "# TYPE sge_db_query_calls_total counter",
+            ]
+            lineas += [f'sge_db_query_calls_total{{query="{c.nombre}"}} {c.llamadas}' for c in usadas]
+            lineas += ["# TYPE sge_db_query_seconds_total counter"]
+            lineas += [f'sge_db_query_seconds_total{{query="{c.nombre}"}} {c.total_s:.6f}' for c in usadas]
+            lineas += ["# TYPE sge_db_query_seconds_max gauge"]
+            lineas += [f'sge_db_query_seconds_max{{query="{c.nombre}"}} {c.max_s:.6f}' for c in usadas]
+            return lineas
+
+
+consultas = RegistroConsultas()
+metricas.colectores.append(consultas.prometheus)
+
+
+# ---------------------------------------------------------------------------
+# EXPLAIN
+# ---------------------------------------------------------------------------
+
+# SQLite: "SCAN a" / "SCAN TABLE a" sin "USING ... INDEX" = tabla entera
+_SCAN_SQLITE = re.compile(r"^SCAN (?:TABLE )?(\S+)")
+
+
+def _parametros_ejemplo(c: Consulta) -> dict:
+    params = {n: [1] if n in c.listas else 1 for n in c.stmt.compile().params}
+    params.update(c.ejemplo or {})
+    return params
+
+
+def explicar(db: Session, c: Consulta) -> tuple[list[dict], list[str]]:
+    """Plan de ejecución de la consulta y las tablas que recorre enteras."""
+    if c.dinamica:
+        if c.ejemplo is None:
+            return [], []
+        sql, params = c.ejemplo()
+        listas = ()
+    else:
+        sql, params, listas = c.sql, _parametros_ejemplo(c), c.listas
+
+    if db.get_bind().dialect.name == "sqlite":
+        # SQLite solo se usa con el arnés de bench/: el SQL pasa por la misma traducción
+        # que allí (FOR UPDATE, SEPARATOR, TIME_FORMAT...), o no se puede ni preparar
+        filas = db.execute(compilar("EXPLAIN QUERY PLAN " + traducir(sql), listas), params).mappings().all()
+        plan = [dict(f) for f in filas]
+        escaneos = []
+        for f in plan:
+            m = _SCAN_SQLITE.match(f["detail"])
+            if m and m.group(1) != "CONSTANT" and " USING " not in f["detail"]:
+                escaneos.append(m.group(1))
+        return plan, escaneos
+
+    # MySQL / MariaDB: type = ALL es recorrido completo
+    filas = db.execute(compilar("EXPLAIN " + sql, listas), params).mappings().all()
+    plan = [{k.lower(): v for k, v in f.items()} for f in filas]
+    escaneos = [f["table"] for f in plan if str(f.get("type") or "").upper() == "ALL"]
+    return plan, escaneos
+
+
+def revisar_planes(engine: Engine) -> list[dict]:
+    """
+    EXPLAIN de cada consulta del registro (los INSERT no). Devuelve un informe
+    por consulta; "aviso" es True si recorre tablas enteras sin esperarlo.
+    """
+    informe = []
+    with Session(engine) as db:
+        for c in consultas:
+            if c.sql is not None and c.sql.lstrip().upper().startswith("INSERT"):
+                continue
+            try:
+                plan, escaneos = explicar(db, c)
+            except Exception as e:
+                db.rollback()
+                informe.append({"consulta": c.nombre, "error": str(e).splitlines()[0], "aviso": False})
+                continue
+            informe.append({
+                "consulta": c.nombre,
+                "plan": plan,
+                "escaneos": escaneos,
+                "aviso": bool(escaneos) and not c.escaneo_ok,
+            })
+        db.rollback()
+    return informe
+
+
+def avisar_escaneos(engine: Engine) -> int:
+    """Para el arranque: deja en el log las consultas con recorridos completos o que fallan."""
+    avisos = 0
+    for r in revisar_planes(engine):
+        if "error" in r:
+            avisos += 1
+            logger.warning("Consulta %s: no se pudo explicar (%s)", r["consulta"], r["error"])
+        elif r["aviso"]:
+            avisos += 1
+            logger.warning("Consulta %s recorre tablas enteras: %s", r["consulta"], ", ".join(r["escaneos"]))
+    return avisos
+
+
+# ---------------------------------------------------------------------------
+# Sentencias
+# ---------------------------------------------------------------------------
+
+registrar = consultas.registrar
+
+# --- comunes ---------------------------------------------------------------
+
+registrar("health.select_1", "SELECT 1")
+
+registrar("usuarios.por_token", """
+    SELECT id_usuario, usuario, id_rol
+    FROM sgi_usuarios
+    WHERE token_sesion = :t
+    LIMIT 1
+""", ejemplo={"t": "x"})
+
+# --- permisos y menú por rol (app/core/permisos.py) -----------------------
+
+registrar("permisos.rol_menu", """
+    SELECT
+        id_rol, id_grupo_menu, grupo, orden,
+        id_opcion_menu, opcion, accion, texto_tooltip,
+        permiso_post, permiso_put, permiso_delete
+    FROM sgi_vista_rol_menu
+    ORDER BY id_rol, orden, grupo, opcion
+""", escaneo_ok=True)
+
+registrar("permisos.roles", """
+    SELECT id_rol, rol
+    FROM sgi_roles
+""", escaneo_ok=True)
+
+# --- catálogos (app/core/catalogos.py) ------------------------------------
+
+registrar("catalogos.provincias", """
+    SELECT id_provincia, provincia
+    FROM sgi_provincias
+    ORDER BY provincia
+""", escaneo_ok=True)
+
+registrar("catalogos.ciclos", """
+    SELECT id_ciclo, ciclo, cod_ciclo, id_nivel, id_familia
+    FROM sgi_ciclos
+    ORDER BY ciclo
+""", escaneo_ok=True)
+
+registrar("catalogos.centros", """
+    SELECT e.id_entidad, e.entidad, e.id_zona, e.id_provincia, e.localidad
+    FROM sgi_entidades e
+    JOIN sgi_tipos_entidad t ON t.id_tipo_entidad = e.id_tipo_entidad
+    WHERE UPPER(t.tipo_entidad) = 'CENTRO EDUCATIVO'
+    ORDER BY e.entidad
+""", escaneo_ok=True)
+
+registrar("catalogos.entidades", """
+    SELECT id_entidad, entidad, id_tipo_entidad, id_zona, id_provincia, localidad
+    FROM sgi_entidades
+    ORDER BY entidad
+""", escaneo_ok=True)
+
+registrar("catalogos.zonas", """
+    SELECT id_zona, zona, id_provincia
+    FROM sgi_zonas
+    ORDER BY zona
+""", escaneo_ok=True)
+
+registrar("catalogos.tipos-entidad", """
+    SELECT id_tipo_entidad, tipo_entidad
+    FROM sgi_tipos_entidad
+    ORDER BY tipo_entidad
+""", escaneo_ok=True)
+
+registrar("catalogos.modos-reunion", """
+    SELECT id_modo_reunion, modo_reunion
+    FROM sgi_modos_reunion
+    ORDER BY modo_reunion
+""", escaneo_ok=True)
+
+registrar("catalogos.motivos-reunion", """
+    SELECT id_motivo_reunion, motivo_reunion
+    FROM sgi_motivos_reunion
+    ORDER BY motivo_reunion
+""", escaneo_ok=True)
+
+# --- índice de entidades (app/core/entidades_index.py) --------------------
+
+registrar("entidades.tipos_todas", """
+    SELECT id_entidad, id_tipo_entidad
+    FROM sgi_entidades
+""", escaneo_ok=True)
+
+registrar("entidades.tipos_en", """
+    SELECT id_entidad, id_tipo_entidad
+    FROM sgi_entidades
+    WHERE id_entidad IN :ids
+""", listas=("ids",))
+
+registrar("tipos_entidad.todos", """
+    SELECT id_tipo_entidad, tipo_entidad
+    FROM sgi_tipos_entidad
+""", escaneo_ok=True)
+
+registrar("motivos_nodual.todos", """
+    SELECT id_motivo_nodual, id_tipo_entidad
+    FROM sgi_motivos_nodual
+""", escaneo_ok=True)
+
+# --- alumnos ---------------------------------------------------------------
+
+registrar("alumnos.existe", """
+    SELECT id_alumno
+    FROM sgi_alumnos
+    WHERE id_alumno = :id
+    LIMIT 1
+""")
+
+registrar("alumnos.detalle", """
+    SELECT
+        a.id_alumno,
+        a.nif_nie,
+        a.nombre,
+        a.apellidos,
+        a.fecha_nacimiento,
+        a.id_entidad_centro,
+        a.id_ciclo,
+        a.curso,
+        a.telefono,
+        a.direccion,
+        a.cp,
+        a.localidad,
+        a.id_provincia,
+        a.observaciones,
+
+        e.entidad AS entidad_centro,
+        c.ciclo AS ciclo,
+        p.provincia AS provincia,
+
+        ev.entidad AS vacante_asignada
+    FROM sgi_alumnos a
+    JOIN sgi_entidades e ON e.id_entidad = a.id_entidad_centro
+    JOIN sgi_ciclos c ON c.id_ciclo = a.id_ciclo
+    LEFT JOIN sgi_provincias p ON p.id_provincia = a.id_provincia
+    LEFT JOIN sgi_vacantes_x_alumnos vxa ON vxa.id_alumno = a.id_alumno
+    LEFT JOIN sgi_vacantes v ON v.id_vacante = vxa.id_vacante
+    LEFT JOIN sgi_entidades ev ON ev.id_entidad = v.id_entidad
+    WHERE a.id_alumno = :id
+    LIMIT 1
+""")
+
+registrar("alumnos.insertar", """
+    INSERT INTO sgi_alumnos (
+        nif_nie, nombre, apellidos, fecha_nacimiento,
+        id_entidad_centro, id_ciclo, curso, telefono,
+        direccion, cp, localidad, id_provincia, observaciones
+    ) VALUES (
+        :nif_nie, :nombre, :apellidos, :fecha_nacimiento,
+        :id_entidad_centro, :id_ciclo, :curso, :telefono,
+        :direccion, :cp, :localidad, :id_provincia, :observaciones
+    )
+""")
+
+registrar("alumnos.actualizar", """
+    UPDATE sgi_alumnos
+    SET
+        nif_nie = :nif_nie,
+        nombre = :nombre,
+        apellidos = :apellidos,
+        fecha_nacimiento = :fecha_nacimiento,
+        id_entidad_centro = :id_entidad_centro,
+        id_ciclo = :id_ciclo,
+        curso = :curso,
+        telefono = :telefono,
+        direccion = :direccion,
+        cp = :cp,
+        localidad = :localidad,
+        id_provincia = :id_provincia,
+        observaciones = :observaciones
+    WHERE id_alumno = :id_alumno
+""", ejemplo={"nif_nie": "x"})
+
+registrar("alumnos.borrar", """
+    DELETE FROM sgi_alumnos
+    WHERE id_alumno = :id
+""")
+
+registrar("alumnos.nifs_existentes", """
+    SELECT nif_nie
+    FROM sgi_alumnos
+    WHERE nif_nie IN :ids
+""", listas=("ids",), ejemplo={"ids": ["x"]})
+
+# índice de búsqueda (app/core/buscador_alumnos.py)
+registrar("alumnos.para_buscador", """
+    SELECT id_alumno, nombre, apellidos, nif_nie, id_ciclo, curso
+    FROM sgi_alumnos
+""", escaneo_ok=True)
+
+registrar("alumnos.para_buscador_por_nif", """
+    SELECT id_alumno, nombre, apellidos, nif_nie, id_ciclo, curso
+    FROM sgi_alumnos
+    WHERE nif_nie IN :ids
+""", listas=("ids",), ejemplo={"ids": ["x"]})
+
+registrar("ciclos.existentes", """
+    SELECT id_ciclo
+    FROM sgi_ciclos
+    WHERE id_ciclo IN :ids
+""", listas=("ids",))
+
+registrar("provincias.existentes", """
+    SELECT id_provincia
+    FROM sgi_provincias
+    WHERE id_provincia IN :ids
+""", listas=("ids",))
+
+# --- vacantes --------------------------------------------------------------
+
+registrar("vacantes.existe", """
+    SELECT id_vacante
+    FROM sgi_vacantes
+    WHERE id_vacante = :id
+    LIMIT 1
+""")
+
+registrar("vacantes.detalle", """
+    SELECT
+        v.id_vacante,
+        v.id_entidad,
+        v.id_ciclo,
+        v.curso,
+        v.num_vacantes,
+        v.observaciones,
+        v.alumnos_asignados
+    FROM sgi_vacantes v
+    WHERE v.id_vacante = :id
+    LIMIT 1
+""")
+
+registrar("vacantes.ciclo_curso", """
+    SELECT id_ciclo, curso
+    FROM sgi_vacantes
+    WHERE id_vacante = :id
+    LIMIT 1
+""")
+
+registrar("vacantes.ocupacion", """
+    SELECT num_vacantes, alumnos_asignados
+    FROM sgi_vacantes
+    WHERE id_vacante = :id
+""")
+
+# contador de ocupación bloqueado hasta el commit (editar / borrar la vacante)
+registrar("vacantes.ocupadas_bloqueo", """
+    SELECT alumnos_asignados
+    FROM sgi_vacantes
+    WHERE id_vacante = :id
+    LIMIT 1
+    FOR UPDATE
+""")
+
+registrar("vacantes.insertar", """
+    INSERT INTO sgi_vacantes (
+        id_entidad, id_ciclo, curso, num_vacantes, observaciones
+    ) VALUES (
+        :id_entidad, :id_ciclo, :curso, :num_vacantes, :observaciones
+    )
+""")
+
+registrar("vacantes.actualizar", """
+    UPDATE sgi_vacantes
+    SET
+        id_entidad = :id_entidad,
+        id_ciclo = :id_ciclo,
+        curso = :curso,
+        num_vacantes = :num_vacantes,
+        observaciones = :observaciones
+    WHERE id_vacante = :id_vacante
+""")
+
+registrar("vacantes.borrar", """
+    DELETE FROM sgi_vacantes
+    WHERE id_vacante = :id
+""")
+
+# suma (o resta, con n negativo) al contador sgi_vacantes.alumnos_asignados
+registrar("vacantes.sumar_ocupadas", """
+    UPDATE sgi_vacantes
+    SET alumnos_asignados = alumnos_asignados + :n
+    WHERE id_vacante = :id_vacante
+""")
+
+registrar("vacantes.alumnos_asignados", """
+    SELECT
+        a.id_alumno,
+        a.nombre,
+        a.apellidos,
+        a.nif_nie
+    FROM sgi_vacantes_x_alumnos vxa
+    JOIN sgi_alumnos a ON a.id_alumno = vxa.id_alumno
+    WHERE vxa.id_vacante = :id_vacante
+    ORDER BY a.apellidos, a.nombre
+""")
+
+# alumnos del mismo ciclo+curso que NO estén asignados en la tabla auxiliar
+registrar("vacantes.alumnos_disponibles", """
+    SELECT
+        a.id_alumno,
+        a.nombre,
+        a.apellidos,
+        a.nif_nie
+    FROM sgi_alumnos a
+    LEFT JOIN sgi_vacantes_x_alumnos vxa ON vxa.id_alumno = a.id_alumno
+    WHERE a.id_ciclo = :id_ciclo
+      AND a.curso = :curso
+      AND vxa.id_alumno IS NULL
+    ORDER BY a.apellidos, a.nombre
+""")
+
+# vacante, alumno, ocupación y vacante actual del alumno en una lectura;
+# FOR UPDATE bloquea la vacante (y el alumno) hasta el commit
+registrar("vacantes.para_asignar", """
+    SELECT
+        v.id_vacante,
+        v.id_ciclo,
+        v.curso,
+        v.num_vacantes,
+        a.id_alumno,
+        a.id_ciclo AS alumno_id_ciclo,
+        a.curso AS alumno_curso,
+        v.alumnos_asignados AS ocupadas
+    FROM sgi_vacantes v
+    LEFT JOIN sgi_alumnos a ON a.id_alumno = :id_alumno
+    WHERE v.id_vacante = :id_vacante
+    FOR UPDATE
+""")
+
+# --- vacantes x alumnos ----------------------------------------------------
+
+registrar("vacantes_x_alumnos.insertar", """
+    INSERT INTO sgi_vacantes_x_alumnos (id_vacante, id_alumno)
+    VALUES (:id_vacante, :id_alumno)
+""")
+
+registrar("vacantes_x_alumnos.borrar", """
+    DELETE FROM sgi_vacantes_x_alumnos
+    WHERE id_vacante = :id_vacante
+      AND id_alumno = :id_alumno
+""")
+
+registrar("vacantes_x_alumnos.de_alumno", """
+    SELECT id_vacante_x_alumno
+    FROM sgi_vacantes_x_alumnos
+    WHERE id_alumno = :id
+    LIMIT 1
+""")
+
+
+# --- entidades y contactos (app/core/facetas.py) ---------------------------
+
+# lo que devuelve el listado con facetas; "_en" es la misma para refrescar unas pocas
+_ENTIDADES_FACETAS = """
+    SELECT
+        e.id_entidad,
+        e.entidad,
+        e.codigo,
+        e.id_tipo_entidad,
+        t.tipo_entidad,
+        e.id_zona,
+        z.zona,
+        e.id_provincia,
+        p.provincia,
+        e.localidad,
+        e.cp,
+        e.telefono,
+        e.email,
+        e.web
+    FROM sgi_entidades e
+    JOIN sgi_tipos_entidad t ON t.id_tipo_entidad = e.id_tipo_entidad
+    JOIN sgi_zonas z ON z.id_zona = e.id_zona
+    LEFT JOIN sgi_provincias p ON p.id_provincia = e.id_provincia
+"""
+
+registrar("entidades.facetas", _ENTIDADES_FACETAS, escaneo_ok=True)
+
+registrar("entidades.facetas_en", _ENTIDADES_FACETAS + """
+    WHERE e.id_entidad IN :ids
+""", listas=("ids",))
+
+# familias profesionales de una entidad = las de sus contactos
+registrar("entidades.facetas_familias", """
+    SELECT DISTINCT c.id_entidad, c.id_familia, f.familia
+    FROM sgi_contactos c
+    JOIN sgi_familias f ON f.id_familia = c.id_familia
+""", escaneo_ok=True)
+
+registrar("entidades.facetas_familias_en", """
+    SELECT DISTINCT c.id_entidad, c.id_familia, f.familia
+    FROM sgi_contactos c
+    JOIN sgi_familias f ON f.id_familia = c.id_familia
+    WHERE c.id_entidad IN :ids
+""", listas=("ids",))
+
+_CONTACTOS_FACETAS = """
+    SELECT
+        c.id_contacto,
+        c.nombre,
+        c.apellidos,
+        c.cargo,
+        c.email,
+        c.telefono_personal,
+        c.corporativo_largo,
+        c.corporativo_corto,
+        c.id_entidad,
+        e.entidad,
+        e.id_tipo_entidad,
+        t.tipo_entidad,
+        c.id_zona,
+        z.zona,
+        c.id_familia,
+        f.familia,
+        c.id_provincia,
+        p.provincia,
+        c.localidad
+    FROM sgi_contactos c
+    JOIN sgi_entidades e ON e.id_entidad = c.id_entidad
+    JOIN sgi_tipos_entidad t ON t.id_tipo_entidad = e.id_tipo_entidad
+    LEFT JOIN sgi_zonas z ON z.id_zona = c.id_zona
+    LEFT JOIN sgi_familias f ON f.id_familia = c.id_familia
+    LEFT JOIN sgi_provincias p ON p.id_provincia = c.id_provincia
+"""
+
+registrar("contactos.facetas", _CONTACTOS_FACETAS, escaneo_ok=True)
+
+registrar("contactos.facetas_en", _CONTACTOS_FACETAS + """
+    WHERE c.id_contacto IN :ids
+""", listas=("ids",))
+
+registrar("entidades.detalle", """
+    SELECT
+        id_entidad, entidad, codigo, id_tipo_entidad, id_zona, id_contacto,
+        direccion, cp, localidad, id_provincia, telefono, email, web, observaciones
+    FROM sgi_entidades
+    WHERE id_entidad = :id
+    LIMIT 1
+""")
+
+registrar("entidades.existe_bloqueo", """
+    SELECT id_entidad
+    FROM sgi_entidades
+    WHERE id_entidad = :id
+    FOR UPDATE
+""")
+
+registrar("entidades.insertar", """
+    INSERT INTO sgi_entidades (
+        entidad, codigo, id_tipo_entidad, id_zona, id_contacto,
+        direccion, cp, localidad, id_provincia, telefono, email, web, observaciones
+    ) VALUES (
+        :entidad, :codigo, :id_tipo_entidad, :id_zona, :id_contacto,
+        :direccion, :cp, :localidad, :id_provincia, :telefono, :email, :web, :observaciones
+    )
+""")
+
+registrar("entidades.actualizar", """
+    UPDATE sgi_entidades
+    SET
+        entidad = :entidad,
+        codigo = :codigo,
+        id_tipo_entidad = :id_tipo_entidad,
+        id_zona = :id_zona,
+        id_contacto = :id_contacto,
+        direccion = :direccion,
+        cp = :cp,
+        localidad = :localidad,
+        id_provincia = :id_provincia,
+        telefono = :telefono,
+        email = :email,
+        web = :web,
+        observaciones = :observaciones
+    WHERE id_entidad = :id_entidad
+""")
+
+registrar("entidades.borrar", """
+    DELETE FROM sgi_entidades
+    WHERE id_entidad = :id
+""")
+
+registrar("contactos.detalle", """
+    SELECT
+        id_contacto, nombre, apellidos, email, corporativo_largo, corporativo_corto,
+        telefono_personal, id_zona, id_entidad, cargo, id_familia,
+        direccion, cp, localidad, id_provincia, observaciones
+    FROM sgi_contactos
+    WHERE id_contacto = :id
+    LIMIT 1
+""")
+
+# la entidad a la que pertenecía (para refrescar también sus familias)
+registrar("contactos.entidad_bloqueo", """
+    SELECT id_entidad
+    FROM sgi_contactos
+    WHERE id_contacto = :id
+    FOR UPDATE
+""")
+
+registrar("contactos.insertar", """
+    INSERT INTO sgi_contactos (
+        nombre, apellidos, email, corporativo_largo, corporativo_corto,
+        telefono_personal, id_zona, id_entidad, cargo, id_familia,
+        direccion, cp, localidad, id_provincia, observaciones
+    ) VALUES (
+        :nombre, :apellidos, :email, :corporativo_largo, :corporativo_corto,
+        :telefono_personal, :id_zona, :id_entidad, :cargo, :id_familia,
+        :direccion, :cp, :localidad, :id_provincia, :observaciones
+    )
+""")
+
+registrar("contactos.actualizar", """
+    UPDATE sgi_contactos
+    SET
+        nombre = :nombre,
+        apellidos = :apellidos,
+        email = :email,
+        corporativo_largo = :corporativo_largo,
+        corporativo_corto = :corporativo_corto,
+        telefono_personal = :telefono_personal,
+        id_zona = :id_zona,
+        id_entidad = :id_entidad,
+        cargo = :cargo,
+        id_familia = :id_familia,
+        direccion = :direccion,
+        cp = :cp,
+        localidad = :localidad,
+        id_provincia = :id_provincia,
+        observaciones = :observaciones
+    WHERE id_contacto = :id_contacto
+""")
+
+registrar("contactos.borrar", """
+    DELETE FROM sgi_contactos
+    WHERE id_contacto = :id
+""")
+
+# --- reuniones -------------------------------------------------------------
+
+registrar("reuniones.detalle", """
+    SELECT
+        r.id_reunion,
+        r.reunion,
+        r.fecha,
+        TIME_FORMAT(r.hora_inicio, '%H:%i') AS hora_inicio,
+        TIME_FORMAT(r.hora_fin, '%H:%i') AS hora_fin,
+        r.id_zona,
+        r.id_modo_reunion,
+        r.id_motivo_reunion,
+        r.id_contacto,
+        r.id_entidad_target,
+        r.objetivo,
+        r.resultado,
+        r.observaciones,
+        r.ubicacion,
+        r.localidad
+    FROM sgi_reuniones r
+    WHERE r.id_reunion = :id
+    LIMIT 1
+""")
+
+registrar("reuniones.asistentes", """
+    SELECT a.id_contacto, CONCAT_WS(' ', c.nombre, c.apellidos) AS contacto
+    FROM sgi_asistentes a
+    JOIN sgi_contactos c ON c.id_contacto = a.id_contacto
+    WHERE a.id_reunion = :id
+    ORDER BY c.apellidos, c.nombre
+""")
+
+# bloquea la reunión hasta el commit (editar / borrar)
+registrar("reuniones.existe_bloqueo", """
+    SELECT id_reunion
+    FROM sgi_reuniones
+    WHERE id_reunion = :id
+    LIMIT 1
+    FOR UPDATE
+""")
+
+# reuniones del mismo día que se pisan con [hora_inicio, hora_fin) en la misma
+# zona o con alguna persona en común. Va por el índice (fecha, hora_inicio, hora_fin)
+# (sql/004): solo se miran las de ese día que empiezan antes de que acabe esta.
+# FOR UPDATE bloquea ese tramo del índice: dos altas a la vez no pueden pasar las dos
+registrar("reuniones.solapes", """
+    SELECT
+        r.id_reunion,
+        r.reunion,
+        r.fecha,
+        TIME_FORMAT(r.hora_inicio, '%H:%i') AS hora_inicio,
+        TIME_FORMAT(r.hora_fin, '%H:%i') AS hora_fin,
+        r.id_zona,
+        r.id_contacto,
+        CASE WHEN r.id_zona = :id_zona THEN 'zona' ELSE 'contacto' END AS motivo
+    FROM sgi_reuniones r
+    WHERE r.fecha = :fecha
+      AND r.hora_inicio < :hora_fin
+      AND r.hora_fin > :hora_inicio
+      AND r.id_reunion <> :excluir
+      AND (
+          r.id_zona = :id_zona
+          OR r.id_contacto IN :contactos
+          OR EXISTS (
+              SELECT 1 FROM sgi_asistentes a
+              WHERE a.id_reunion = r.id_reunion AND a.id_contacto IN :contactos
+          )
+      )
+    ORDER BY r.hora_inicio
+    FOR UPDATE
+""", listas=("contactos",), ejemplo={
+    "fecha": "2025-01-01", "hora_inicio": "09:00", "hora_fin": "10:00",
+    "id_zona": 1, "contactos": [1], "excluir": 0,
+})
+
+registrar("reuniones.insertar", """
+    INSERT INTO sgi_reuniones (
+        reunion, fecha, hora_inicio, hora_fin, id_zona, id_modo_reunion,
+        id_motivo_reunion, id_contacto, id_entidad_target, objetivo,
+        resultado, observaciones, ubicacion, localidad
+    ) VALUES (
+        :reunion, :fecha, :hora_inicio, :hora_fin, :id_zona, :id_modo_reunion,
+        :id_motivo_reunion, :id_contacto, :id_entidad_target, :objetivo,
+        :resultado, :observaciones, :ubicacion, :localidad
+    )
+""")
+
+registrar("reuniones.actualizar", """
+    UPDATE sgi_reuniones
+    SET
+        reunion = :reunion,
+        fecha = :fecha,
+        hora_inicio = :hora_inicio,
+        hora_fin = :hora_fin,
+        id_zona = :id_zona,
+        id_modo_reunion = :id_modo_reunion,
+        id_motivo_reunion = :id_motivo_reunion,
+        id_contacto = :id_contacto,
+        id_entidad_target = :id_entidad_target,
+        objetivo = :objetivo,
+        resultado = :resultado,
+        observaciones = :observaciones,
+        ubicacion = :ubicacion,
+        localidad = :localidad
+    WHERE id_reunion = :id_reunion
+""")
+
+registrar("reuniones.borrar", """
+    DELETE FROM sgi_reuniones
+    WHERE id_reunion = :id
+""")
+
+registrar("asistentes.insertar", """
+    INSERT INTO sgi_asistentes (id_reunion, id_contacto)
+    VALUES (:id_reunion, :id_contacto)
+""")
+
+registrar("asistentes.borrar_de_reunion", """
+    DELETE FROM sgi_asistentes
+    WHERE id_reunion = :id
+""")
+
+
+# --- auditoría (app/core/auditoria.py) ------------------------------------
+
+registrar("logs.insertar", """
+    INSERT INTO sgi_logs (fecha, usuario, id_tipo_log, contenido)
+    VALUES (:fecha, :usuario, :id_tipo_log, :contenido)
+""")
+
+
+# --- uso de opciones de menú (app/core/uso_opciones.py) -------------------
+
+registrar("uso_opciones.insertar", """
+    INSERT IGNORE INTO sgi_historico_opciones (id_opcion_menu, id_usuario, fecha)
+    VALUES (:id_opcion_menu, :id_usuario, :fecha)
+""")
+
+# agregado periódico (ResumenUso), no por petición: recorre el histórico del periodo.
+# "usos" cuenta filas, es decir cubos de USO_BUCKET_S con uso, no clics
+registrar("uso_opciones.por_rol", """
+    SELECT u.id_rol, r.rol, h.id_opcion_menu, o.opcion,
+           COUNT(*) AS usos, COUNT(DISTINCT h.id_usuario) AS usuarios
+    FROM sgi_historico_opciones h
+    JOIN sgi_usuarios u ON u.id_usuario = h.id_usuario
+    JOIN sgi_roles r ON r.id_rol = u.id_rol
+    JOIN sgi_opciones_menu o ON o.id_opcion_menu = h.id_opcion_menu
+    WHERE h.fecha >= :desde
+    GROUP BY u.id_rol, r.rol, h.id_opcion_menu, o.opcion
+    ORDER BY u.id_rol, usos DESC, h.id_opcion_menu
+""", ejemplo={"desde": "2000-01-01"}, escaneo_ok=True)
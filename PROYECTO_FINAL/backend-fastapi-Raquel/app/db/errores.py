@@ -0,0 +1,10 @@
+from sqlalchemy.exc import OperationalError
+
+# 1213: interbloqueo (InnoDB deshace una de las transacciones); 1205: espera de bloqueo agotada.
+# No son fallos de la petición: la otra ha ganado y esta se puede repetir.
+CODIGOS_BLOQUEO = (1213, 1205)
+
+
+def es_bloqueo(e: OperationalError) -> bool:
+    args = getattr(e.orig, "args", ())
+    return bool(args) and args[0] in CODIGOS_BLOQUEO
@@ -0,0 +1,155 @@
+import logging
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from app.core.config import DB_POOL_SLOW_WAIT_MS
+from app.core.metricas import metricas
+
+logger = logging.getLogger(__name__)
+
+PRE_PING = ("siempre", "inactiva", "nunca")
+
+
+class EstadisticasEspera:
+    """Lo que tardan los checkouts del pool (esperar hueco + abrir conexión si toca)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+        self.lentos = 0
+        self.timeouts = 0
+
+    def registrar(self, segundos: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.total_s += segundos
+            self.max_s = max(self.max_s, segundos)
+            if segundos * 1000 >= DB_POOL_SLOW_WAIT_MS:
+                self.lentos += 1
+
+    def timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def resumen(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "espera_media_ms": round(self.total_s / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "espera_max_ms": round(self.max_s * 1000, 3),
+                "esperas_lentas": self.lentos,
+                "timeouts": self.timeouts,
+            }
+
+
+class PoolMedido(QueuePool):
+    """QueuePool que mide cuánto espera cada petición por una conexión."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.espera = EstadisticasEspera()
+
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            conexion = super()._do_get()
+        except exc.TimeoutError:
+            self.espera.timeout()
+            logger.error("Sin conexiones libres tras %.1fs (%s)", time.perf_counter() - t0, self.status())
+            raise
+
+        segundos = time.perf_counter() - t0
+        self.espera.registrar(segundos)
+        if segundos * 1000 >= DB_POOL_SLOW_WAIT_MS:
+            logger.warning("Coger conexión del pool tardó %.1f ms (%s)", segundos * 1000, self.status())
+        return conexion
+
+
+def estado_pool(engine: Engine) -> dict:
+    pool = engine.pool
+    data = {"tipo": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        data.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+            "timeout_s": pool.timeout(),
+        })
+    if isinstance(pool, PoolMedido):
+        data.update(pool.espera.resumen())
+    return data
+
+
+def ping_si_inactiva(engine: Engine, inactiva_s: float) -> None:
+    """
+    pool_pre_ping hace un SELECT 1 en cada checkout. Esto solo lo hace si la
+    conexión lleva más de `inactiva_s` en el pool, que es cuando MySQL puede
+    haberla cerrado; con tráfico normal no cuesta ningún viaje extra.
+    """
+
+    @event.listens_for(engine, "checkin")
+    def _devuelta(dbapi_conn, record):
+        record.info["sge_devuelta"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _comprobar(dbapi_conn, record, proxy):
+        devuelta = record.info.get("sge_devuelta")
+        if devuelta is None or time.monotonic() - devuelta < inactiva_s:
+            return
+        cursor = dbapi_conn.cursor()
+        try:
+            cursor.execute("SELECT 1")
+        except Exception as e:
+            # el pool descarta esta conexión y lo intenta con otra
+            raise exc.DisconnectionError() from e
+        finally:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+
+
+def calentar_pool(engine: Engine, n: int) -> int:
+    """Abre `n` conexiones a la vez y las devuelve al pool. Devuelve cuántas se abrieron."""
+    conexiones = []
+    try:
+        for _ in range(n):
+            conexiones.append(engine.connect())
+    finally:
+        for c in conexiones:
+            c.close()
+    return len(conexiones)
+
+
+def registrar_metricas_pool(engine: Engine) -> None:
+    """Añade el estado del pool a /metrics."""
+
+    def lineas() -> list[str]:
+        st = estado_pool(engine)
+        salida = []
+        for clave in ("size", "checked_out", "idle", "overflow"):
+            if clave in st:
+                salida.append(f"# TYPE sge_db_pool_{clave} gauge")
+                salida.append(f"sge_db_pool_{clave} {st[clave]}")
+        if "checkouts" in st:
+            salida += [
+                "# TYPE sge_db_pool_checkouts_total counter",
+                f"sge_db_pool_checkouts_total {st['checkouts']}",
+                "# TYPE sge_db_pool_wait_seconds_max gauge",
+                f"sge_db_pool_wait_seconds_max {st['espera_max_ms'] / 1000:.6f}",
+                "# TYPE sge_db_pool_slow_waits_total counter",
+                f"sge_db_pool_slow_waits_total {st['esperas_lentas']}",
+                "# TYPE sge_db_pool_timeouts_total counter",
+                f"sge_db_pool_timeouts_total {st['timeouts']}",
+            ]
+        return salida
+
+    metricas.colectores.append(lineas)
@@ -3,6 +3,12 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 
+from app.core.config import (
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_PRE_PING, DB_PRE_PING_IDLE,
+)
+from app.core.metricas import instrumentar_engine
+from app.db.pool import PRE_PING, PoolMedido, ping_si_inactiva, registrar_metricas_pool
+
 load_dotenv()  # lee el .env
 
 DB_HOST = os.getenv("DB_HOST")
@@ -11,9 +17,25 @@ DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_NAME = os.getenv("DB_NAME")
 
-DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# DATABASE_URL completa (p.ej. sqlite:///bench.db para los benchmarks) tiene prioridad sobre DB_*
+DATABASE_URL = os.getenv("DATABASE_URL") or f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+
+if DB_PRE_PING not in PRE_PING:
+    raise ValueError(f"DB_PRE_PING debe ser uno de {', '.join(PRE_PING)} (no {DB_PRE_PING!r})")
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+engine = create_engine(
+    DATABASE_URL,
+    poolclass=PoolMedido,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_PRE_PING == "siempre",
+)
+if DB_PRE_PING == "inactiva":
+    ping_si_inactiva(engine, DB_PRE_PING_IDLE)
+registrar_metricas_pool(engine)
+instrumentar_engine(engine)  # nº de sentencias y tiempo de BD por petición (Server-Timing, /metrics)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def get_db():
@@ -0,0 +1,62 @@
+"""
+Lo mínimo para que el SQL (MySQL) de los routers corra sobre SQLite.
+
+No pretende ser un MySQL: FOR UPDATE desaparece (SQLite bloquea la BD entera
+al escribir), GROUP_CONCAT ... SEPARATOR y TIME_FORMAT se traducen a la
+forma de SQLite y CONCAT y CONCAT_WS se registran como funciones.
+Sirve para medir y comparar, no para validar concurrencia.
+
+La usan el arnés de bench/ (bench/runner.py) y explicar_consultas; la app
+contra MySQL no la necesita y no la instala.
+"""
+import re
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_FOR_UPDATE = re.compile(r"\s+FOR UPDATE\b")
+_SEPARATOR = re.compile(r"\s+ORDER BY ([\w.]+) SEPARATOR\s+('[^']*')")
+_TIME_FORMAT = re.compile(r"TIME_FORMAT\(([\w.]+),\s*'([^']*)'\)")
+# especificadores de TIME_FORMAT (MySQL) -> strftime (SQLite)
+_FORMATO_HORA = {"%H": "%H", "%i": "%M", "%s": "%S", "%S": "%S"}
+
+
+def _concat(*args):
+    if any(a is None for a in args):
+        return None
+    return "".join(str(a) for a in args)
+
+
+def _concat_ws(separador, *args):
+    if separador is None:
+        return None
+    return separador.join(str(a) for a in args if a is not None)
+
+
+def _strftime(m: re.Match) -> str:
+    # TIME_FORMAT como función Python costaría una llamada por fila: strftime es nativa
+    formato = re.sub(r"%\w", lambda e: _FORMATO_HORA.get(e.group(0), e.group(0)), m.group(2))
+    return f"strftime('{formato}', {m.group(1)})"
+
+
+def traducir(sql: str) -> str:
+    sql = _FOR_UPDATE.sub("", sql)
+    sql = _SEPARATOR.sub(r", \2", sql)
+    sql = _TIME_FORMAT.sub(_strftime, sql)
+    return sql.replace("INSERT IGNORE", "INSERT OR IGNORE")
+
+
+def instalar(engine: Engine) -> None:
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _funciones(dbapi_conn, _record):
+        dbapi_conn.create_function("CONCAT", -1, _concat)
+        dbapi_conn.create_function("CONCAT_WS", -1, _concat_ws)
+        # UPPER de SQLite solo entiende ASCII (Málaga, Almería...)
+        dbapi_conn.create_function("UPPER", 1, lambda s: s.upper() if s is not None else None)
+
+    @event.listens_for(engine, "before_cursor_execute", retval=True)
+    def _traducir(conn, cursor, statement, parameters, context, executemany):
+        return traducir(statement), parameters
@@ -1,13 +1,88 @@
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.routers.health import router as health_router
 from app.routers.private_test import router as private_router
 from app.routers.alumnos import router as alumnos_router
 from app.routers.vacantes import router as vacantes_router
+from app.routers.reuniones import router as reuniones_router
+from app.routers.entidades import router as entidades_router
+from app.routers.contactos import router as contactos_router
+from app.routers.uso import router as uso_router
+from app.routers.menu import router as menu_router
 from app.routers import catalogos
+from app.routers.metrics import router as metrics_router
+from app.middlewares.tiempos import TiemposMiddleware
+from app.middlewares.compresion import CompresionMiddleware
+from app.core.respuestas import RespuestaJSON
+from app.core.entidades_index import indice_entidades
+from app.core.buscador_alumnos import buscador_alumnos
+from app.core.facetas import facetas_entidades, facetas_contactos
+from app.core.permisos import permisos_rol
+from app.core.auditoria import auditoria
+from app.core.uso_opciones import uso_opciones
+from app.core.config import DB_POOL_WARMUP, EXPLAIN_AL_ARRANCAR
+from app.db.session import engine
+from app.db.pool import calentar_pool
+from app.db.consultas import avisar_escaneos
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # conexiones abiertas de antemano: la primera ráfaga no paga el connect
+    try:
+        abiertas = await run_in_threadpool(calentar_pool, engine, min(DB_POOL_WARMUP, engine.pool.size()))
+        logger.info("Pool de conexiones precalentado con %d conexiones", abiertas)
+    except Exception:
+        logger.exception("No se pudo precalentar el pool de conexiones")
+
+    # índices en memoria: si la BD no está disponible al arrancar, se cargan en la primera petición
+    try:
+        await run_in_threadpool(indice_entidades.cargar)
+    except Exception:
+        logger.exception("No se pudo cargar el índice de entidades al arrancar")
+
+    try:
+        await run_in_threadpool(buscador_alumnos.cargar)
+    except Exception:
+        logger.exception("No se pudo cargar el índice de búsqueda de alumnos al arrancar")
+
+    try:
+        await run_in_threadpool(facetas_entidades.cargar)
+        await run_in_threadpool(facetas_contactos.cargar)
+    except Exception:
+        logger.exception("No se pudieron cargar los índices de entidades y contactos al arrancar")
+
+    try:
+        await run_in_threadpool(permisos_rol.cargar)
+    except Exception:
+        logger.exception("No se pudo cargar la matriz de permisos al arrancar")
 
-app = FastAPI(title="SGE API (FastAPI)")
+    # planes de ejecución de todas las consultas registradas (recorridos de tabla completos al log)
+    if EXPLAIN_AL_ARRANCAR:
+        try:
+            await run_in_threadpool(avisar_escaneos, engine)
+        except Exception:
+            logger.exception("No se pudieron revisar los planes de las consultas")
+
+    # escritor de sgi_logs en segundo plano: al apagar se vuelca lo pendiente
+    auditoria.arrancar()
+    # uso de opciones de menú: se junta en memoria y se vuelca cada USO_INTERVALO_S
+    uso_opciones.arrancar()
+
+    yield
+
+    await run_in_threadpool(auditoria.parar)
+    await run_in_threadpool(uso_opciones.parar)
+
+
+app = FastAPI(title="SGE API (FastAPI)", lifespan=lifespan, default_response_class=RespuestaJSON)
 
 # CORS: permite que el frontend (Angular) pueda llamar al backend desde el navegador
 # Angular normalmente corre en http://localhost:4200
@@ -24,8 +99,20 @@ app.add_middleware(
     allow_headers=["*"],   # Authorization, Content-Type...
 )
 
+# gzip (o br/zstd si están instalados) para los listados grandes y las exportaciones
+app.add_middleware(CompresionMiddleware)
+
+# Server-Timing + métricas por ruta (el último en añadirse es el más externo: mide también CORS y la compresión)
+app.add_middleware(TiemposMiddleware)
+
 app.include_router(health_router)
 app.include_router(private_router)
 app.include_router(alumnos_router)
 app.include_router(vacantes_router)
+app.include_router(reuniones_router)
+app.include_router(entidades_router)
+app.include_router(contactos_router)
 app.include_router(catalogos.router)
+app.include_router(uso_router)
+app.include_router(menu_router)
+app.include_router(metrics_router)
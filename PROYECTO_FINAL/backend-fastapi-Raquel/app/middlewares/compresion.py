@@ -0,0 +1,252 @@
+import threading
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import COMPRESION_MIN_BYTES, GZIP_LEVEL, BROTLI_QUALITY, ZSTD_LEVEL
+from app.core.metricas import metricas
+
+try:
+    import brotli
+except ImportError:  # opcional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # opcional
+    zstandard = None
+
+# rutas que se sirven siempre tal cual (sondas de vida / balanceador)
+SIN_COMPRIMIR = ("/health",)
+
+TIPOS_COMPRIMIBLES = (
+    "application/json", "application/x-ndjson", "application/javascript", "application/xml",
+    "text/plain", "text/csv", "text/html", "text/css", "text/xml",
+)
+
+
+class _Gzip:
+    def __init__(self):
+        self._c = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def trozo(self, data: bytes) -> bytes:
+        # SYNC_FLUSH: en streaming el cliente recibe cada trozo sin esperar al final
+        return self._c.compress(data) + self._c.flush(zlib.Z_SYNC_FLUSH)
+
+    def fin(self, data: bytes = b"") -> bytes:
+        return self._c.compress(data) + self._c.flush(zlib.Z_FINISH)
+
+
+class _Brotli:
+    def __init__(self):
+        self._c = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def trozo(self, data: bytes) -> bytes:
+        return self._c.process(data) + self._c.flush()
+
+    def fin(self, data: bytes = b"") -> bytes:
+        return self._c.process(data) + self._c.finish()
+
+
+class _Zstd:
+    def __init__(self):
+        self._c = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def trozo(self, data: bytes) -> bytes:
+        return self._c.compress(data) + self._c.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def fin(self, data: bytes = b"") -> bytes:
+        return self._c.compress(data) + self._c.flush()
+
+
+# por orden de preferencia cuando el cliente acepta varias con la misma q
+CODIFICACIONES = {}
+if zstandard is not None:
+    CODIFICACIONES["zstd"] = _Zstd
+if brotli is not None:
+    CODIFICACIONES["br"] = _Brotli
+CODIFICACIONES["gzip"] = _Gzip
+
+
+def elegir_codificacion(accept_encoding: str) -> str | None:
+    """La codificación soportada con más q en Accept-Encoding (None = sin comprimir)."""
+    aceptadas = {}
+    for parte in accept_encoding.split(","):
+        nombre, _, params = parte.strip().partition(";")
+        nombre = nombre.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if nombre:
+            aceptadas[nombre] = q
+
+    mejor, mejor_q = None, 0.0
+    for nombre in CODIFICACIONES:
+        q = aceptadas.get(nombre, aceptadas.get("*", 0.0))
+        if q > mejor_q:
+            mejor, mejor_q = nombre, q
+    return mejor
+
+
+class Contadores:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.originales: dict[str, int] = {}
+        self.comprimidos: dict[str, int] = {}
+        self.respuestas: dict[str, int] = {}
+        self.sin_comprimir = 0
+
+    def comprimida(self, codificacion: str, original: int, comprimido: int) -> None:
+        with self._lock:
+            self.originales[codificacion] = self.originales.get(codificacion, 0) + original
+            self.comprimidos[codificacion] = self.comprimidos.get(codificacion, 0) + comprimido
+            self.respuestas[codificacion] = self.respuestas.get(codificacion, 0) + 1
+
+    def no_comprimida(self) -> None:
+        with self._lock:
+            self.sin_comprimir += 1
+
+    def prometheus(self) -> list[str]:
+        with self._lock:
+            lineas = [
+                "# HELP sge_http_compression_input_bytes_total Bytes de respuesta antes de comprimir",
+                "# TYPE sge_http_compression_input_bytes_total counter",
+            ]
+            lineas += [f'sge_http_compression_input_bytes_total{{encoding="{c}"}} {n}' for c, n in self.originales.items()]
+            lineas += [
+                "# HELP sge_http_compression_output_bytes_total Bytes enviados ya comprimidos",
+                "# TYPE sge_http_compression_output_bytes_total counter",
+            ]
+            lineas += [f'sge_http_compression_output_bytes_total{{encoding="{c}"}} {n}' for c, n in self.comprimidos.items()]
+            lineas += ["# TYPE sge_http_compressed_responses_total counter"]
+            lineas += [f'sge_http_compressed_responses_total{{encoding="{c}"}} {n}' for c, n in self.respuestas.items()]
+            lineas += [
+                "# TYPE sge_http_uncompressed_responses_total counter",
+                f"sge_http_uncompressed_responses_total {self.sin_comprimir}",
+            ]
+            return lineas
+
+
+contadores = Contadores()
+metricas.colectores.append(contadores.prometheus)
+
+
+class CompresionMiddleware:
+    """
+    Comprime las respuestas (zstd / br / gzip según Accept-Encoding y lo que
+    esté instalado) a partir de COMPRESION_MIN_BYTES.
+
+    Funciona también con StreamingResponse (exportaciones): se acumula hasta
+    llegar al mínimo y a partir de ahí cada trozo sale comprimido según llega.
+    No toca /health, text/event-stream ni respuestas que ya traen
+    Content-Encoding.
+    """
+
+    def __init__(self, app: ASGIApp, minimo: int = COMPRESION_MIN_BYTES):
+        self.app = app
+        self.minimo = minimo
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(SIN_COMPRIMIR):
+            await self.app(scope, receive, send)
+            return
+
+        codificacion = elegir_codificacion(Headers(scope=scope).get("accept-encoding", ""))
+        if codificacion is None:
+            await self.app(scope, receive, send)
+            return
+
+        await _Respuesta(self.app, self.minimo, codificacion)(scope, receive, send)
+
+
+class _Respuesta:
+    """Estado de una respuesta concreta mientras pasa por el middleware."""
+
+    def __init__(self, app: ASGIApp, minimo: int, codificacion: str):
+        self.app = app
+        self.minimo = minimo
+        self.codificacion = codificacion
+        self.inicio: Message | None = None
+        self.pendiente = b""
+        self.compresor = None
+        self.pasar = False
+        self.original = 0
+        self.comprimido = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.enviar)
+
+    async def enviar(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            tipo = headers.get("content-type", "").split(";")[0].strip().lower()
+            if (
+                "content-encoding" in headers
+                or tipo == "text/event-stream"
+                or message["status"] in (204, 304)
+                or not tipo.startswith(TIPOS_COMPRIMIBLES)
+            ):
+                self.pasar = True
+                await self.send(message)
+                return
+            # se decide al ver el cuerpo: hasta entonces, las cabeceras esperan
+            self.inicio = message
+            return
+
+        if message["type"] != "http.response.body" or self.pasar:
+            await self.send(message)
+            return
+
+        cuerpo = message.get("body", b"")
+        mas = message.get("more_body", False)
+
+        if self.compresor is None:
+            self.pendiente += cuerpo
+            if len(self.pendiente) < self.minimo:
+                if mas:
+                    return
+                # no llega al mínimo: tal cual
+                contadores.no_comprimida()
+                self._vary(MutableHeaders(scope=self.inicio))
+                await self.send(self.inicio)
+                await self.send({"type": "http.response.body", "body": self.pendiente, "more_body": False})
+                return
+
+            self.compresor = CODIFICACIONES[self.codificacion]()
+            headers = MutableHeaders(scope=self.inicio)
+            headers["Content-Encoding"] = self.codificacion
+            self._vary(headers)
+            cuerpo, self.pendiente = self.pendiente, b""
+
+            if not mas:
+                datos = self.compresor.fin(cuerpo)
+                headers["Content-Length"] = str(len(datos))
+                await self.send(self.inicio)
+                await self._enviar_cuerpo(cuerpo, datos, False)
+                return
+
+            # streaming: ya no se sabe la longitud final
+            del headers["Content-Length"]
+            await self.send(self.inicio)
+
+        datos = self.compresor.trozo(cuerpo) if mas else self.compresor.fin(cuerpo)
+        await self._enviar_cuerpo(cuerpo, datos, mas)
+
+    async def _enviar_cuerpo(self, original: bytes, datos: bytes, mas: bool) -> None:
+        self.original += len(original)
+        self.comprimido += len(datos)
+        if not mas:
+            contadores.comprimida(self.codificacion, self.original, self.comprimido)
+        await self.send({"type": "http.response.body", "body": datos, "more_body": mas})
+
+    @staticmethod
+    def _vary(headers: MutableHeaders) -> None:
+        vary = headers.get("vary", "")
+        if "accept-encoding" not in vary.lower():
+            headers["Vary"] = f"{vary}, Accept-Encoding" if vary else "Accept-Encoding"
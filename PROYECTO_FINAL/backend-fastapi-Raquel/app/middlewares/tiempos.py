@@ -0,0 +1,58 @@
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metricas import TiemposPeticion, metricas, peticion_actual
+
+# las que no tienen ruta (404) van todas juntas para no disparar la cardinalidad
+SIN_RUTA = "<sin_ruta>"
+
+
+class TiemposMiddleware:
+    """
+    Middleware ASGI (sin BaseHTTPMiddleware, que no deja pasar el streaming) que:
+
+    - añade la cabecera Server-Timing (db, auth, serialize, total) a cada respuesta
+    - apunta la latencia y las sentencias SQL de la petición en `metricas`, por
+      plantilla de ruta (/alumnos/{id_alumno}, no /alumnos/17)
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        tiempos = TiemposPeticion()
+        token = peticion_actual.set(tiempos)
+        status = 500
+
+        async def send_con_tiempos(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                total = time.perf_counter() - tiempos.inicio
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", ", ".join((
+                    f'db;dur={tiempos.db_s * 1000:.1f};desc="{tiempos.db_n} sql"',
+                    f"auth;dur={tiempos.auth_s * 1000:.1f}",
+                    f"serialize;dur={tiempos.serialize_s * 1000:.1f}",
+                    f"total;dur={total * 1000:.1f}",
+                )))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_con_tiempos)
+        finally:
+            peticion_actual.reset(token)
+            route = scope.get("route")
+            metricas.registrar_peticion(
+                scope["method"],
+                getattr(route, "path", SIN_RUTA),
+                status,
+                time.perf_counter() - tiempos.inicio,
+                tiempos.db_n,
+            )
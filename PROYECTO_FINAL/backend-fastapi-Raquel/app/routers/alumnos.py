@@ -1,10 +1,24 @@
-from fastapi import APIRouter, Depends
+import base64
+import csv
+import io
+import json
+
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import text
 from fastapi import HTTPException
+from pydantic import ValidationError
 
 from app.db.session import get_db
+from app.db.consultas import consultas
 from app.core.security import require_token
+from app.core.permisos import requiere_permiso
+from app.core.auditoria import auditoria
+from app.core.exportar import respuesta_exportacion
+from app.core.respuestas import RespuestaJSON
+from app.core.config import BULK_BATCH_SIZE, BULK_MAX_FILAS, BUSCADOR_MAX_RESULTADOS
+from app.core.entidades_index import indice_entidades, TIPO_CENTRO_EDUCATIVO
+from app.core.buscador_alumnos import buscador_alumnos
 
 from sqlalchemy.exc import IntegrityError
 from app.schemas.alumnos import AlumnoCreate
@@ -13,75 +27,248 @@ from app.schemas.alumnos import AlumnoUpdate
 
 
 def validar_entidad_es_centro_educativo(db: Session, id_entidad: int) -> None:
-    # 1) obtener el id del tipo "CENTRO EDUCATIVO"
-    id_tipo_centro = db.execute(text("""
-        SELECT id_tipo_entidad
-        FROM sgi_tipos_entidad
-        WHERE UPPER(tipo_entidad) = 'CENTRO EDUCATIVO'
-        LIMIT 1
-    """)).scalar()
+    # 1) obtener el id del tipo "CENTRO EDUCATIVO" (índice en memoria, sin ir a BD)
+    id_tipo_centro = indice_entidades.id_tipo(db, TIPO_CENTRO_EDUCATIVO)
 
     if id_tipo_centro is None:
         # Esto significa que en tu BD no existe ese tipo (o el texto es distinto)
         raise HTTPException(status_code=500, detail="No existe el tipo 'CENTRO EDUCATIVO' en sgi_tipos_entidad")
 
     # 2) comprobar el tipo de la entidad elegida
-    entidad_tipo = db.execute(text("""
-        SELECT id_tipo_entidad
-        FROM sgi_entidades
-        WHERE id_entidad = :id_entidad
-        LIMIT 1
-    """), {"id_entidad": id_entidad}).scalar()
+    entidad_tipo = indice_entidades.tipo_de_entidad(db, id_entidad)
 
     if entidad_tipo is None:
         raise HTTPException(status_code=400, detail="La entidad centro no existe")
 
-    if int(entidad_tipo) != int(id_tipo_centro):
+    if entidad_tipo != id_tipo_centro:
         raise HTTPException(status_code=400, detail="La entidad seleccionada no es un CENTRO EDUCATIVO")
 
 
+# columnas que se pueden pedir con ?fields= -> (expresión SQL, JOIN que necesita)
+CAMPOS_LISTADO = {
+    "id_alumno": ("a.id_alumno", None),
+    "nif_nie": ("a.nif_nie", None),
+    "nombre": ("a.nombre", None),
+    "apellidos": ("a.apellidos", None),
+    "fecha_nacimiento": ("a.fecha_nacimiento", None),
+    "curso": ("a.curso", None),
+    "telefono": ("a.telefono", None),
+    "direccion": ("a.direccion", None),
+    "cp": ("a.cp", None),
+    "localidad": ("a.localidad", None),
+    "observaciones": ("a.observaciones", None),
+
+    "entidad_centro": ("e.entidad AS entidad_centro", "centro"),
+    "ciclo": ("c.ciclo AS ciclo", "ciclo"),
+    "provincia": ("p.provincia AS provincia", "provincia"),
+
+    "vacante_asignada": ("ev.entidad AS vacante_asignada", "vacante"),
+}
+
+JOINS_LISTADO = {
+    "centro": "JOIN sgi_entidades e ON e.id_entidad = a.id_entidad_centro",
+    "ciclo": "JOIN sgi_ciclos c ON c.id_ciclo = a.id_ciclo",
+    "provincia": "LEFT JOIN sgi_provincias p ON p.id_provincia = a.id_provincia",
+    "vacante": """LEFT JOIN sgi_vacantes_x_alumnos vxa ON vxa.id_alumno = a.id_alumno
+        LEFT JOIN sgi_vacantes v ON v.id_vacante = vxa.id_vacante
+        LEFT JOIN sgi_entidades ev ON ev.id_entidad = v.id_entidad""",
+}
+
+# columnas de la clave del cursor (siempre se leen aunque no se pidan)
+CLAVE_CURSOR = ("apellidos", "nombre", "id_alumno")
+
+
+def codificar_cursor(row) -> str:
+    valores = [row[k] for k in CLAVE_CURSOR]
+    return base64.urlsafe_b64encode(json.dumps(valores).encode("utf-8")).decode("ascii")
+
+
+def decodificar_cursor(cursor: str) -> dict:
+    try:
+        apellidos, nombre, id_alumno = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return {"c_apellidos": str(apellidos), "c_nombre": str(nombre), "c_id": int(id_alumno)}
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor no válido")
+
+
+def parsear_campos(fields: str | None) -> list[str]:
+    if not fields:
+        return list(CAMPOS_LISTADO)
+
+    campos = [f.strip() for f in fields.split(",") if f.strip()]
+    desconocidos = [f for f in campos if f not in CAMPOS_LISTADO]
+    if desconocidos:
+        raise HTTPException(status_code=400, detail=f"Campos no válidos: {', '.join(desconocidos)}")
+    return campos
+
+
+def construir_consulta_alumnos(
+    campos: list[str],
+    id_ciclo: int | None = None,
+    curso: int | None = None,
+    id_entidad_centro: int | None = None,
+    id_provincia: int | None = None,
+    asignado: bool | None = None,
+    cursor: str | None = None,
+    limit: int | None = None,
+    con_clave_cursor: bool = True,
+) -> tuple[str, dict]:
+    """
+    Monta el SELECT del listado de alumnos con solo los JOINs que hacen falta
+    para los campos pedidos, los filtros y la paginación por cursor (keyset)
+    sobre (apellidos, nombre, id_alumno).
+    """
+    columnas = [CAMPOS_LISTADO[c][0] for c in campos]
+    if con_clave_cursor:
+        for k in CLAVE_CURSOR:
+            if k not in campos:
+                columnas.append(f"a.{k}")
+
+    joins = []
+    for c in campos:
+        j = CAMPOS_LISTADO[c][1]
+        if j and j not in joins:
+            joins.append(j)
+
+    where = []
+    params = {}
+
+    if id_ciclo is not None:
+        where.append("a.id_ciclo = :id_ciclo")
+        params["id_ciclo"] = id_ciclo
+    if curso is not None:
+        where.append("a.curso = :curso")
+        params["curso"] = curso
+    if id_entidad_centro is not None:
+        where.append("a.id_entidad_centro = :id_entidad_centro")
+        params["id_entidad_centro"] = id_entidad_centro
+    if id_provincia is not None:
+        where.append("a.id_provincia = :id_provincia")
+        params["id_provincia"] = id_provincia
+    if asignado is not None:
+        existe = "EXISTS (SELECT 1 FROM sgi_vacantes_x_alumnos x WHERE x.id_alumno = a.id_alumno)"
+        where.append(existe if asignado else f"NOT {existe}")
+
+    if cursor:
+        # (apellidos, nombre, id_alumno) > cursor, desplegado para que use el índice
+        where.append("""(
+            a.apellidos > :c_apellidos
+            OR (a.apellidos = :c_apellidos AND a.nombre > :c_nombre)
+            OR (a.apellidos = :c_apellidos AND a.nombre = :c_nombre AND a.id_alumno > :c_id)
+        )""")
+        params.update(decodificar_cursor(cursor))
+
+    sql = "SELECT\n            " + ",\n            ".join(columnas)
+    sql += "\n        FROM sgi_alumnos a"
+    for j in joins:
+        sql += "\n        " + JOINS_LISTADO[j]
+    if where:
+        sql += "\n        WHERE " + "\n          AND ".join(where)
+    sql += "\n        ORDER BY a.apellidos, a.nombre, a.id_alumno"
+    if limit is not None:
+        sql += "\n        LIMIT :limit"
+        params["limit"] = limit
+
+    return sql, params
+
+
+consultas.dinamica(
+    "alumnos.listado",
+    ejemplo=lambda: construir_consulta_alumnos(list(CAMPOS_LISTADO), id_ciclo=1, curso=1, limit=51),
+)
+# la exportación es el listado sin LIMIT: recorre la tabla entera a propósito
+consultas.dinamica(
+    "alumnos.export",
+    ejemplo=lambda: construir_consulta_alumnos(list(CAMPOS_LISTADO), con_clave_cursor=False),
+    escaneo_ok=True,
+)
+
+# opción de menú (sgi_opciones_menu.accion) cuyos permisos post/put/delete se exigen al escribir
+OPCION_MENU = "alumnos"
+
 router = APIRouter(prefix="/alumnos", tags=["alumnos"])
 
 @router.get("")
 def listar_alumnos(
+    limit: int | None = Query(default=None, ge=1, le=500),
+    cursor: str | None = None,
+    fields: str | None = None,
+    id_ciclo: int | None = None,
+    curso: int | None = None,
+    id_entidad_centro: int | None = None,
+    id_provincia: int | None = None,
+    asignado: bool | None = None,
     db: Session = Depends(get_db),
     user=Depends(require_token),
 ):
     # JOINs para NO devolver ids de FK, sino los nombres
-    
-    rows = db.execute(text("""
-        SELECT
-            a.id_alumno,
-            a.nif_nie,
-            a.nombre,
-            a.apellidos,
-            a.fecha_nacimiento,
-            a.curso,
-            a.telefono,
-            a.direccion,
-            a.cp,
-            a.localidad,
-            a.observaciones,
-
-            e.entidad AS entidad_centro,
-            c.ciclo AS ciclo,
-            p.provincia AS provincia,
-
-            ev.entidad AS vacante_asignada
-        FROM sgi_alumnos a
-        JOIN sgi_entidades e ON e.id_entidad = a.id_entidad_centro
-        JOIN sgi_ciclos c ON c.id_ciclo = a.id_ciclo
-        LEFT JOIN sgi_provincias p ON p.id_provincia = a.id_provincia
-        LEFT JOIN sgi_vacantes_x_alumnos vxa ON vxa.id_alumno = a.id_alumno
-        LEFT JOIN sgi_vacantes v ON v.id_vacante = vxa.id_vacante
-        LEFT JOIN sgi_entidades ev ON ev.id_entidad = v.id_entidad
-        ORDER BY a.apellidos, a.nombre
-    """)).mappings().all()
-
-
-    data = [dict(r) for r in rows]
-
-    return {"ok": True, "message": "Listado de alumnos", "data": data}
+    # (solo los JOINs de los campos pedidos en ?fields=)
+    campos = parsear_campos(fields)
+
+    # pedimos una fila de más para saber si hay página siguiente
+    sql, params = construir_consulta_alumnos(
+        campos,
+        id_ciclo=id_ciclo,
+        curso=curso,
+        id_entidad_centro=id_entidad_centro,
+        id_provincia=id_provincia,
+        asignado=asignado,
+        cursor=cursor,
+        limit=limit + 1 if limit is not None else None,
+    )
+
+    rows = consultas.ejecutar_sql(db, "alumnos.listado", sql, params).mappings().all()
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = codificar_cursor(rows[-1])
+
+    # si la clave del cursor ya va en los campos pedidos, las filas salen tal cual
+    if all(k in campos for k in CLAVE_CURSOR):
+        data = rows
+    else:
+        data = [{c: r[c] for c in campos} for r in rows]
+
+    return RespuestaJSON({"ok": True, "message": "Listado de alumnos", "data": data, "next_cursor": next_cursor})
+
+@router.get("/export")
+def exportar_alumnos(
+    formato: str = Query(default="csv", pattern="^(csv|ndjson)$"),
+    fields: str | None = None,
+    id_ciclo: int | None = None,
+    curso: int | None = None,
+    id_entidad_centro: int | None = None,
+    id_provincia: int | None = None,
+    asignado: bool | None = None,
+    user=Depends(require_token),
+):
+    # mismos campos y filtros que el listado, pero sin paginar y en streaming
+    campos = parsear_campos(fields)
+    sql, params = construir_consulta_alumnos(
+        campos,
+        id_ciclo=id_ciclo,
+        curso=curso,
+        id_entidad_centro=id_entidad_centro,
+        id_provincia=id_provincia,
+        asignado=asignado,
+        con_clave_cursor=False,
+    )
+
+    return respuesta_exportacion(sql, params, formato, "alumnos")
+
+@router.get("/buscar")
+def buscar_alumnos(
+    q: str = Query(min_length=2, max_length=100),
+    limit: int = Query(default=10, ge=1, le=BUSCADOR_MAX_RESULTADOS),
+    id_ciclo: int | None = None,
+    curso: int | None = None,
+    db: Session = Depends(get_db),
+    user=Depends(require_token),
+):
+    # nombre, apellidos o NIF/NIE, sin tildes y tolerando erratas (índice en memoria)
+    data = buscador_alumnos.buscar(db, q, limit=limit, id_ciclo=id_ciclo, curso=curso)
+    return {"ok": True, "message": "Búsqueda de alumnos", "data": data}
 
 @router.get("/{id_alumno}")
 def obtener_alumno(
@@ -89,43 +276,12 @@ def obtener_alumno(
     db: Session = Depends(get_db),
     user=Depends(require_token),
 ):
-    row = db.execute(text("""
-        SELECT
-            a.id_alumno,
-            a.nif_nie,
-            a.nombre,
-            a.apellidos,
-            a.fecha_nacimiento,
-            a.id_entidad_centro,
-            a.id_ciclo,
-            a.curso,
-            a.telefono,
-            a.direccion,
-            a.cp,
-            a.localidad,
-            a.id_provincia,
-            a.observaciones,
-
-            e.entidad AS entidad_centro,
-            c.ciclo AS ciclo,
-            p.provincia AS provincia,
-
-            ev.entidad AS vacante_asignada
-        FROM sgi_alumnos a
-        JOIN sgi_entidades e ON e.id_entidad = a.id_entidad_centro
-        JOIN sgi_ciclos c ON c.id_ciclo = a.id_ciclo
-        LEFT JOIN sgi_provincias p ON p.id_provincia = a.id_provincia
-        LEFT JOIN sgi_vacantes_x_alumnos vxa ON vxa.id_alumno = a.id_alumno
-        LEFT JOIN sgi_vacantes v ON v.id_vacante = vxa.id_vacante
-        LEFT JOIN sgi_entidades ev ON ev.id_entidad = v.id_entidad
-        WHERE a.id_alumno = :id
-        LIMIT 1
-    """), {"id": id_alumno}).mappings().first()
+    row = consultas.ejecutar(db, "alumnos.detalle", {"id": id_alumno}).mappings().first()
 
     if not row:
         raise HTTPException(status_code=404, detail="Alumno no encontrado")
 
-    return {"ok": True, "message": "Detalle de alumno", "data": dict(row)}
+    return RespuestaJSON({"ok": True, "message": "Detalle de alumno", "data": row})
 
 
 
@@ -133,22 +289,13 @@ def obtener_alumno(
 def crear_alumno(
     payload: AlumnoCreate,
     db: Session = Depends(get_db),
-    user=Depends(require_token),
+    user=Depends(requiere_permiso(OPCION_MENU, "post")),
 ):
     validar_entidad_es_centro_educativo(db, payload.id_entidad_centro)
 
     try:
-        db.execute(text("""
-            INSERT INTO sgi_alumnos (
-                nif_nie, nombre, apellidos, fecha_nacimiento,
-                id_entidad_centro, id_ciclo, curso, telefono,
-                direccion, cp, localidad, id_provincia, observaciones
-            ) VALUES (
-                :nif_nie, :nombre, :apellidos, :fecha_nacimiento,
-                :id_entidad_centro, :id_ciclo, :curso, :telefono,
-                :direccion, :cp, :localidad, :id_provincia, :observaciones
-            )
-        """), payload.model_dump())
+        params = payload.model_dump()
+        params["id_alumno"] = consultas.ejecutar(db, "alumnos.insertar", params).lastrowid
         db.commit()
 
     except IntegrityError as e:
@@ -156,23 +303,165 @@ def crear_alumno(
         # lo más típico: nif_nie duplicado (UNIQUE)
         return {"ok": False, "message": "No se pudo crear (NIF/NIE duplicado u otra restricción)", "data": None}
 
+    buscador_alumnos.poner(params)
+    auditoria.registrar(user, "crear", "alumno", params["id_alumno"])
+
     return {"ok": True, "message": "Alumno creado", "data": None}
 
 
+def leer_filas_bulk(cuerpo: bytes, content_type: str) -> list[dict]:
+    """Filas crudas de la importación: array JSON o CSV con cabecera (columnas de AlumnoCreate)."""
+    if content_type.startswith("text/csv"):
+        try:
+            texto = cuerpo.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=400, detail="El CSV debe estar en UTF-8")
+        # en CSV una celda vacía es "sin valor"
+        return [
+            {k.strip(): (v if v != "" else None) for k, v in fila.items() if k}
+            for fila in csv.DictReader(io.StringIO(texto))
+        ]
+
+    try:
+        filas = json.loads(cuerpo)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="JSON no válido")
+
+    if not isinstance(filas, list):
+        raise HTTPException(status_code=400, detail="Se esperaba un array JSON de alumnos")
+    return filas
+
+
+def ids_existentes(db: Session, consulta: str, valores: set, **params) -> set:
+    """Ejecuta un SELECT ... IN :ids con todos los valores de una vez."""
+    if not valores:
+        return set()
+    return {r[0] for r in consultas.ejecutar(db, consulta, {"ids": list(valores), **params})}
+
+
+@router.post("/bulk")
+async def crear_alumnos_bulk(
+    request: Request,
+    todo_o_nada: bool = False,
+    db: Session = Depends(get_db),
+    user=Depends(requiere_permiso(OPCION_MENU, "post")),
+):
+    # async solo para leer el cuerpo crudo (JSON o CSV); el trabajo con BD
+    # va al threadpool como el resto de endpoints
+    filas = leer_filas_bulk(await request.body(), request.headers.get("content-type", ""))
+    return await run_in_threadpool(importar_alumnos, db, filas, todo_o_nada, user)
+
+
+def importar_alumnos(db: Session, filas: list, todo_o_nada: bool, user: dict | None = None) -> dict:
+    """
+    Importación masiva. Las FKs se validan con una consulta por tabla para
+    todas las filas y los INSERT van por lotes (executemany) en una única
+    transacción.
+    """
+    if not filas:
+        raise HTTPException(status_code=400, detail="No hay alumnos que importar")
+    if len(filas) > BULK_MAX_FILAS:
+        raise HTTPException(status_code=400, detail=f"Máximo {BULK_MAX_FILAS} alumnos por importación")
+
+    # 1) validar cada fila con el schema de siempre
+    informe = []
+    validos: dict[int, AlumnoCreate] = {}
+    for i, fila in enumerate(filas, start=1):
+        try:
+            validos[i] = AlumnoCreate.model_validate(fila)
+            informe.append({"fila": i, "ok": True, "nif_nie": validos[i].nif_nie, "errores": []})
+        except ValidationError as e:
+            errores = [f"{'.'.join(str(x) for x in err['loc'])}: {err['msg']}" for err in e.errors()]
+            nif = fila.get("nif_nie") if isinstance(fila, dict) else None
+            informe.append({"fila": i, "ok": False, "nif_nie": nif, "errores": errores})
+
+    # 2) validaciones contra BD: una consulta por tabla para todas las filas
+    alumnos = validos.values()
+
+    id_tipo_centro = indice_entidades.id_tipo(db, TIPO_CENTRO_EDUCATIVO)
+
+    if id_tipo_centro is None:
+        raise HTTPException(status_code=500, detail="No existe el tipo 'CENTRO EDUCATIVO' en sgi_tipos_entidad")
+
+    # las entidades que no estén en el índice se traen en una sola consulta
+    tipos_entidad = indice_entidades.asegurar(db, {a.id_entidad_centro for a in alumnos})
+
+    ciclos = ids_existentes(db, "ciclos.existentes", {a.id_ciclo for a in alumnos})
+
+    provincias = ids_existentes(db, "provincias.existentes", {a.id_provincia for a in alumnos if a.id_provincia is not None})
+
+    nifs_en_bd = ids_existentes(db, "alumnos.nifs_existentes", {a.nif_nie for a in alumnos})
+
+    nifs_vistos = {}
+    for i, a in validos.items():
+        errores = informe[i - 1]["errores"]
+
+        if tipos_entidad.get(a.id_entidad_centro) != id_tipo_centro:
+            errores.append("id_entidad_centro: la entidad no existe o no es un CENTRO EDUCATIVO")
+        if a.id_ciclo not in ciclos:
+            errores.append("id_ciclo: el ciclo no existe")
+        if a.id_provincia is not None and a.id_provincia not in provincias:
+            errores.append("id_provincia: la provincia no existe")
+        if a.nif_nie in nifs_en_bd:
+            errores.append("nif_nie: ya existe un alumno con ese NIF/NIE")
+        elif a.nif_nie in nifs_vistos:
+            errores.append(f"nif_nie: repetido en la fila {nifs_vistos[a.nif_nie]}")
+        else:
+            nifs_vistos[a.nif_nie] = i
+
+        if errores:
+            informe[i - 1]["ok"] = False
+
+    a_insertar = [validos[i].model_dump() for i in validos if informe[i - 1]["ok"]]
+    num_errores = len(informe) - len(a_insertar)
+
+    if todo_o_nada and num_errores:
+        return {
+            "ok": False,
+            "message": f"Importación cancelada: {num_errores} filas con errores",
+            "data": {"creados": 0, "errores": num_errores, "filas": informe},
+        }
+
+    # 3) insertar por lotes en una sola transacción
+    try:
+        for inicio in range(0, len(a_insertar), BULK_BATCH_SIZE):
+            consultas.ejecutar(db, "alumnos.insertar", a_insertar[inicio:inicio + BULK_BATCH_SIZE])
+        db.commit()
+
+    except IntegrityError:
+        db.rollback()
+        # otra petición ha metido los mismos NIF/NIE entre la validación y el INSERT
+        return {
+            "ok": False,
+            "message": "No se pudo importar (NIF/NIE duplicado u otra restricción). No se ha creado ningún alumno.",
+            "data": {"creados": 0, "errores": num_errores, "filas": informe},
+        }
+
+    # los ids los pone MySQL: se leen de vuelta por NIF/NIE para el buscador
+    if a_insertar:
+        nuevos = consultas.ejecutar(
+            db, "alumnos.para_buscador_por_nif", {"ids": [a["nif_nie"] for a in a_insertar]}
+        ).mappings().all()
+        for a in nuevos:
+            buscador_alumnos.poner(a)
+        auditoria.registrar(user, "importar", "alumno", ids=[a["id_alumno"] for a in nuevos])
+
+    return {
+        "ok": num_errores == 0,
+        "message": f"Importación: {len(a_insertar)} alumnos creados, {num_errores} filas con errores",
+        "data": {"creados": len(a_insertar), "errores": num_errores, "filas": informe},
+    }
+
+
 @router.put("/{id_alumno}")
 def actualizar_alumno(
     id_alumno: int,
     payload: AlumnoUpdate,
     db: Session = Depends(get_db),
-    user=Depends(require_token),
+    user=Depends(requiere_permiso(OPCION_MENU, "put")),
 ):
     # 1) comprobar que existe
-    existe = db.execute(text("""
-        SELECT id_alumno
-        FROM sgi_alumnos
-        WHERE id_alumno = :id
-        LIMIT 1
-    """), {"id": id_alumno}).scalar()
+    existe = consultas.ejecutar(db, "alumnos.existe", {"id": id_alumno}).scalar()
 
     if not existe:
         raise HTTPException(status_code=404, detail="Alumno no encontrado")
@@ -185,24 +474,7 @@ def actualizar_alumno(
         params = payload.model_dump()
         params["id_alumno"] = id_alumno
 
-        db.execute(text("""
-            UPDATE sgi_alumnos
-            SET
-                nif_nie = :nif_nie,
-                nombre = :nombre,
-                apellidos = :apellidos,
-                fecha_nacimiento = :fecha_nacimiento,
-                id_entidad_centro = :id_entidad_centro,
-                id_ciclo = :id_ciclo,
-                curso = :curso,
-                telefono = :telefono,
-                direccion = :direccion,
-                cp = :cp,
-                localidad = :localidad,
-                id_provincia = :id_provincia,
-                observaciones = :observaciones
-            WHERE id_alumno = :id_alumno
-        """), params)
+        consultas.ejecutar(db, "alumnos.actualizar", params)
 
         db.commit()
 
@@ -210,32 +482,25 @@ def actualizar_alumno(
         db.rollback()
         return {"ok": False, "message": "No se pudo actualizar (NIF/NIE duplicado u otra restricción)", "data": None}
 
+    buscador_alumnos.poner(params)
+    auditoria.registrar(user, "actualizar", "alumno", id_alumno)
+
     return {"ok": True, "message": "Alumno actualizado", "data": None}
 
 @router.delete("/{id_alumno}")
 def borrar_alumno(
     id_alumno: int,
     db: Session = Depends(get_db),
-    user=Depends(require_token),
+    user=Depends(requiere_permiso(OPCION_MENU, "delete")),
 ):
     # 1) comprobar que existe
-    existe = db.execute(text("""
-        SELECT id_alumno
-        FROM sgi_alumnos
-        WHERE id_alumno = :id
-        LIMIT 1
-    """), {"id": id_alumno}).scalar()
+    existe = consultas.ejecutar(db, "alumnos.existe", {"id": id_alumno}).scalar()
 
     if not existe:
         raise HTTPException(status_code=404, detail="Alumno no encontrado")
 
     # 2) comprobar si está asignado a una vacante
-    asignado = db.execute(text("""
-        SELECT id_vacante_x_alumno
-        FROM sgi_vacantes_x_alumnos
-        WHERE id_alumno = :id
-        LIMIT 1
-    """), {"id": id_alumno}).scalar()
+    asignado = consultas.ejecutar(db, "vacantes_x_alumnos.de_alumno", {"id": id_alumno}).scalar()
 
     if asignado:
         raise HTTPException(
@@ -244,10 +509,9 @@ def borrar_alumno(
         )
 
     # 3) borrar
-    db.execute(text("""
-        DELETE FROM sgi_alumnos
-        WHERE id_alumno = :id
-    """), {"id": id_alumno})
+    consultas.ejecutar(db, "alumnos.borrar", {"id": id_alumno})
     db.commit()
+    buscador_alumnos.quitar(id_alumno)
+    auditoria.registrar(user, "borrar", "alumno", id_alumno)
 
     return {"ok": True, "message": "Alumno eliminado", "data": None}
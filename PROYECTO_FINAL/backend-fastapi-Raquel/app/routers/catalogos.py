@@ -1,20 +1,96 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import text
-from app.db.session import get_db
+from fastapi import APIRouter, Depends, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from app.core.security import require_token
+from app.core.permisos import requiere_superadmin
+from app.core.catalogos import catalogos_cache, CATALOGOS
+from app.core.config import CATALOGOS_MAX_AGE
+from app.core.entidades_index import indice_entidades
+from app.core.facetas import facetas_entidades, facetas_contactos
 
 router = APIRouter(prefix="/catalogos", tags=["catalogos"])
 
+
+def respuesta_catalogo(request: Request, body: bytes, etag: str) -> Response:
+    """200 con el JSON ya serializado, o 304 si el cliente ya tiene esa versión."""
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={CATALOGOS_MAX_AGE}",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        etags_cliente = [e.strip() for e in if_none_match.split(",")]
+        if etag in etags_cliente or "*" in etags_cliente:
+            return Response(status_code=304, headers=headers)
+
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def servir(request: Request, nombre: str) -> Response:
+    # la carga (si toca) es síncrona contra la BD -> threadpool
+    cat = await run_in_threadpool(catalogos_cache.get, nombre)
+    return respuesta_catalogo(request, cat.body, cat.etag)
+
+
 @router.get("/provincias")
-def get_provincias(
-    db: Session = Depends(get_db),
-    user=Depends(require_token),
-):
-    rows = db.execute(text("""
-        SELECT id_provincia, provincia
-        FROM sgi_provincias
-        ORDER BY provincia
-    """)).mappings().all()
-
-    return {"ok": True, "message": None, "data": [dict(r) for r in rows]}
+async def get_provincias(request: Request, user=Depends(require_token)):
+    return await servir(request, "provincias")
+
+
+@router.get("/ciclos")
+async def get_ciclos(request: Request, user=Depends(require_token)):
+    return await servir(request, "ciclos")
+
+
+@router.get("/centros")
+async def get_centros(request: Request, user=Depends(require_token)):
+    # entidades de tipo CENTRO EDUCATIVO (desplegable de alumnos)
+    return await servir(request, "centros")
+
+
+@router.get("/entidades")
+async def get_entidades(request: Request, user=Depends(require_token)):
+    return await servir(request, "entidades")
+
+
+@router.get("/zonas")
+async def get_zonas(request: Request, user=Depends(require_token)):
+    return await servir(request, "zonas")
+
+
+@router.get("/tipos-entidad")
+async def get_tipos_entidad(request: Request, user=Depends(require_token)):
+    return await servir(request, "tipos-entidad")
+
+
+@router.get("/modos-reunion")
+async def get_modos_reunion(request: Request, user=Depends(require_token)):
+    return await servir(request, "modos-reunion")
+
+
+@router.get("/motivos-reunion")
+async def get_motivos_reunion(request: Request, user=Depends(require_token)):
+    return await servir(request, "motivos-reunion")
+
+
+@router.get("/all")
+async def get_todos(request: Request, user=Depends(require_token)):
+    # todos los catálogos en una sola petición (arranque del frontend)
+    body, etag = await run_in_threadpool(catalogos_cache.todos)
+    return respuesta_catalogo(request, body, etag)
+
+
+@router.post("/recargar")
+async def recargar_catalogos(nombre: str | None = None, user=Depends(requiere_superadmin)):
+    if nombre is not None and nombre not in CATALOGOS:
+        return {"ok": False, "message": f"Catálogo desconocido: {nombre}", "data": None}
+
+    await run_in_threadpool(catalogos_cache.recargar, nombre)
+    # entidades y tipos también alimentan el índice de validaciones
+    if nombre in (None, "entidades", "centros", "tipos-entidad"):
+        indice_entidades.invalidar()
+    # y los listados con facetas muestran los nombres de zonas, provincias y tipos
+    if nombre in (None, "entidades", "centros", "tipos-entidad", "zonas", "provincias"):
+        facetas_entidades.invalidar()
+        facetas_contactos.invalidar()
+    return {"ok": True, "message": "Catálogos recargados", "data": catalogos_cache.estado()}
@@ -0,0 +1,166 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+
+from app.db.session import get_db
+from app.db.consultas import consultas
+from app.core.security import require_token
+from app.core.permisos import requiere_permiso
+from app.core.auditoria import auditoria
+from app.core.respuestas import RespuestaJSON
+from app.core.facetas import facetas_entidades, facetas_contactos
+from app.core.config import FACETAS_MAX_RESULTADOS
+
+from app.schemas.contactos import ContactoCreate
+from app.schemas.contactos import ContactoUpdate
+
+
+def contacto_cambiado(db: Session, id_contacto: int, *ids_entidad: int) -> None:
+    """Después del commit: el contacto y las familias de su entidad (la de antes y la nueva)."""
+    facetas_contactos.refrescar(db, [id_contacto])
+    facetas_entidades.refrescar(db, ids_entidad)
+
+
+# opción de menú (sgi_opciones_menu.accion) cuyos permisos post/put/delete se exigen al escribir
+OPCION_MENU = "contactos"
+
+router = APIRouter(prefix="/contactos", tags=["contactos"])
+
+@router.get("")
+def listar_contactos(
+    id_zona: list[int] = Query(default=[]),
+    id_provincia: list[int] = Query(default=[]),
+    id_tipo_entidad: list[int] = Query(default=[]),
+    id_familia: list[int] = Query(default=[]),
+    localidad: list[str] = Query(default=[]),
+    q: str | None = Query(default=None, max_length=100),
+    limit: int = Query(default=50, ge=1, le=FACETAS_MAX_RESULTADOS),
+    offset: int = Query(default=0, ge=0),
+    db: Session = Depends(get_db),
+    user=Depends(require_token),
+):
+    """
+    Contactos filtrados (varios valores por filtro: ?id_familia=2&id_familia=16)
+    con los totales de cada faceta, desde el índice en memoria.
+
+    id_tipo_entidad: el tipo de la entidad del contacto.
+    """
+    res = facetas_contactos.buscar(
+        db,
+        {
+            "id_zona": id_zona,
+            "id_provincia": id_provincia,
+            "id_tipo_entidad": id_tipo_entidad,
+            "id_familia": id_familia,
+            "localidad": localidad,
+        },
+        q=q,
+        limit=limit,
+        offset=offset,
+    )
+    return RespuestaJSON({
+        "ok": True,
+        "message": "Listado de contactos",
+        "data": res["filas"],
+        "total": res["total"],
+        "facetas": res["facetas"],
+    })
+
+@router.get("/{id_contacto}")
+def obtener_contacto(
+    id_contacto: int,
+    db: Session = Depends(get_db),
+    user=Depends(require_token),
+):
+    row = consultas.ejecutar(db, "contactos.detalle", {"id": id_contacto}).mappings().first()
+
+    if not row:
+        raise HTTPException(status_code=404, detail="Contacto no encontrado")
+
+    return RespuestaJSON({"ok": True, "message": "Detalle de contacto", "data": row})
+
+@router.post("")
+def crear_contacto(
+    payload: ContactoCreate,
+    db: Session = Depends(get_db),
+    user=Depends(requiere_permiso(OPCION_MENU, "post")),
+):
+    try:
+        id_contacto = consultas.ejecutar(db, "contactos.insertar", payload.model_dump()).lastrowid
+        db.commit()
+
+    except IntegrityError:
+        db.rollback()
+        return {
+            "ok": False,
+            "message": "No se pudo crear: entidad, zona, familia o provincia no existen.",
+            "data": None
+        }
+
+    contacto_cambiado(db, id_contacto, payload.id_entidad)
+    auditoria.registrar(user, "crear", "contacto", id_contacto)
+
+    return {"ok": True, "message": "Contacto creado", "data": {"id_contacto": id_contacto}}
+
+@router.put("/{id_contacto}")
+def actualizar_contacto(
+    id_contacto: int,
+    payload: ContactoUpdate,
+    db: Session = Depends(get_db),
+    user=Depends(requiere_permiso(OPCION_MENU, "put")),
+):
+    # existe + entidad a la que pertenecía (bloqueado hasta el commit)
+    entidad_anterior = consultas.ejecutar(db, "contactos.entidad_bloqueo", {"id": id_contacto}).scalar()
+
+    if entidad_anterior is None:
+        db.rollback()
+        raise HTTPException(status_code=404, detail="Contacto no encontrado")
+
+    try:
+        params = payload.model_dump()
+        params["id_contacto"] = id_contacto
+        consultas.ejecutar(db, "contactos.actualizar", params)
+        db.commit()
+
+    except IntegrityError:
+        db.rollback()
+        return {
+            "ok": False,
+            "message": "No se pudo actualizar: entidad, zona, familia o provincia no existen.",
+            "data": None
+        }
+
+    contacto_cambiado(db, id_contacto, entidad_anterior, payload.id_entidad)
+    auditoria.registrar(user, "actualizar", "contacto", id_contacto)
+
+    return {"ok": True, "message": "Contacto actualizado", "data": None}
+
+@router.delete("/{id_contacto}")
+def borrar_contacto(
+    id_contacto: int,
+    db: Session = Depends(get_db),
+    user=Depends(requiere_permiso(OPCION_MENU, "delete")),
+):
+    entidad_anterior = consultas.ejecutar(db, "contactos.entidad_bloqueo", {"id": id_contacto}).scalar()
+
+    if entidad_anterior is None:
+        db.rollback()
+        raise HTTPException(status_code=404, detail="Contacto no encontrado")
+
+    try:
+        consultas.ejecutar(db, "contactos.borrar", {"id": id_contacto})
+        db.commit()
+
+    except IntegrityError:
+        db.rollback()
+        return {
+            "ok": False,
+            "message": "No se puede borrar: el contacto es el principal de una entidad o está en reuniones.",
+            "data": None
+        }
+
+    contacto_cambiado(db, id_contacto, entidad_anterior)
+    auditoria.registrar(user, "borrar", "contacto", id_contacto)
+
+    return {"ok": True, "message": "Contacto eliminado", "data": None}
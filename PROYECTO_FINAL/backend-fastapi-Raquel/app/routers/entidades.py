@@ -0,0 +1,171 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+
+from app.db.session import get_db
+from app.db.consultas import consultas
+from app.core.security import require_token
+from app.core.permisos import requiere_permiso
+from app.core.auditoria import auditoria
+from app.core.respuestas import RespuestaJSON
+from app.core.catalogos import catalogos_cache
+from app.core.entidades_index import indice_entidades
+from app.core.facetas import facetas_entidades, facetas_contactos
+from app.core.config import FACETAS_MAX_RESULTADOS
+
+from app.schemas.entidades import EntidadCreate
+from app.schemas.entidades import EntidadUpdate
+
+
+def entidad_cambiada(db: Session, id_entidad: int) -> None:
+    """Después del commit: índices en memoria y catálogos que incluyen entidades."""
+    facetas_entidades.refrescar(db, [id_entidad])
+    # sus contactos muestran el nombre y el tipo de la entidad
+    facetas_contactos.refrescar(db, facetas_contactos.ids_donde("id_entidad", id_entidad))
+    indice_entidades.refrescar_entidad(db, id_entidad)
+    catalogos_cache.invalidar("entidades", "centros")
+
+
+# opción de menú (sgi_opciones_menu.accion) cuyos permisos post/put/delete se exigen al escribir
+OPCION_MENU = "entidades"
+
+router = APIRouter(prefix="/entidades", tags=["entidades"])
+
+@router.get("")
+def listar_entidades(
+    id_zona: list[int] = Query(default=[]),
+    id_provincia: list[int] = Query(default=[]),
+    id_tipo_entidad: list[int] = Query(default=[]),
+    id_familia: list[int] = Query(default=[]),
+    localidad: list[str] = Query(default=[]),
+    q: str | None = Query(default=None, max_length=100),
+    limit: int = Query(default=50, ge=1, le=FACETAS_MAX_RESULTADOS),
+    offset: int = Query(default=0, ge=0),
+    db: Session = Depends(get_db),
+    user=Depends(require_token),
+):
+    """
+    Entidades filtradas (varios valores por filtro: ?id_zona=1&id_zona=4) con
+    los totales de cada faceta para el lateral. Sale del índice en memoria:
+    no hay consulta a BD por petición.
+
+    id_familia: entidades con algún contacto de esa familia profesional.
+    """
+    res = facetas_entidades.buscar(
+        db,
+        {
+            "id_zona": id_zona,
+            "id_provincia": id_provincia,
+            "id_tipo_entidad": id_tipo_entidad,
+            "id_familia": id_familia,
+            "localidad": localidad,
+        },
+        q=q,
+        limit=limit,
+        offset=offset,
+    )
+    return RespuestaJSON({
+        "ok": True,
+        "message": "Listado de entidades",
+        "data": res["filas"],
+        "total": res["total"],
+        "facetas": res["facetas"],
+    })
+
+@router.get("/{id_entidad}")
+def obtener_entidad(
+    id_entidad: int,
+    db: Session = Depends(get_db),
+    user=Depends(require_token),
+):
+    row = consultas.ejecutar(db, "entidades.detalle", {"id": id_entidad}).mappings().first()
+
+    if not row:
+        raise HTTPException(status_code=404, detail="Entidad no encontrada")
+
+    return RespuestaJSON({"ok": True, "message": "Detalle de entidad", "data": row})
+
+@router.post("")
+def crear_entidad(
+    payload: EntidadCreate,
+    db: Session = Depends(get_db),
+    user=Depends(requiere_permiso(OPCION_MENU, "post")),
+):
+    try:
+        id_entidad = consultas.ejecutar(db, "entidades.insertar", payload.model_dump()).lastrowid
+        db.commit()
+
+    except IntegrityError:
+        db.rollback()
+        return {
+            "ok": False,
+            "message": "No se pudo crear: código duplicado, o zona, tipo, provincia o contacto no existen.",
+            "data": None
+        }
+
+    entidad_cambiada(db, id_entidad)
+    auditoria.registrar(user, "crear", "entidad", id_entidad)
+
+    return {"ok": True, "message": "Entidad creada", "data": {"id_entidad": id_entidad}}
+
+@router.put("/{id_entidad}")
+def actualizar_entidad(
+    id_entidad: int,
+    payload: EntidadUpdate,
+    db: Session = Depends(get_db),
+    user=Depends(requiere_permiso(OPCION_MENU, "put")),
+):
+    existe = consultas.ejecutar(db, "entidades.existe_bloqueo", {"id": id_entidad}).scalar()
+
+    if not existe:
+        db.rollback()
+        raise HTTPException(status_code=404, detail="Entidad no encontrada")
+
+    try:
+        params = payload.model_dump()
+        params["id_entidad"] = id_entidad
+        consultas.ejecutar(db, "entidades.actualizar", params)
+        db.commit()
+
+    except IntegrityError:
+        db.rollback()
+        return {
+            "ok": False,
+            "message": "No se pudo actualizar: código duplicado, o zona, tipo, provincia o contacto no existen.",
+            "data": None
+        }
+
+    entidad_cambiada(db, id_entidad)
+    auditoria.registrar(user, "actualizar", "entidad", id_entidad)
+
+    return {"ok": True, "message": "Entidad actualizada", "data": None}
+
+@router.delete("/{id_entidad}")
+def borrar_entidad(
+    id_entidad: int,
+    db: Session = Depends(get_db),
+    user=Depends(requiere_permiso(OPCION_MENU, "delete")),
+):
+    existe = consultas.ejecutar(db, "entidades.existe_bloqueo", {"id": id_entidad}).scalar()
+
+    if not existe:
+        db.rollback()
+        raise HTTPException(status_code=404, detail="Entidad no encontrada")
+
+    try:
+        consultas.ejecutar(db, "entidades.borrar", {"id": id_entidad})
+        db.commit()
+
+    except IntegrityError:
+        db.rollback()
+        return {
+            "ok": False,
+            "message": "No se puede borrar: la entidad tiene contactos, alumnos, vacantes o reuniones.",
+            "data": None
+        }
+
+    entidad_cambiada(db, id_entidad)
+    auditoria.registrar(user, "borrar", "entidad", id_entidad)
+
+    return {"ok": True, "message": "Entidad eliminada", "data": None}
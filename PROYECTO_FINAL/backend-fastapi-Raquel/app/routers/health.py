@@ -2,8 +2,9 @@
 from fastapi import APIRouter
 from fastapi import Depends
 from sqlalchemy.orm import Session
-from sqlalchemy import text
-from app.db.session import get_db
+from app.db.session import get_db, engine
+from app.db.consultas import consultas
+from app.db.pool import estado_pool
 
 router = APIRouter(tags=["health"])
 
@@ -13,5 +14,5 @@ def health():
 
 @router.get("/health/db")
 def health_db(db: Session = Depends(get_db)):
-    value = db.execute(text("SELECT 1")).scalar()
-    return {"ok": True, "message": "DB OK", "data": {"select_1": value}}
\ No newline at end of file
+    value = consultas.ejecutar(db, "health.select_1").scalar()
+    return {"ok": True, "message": "DB OK", "data": {"select_1": value, "pool": estado_pool(engine)}}
\ No newline at end of file
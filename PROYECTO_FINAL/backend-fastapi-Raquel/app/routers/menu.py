@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends, Request
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.security import require_token
+from app.core.permisos import permisos_rol, requiere_superadmin
+from app.routers.catalogos import respuesta_catalogo
+
+router = APIRouter(prefix="/menu", tags=["menu"])
+
+
+@router.get("")
+async def get_menu(request: Request, user=Depends(require_token)):
+    """Menú del rol del usuario (grupos y opciones con sus permisos), ya serializado: 304 si no ha cambiado."""
+    # solo va a BD si toca recargar la matriz
+    menu = await run_in_threadpool(permisos_rol.menu, user["id_rol"])
+    return respuesta_catalogo(request, menu.body, menu.etag)
+
+
+@router.post("/recargar")
+async def recargar_menu(user=Depends(requiere_superadmin)):
+    # después de tocar roles, opciones o grupos de menú
+    await run_in_threadpool(permisos_rol.recargar)
+    return {"ok": True, "message": "Permisos y menús recargados", "data": None}
@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.metricas import metricas
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics():
+    # formato de texto de Prometheus; sin token, como /health (que no salga de la red interna)
+    return PlainTextResponse(metricas.prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
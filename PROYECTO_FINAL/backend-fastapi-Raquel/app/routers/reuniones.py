@@ -0,0 +1,321 @@
+from collections import defaultdict
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app.db.session import get_db
+from app.db.consultas import consultas
+from app.db.errores import es_bloqueo
+from app.core.security import require_token
+from app.core.auditoria import auditoria
+from app.core.respuestas import RespuestaJSON
+from app.core.solapes import solapes
+from app.core.config import REUNIONES_MAX_DIAS
+
+from app.schemas.reuniones import ReunionCreate
+from app.schemas.reuniones import ReunionUpdate
+
+
+def construir_filtro_reuniones(
+    desde: date,
+    hasta: date,
+    id_zona: int | None = None,
+    id_contacto: int | None = None,
+) -> tuple[str, dict]:
+    """
+    WHERE del calendario (alias r = sgi_reuniones). Lo comparten el listado
+    y la consulta de asistentes, para traer estos de una vez para todo el rango.
+
+    id_contacto: reuniones donde esa persona es el contacto principal o asistente.
+    """
+    where = ["r.fecha BETWEEN :desde AND :hasta"]
+    params = {"desde": desde, "hasta": hasta}
+
+    if id_zona is not None:
+        where.append("r.id_zona = :id_zona")
+        params["id_zona"] = id_zona
+    if id_contacto is not None:
+        where.append("""(r.id_contacto = :id_contacto OR EXISTS (
+                SELECT 1 FROM sgi_asistentes ac
+                WHERE ac.id_reunion = r.id_reunion AND ac.id_contacto = :id_contacto))""")
+        params["id_contacto"] = id_contacto
+
+    return " AND ".join(where), params
+
+
+def construir_consultas_calendario(
+    desde: date,
+    hasta: date,
+    id_zona: int | None = None,
+    id_contacto: int | None = None,
+) -> tuple[str, str, dict]:
+    """(sql_reuniones, sql_asistentes, params) del calendario: dos consultas sea cual sea el rango."""
+    filtro, params = construir_filtro_reuniones(desde, hasta, id_zona, id_contacto)
+
+    sql_reuniones = f"""
+        SELECT
+            r.id_reunion,
+            r.reunion,
+            r.fecha,
+            TIME_FORMAT(r.hora_inicio, '%H:%i') AS hora_inicio,
+            TIME_FORMAT(r.hora_fin, '%H:%i') AS hora_fin,
+
+            r.id_zona,
+            z.zona,
+            r.id_modo_reunion,
+            mo.modo_reunion,
+            r.id_motivo_reunion,
+            mt.motivo_reunion,
+            r.id_contacto,
+            CONCAT_WS(' ', c.nombre, c.apellidos) AS contacto,
+            r.id_entidad_target,
+            e.entidad AS entidad_target,
+
+            r.objetivo,
+            r.ubicacion,
+            r.localidad
+        FROM sgi_reuniones r
+        JOIN sgi_zonas z ON z.id_zona = r.id_zona
+        JOIN sgi_modos_reunion mo ON mo.id_modo_reunion = r.id_modo_reunion
+        JOIN sgi_motivos_reunion mt ON mt.id_motivo_reunion = r.id_motivo_reunion
+        LEFT JOIN sgi_contactos c ON c.id_contacto = r.id_contacto
+        LEFT JOIN sgi_entidades e ON e.id_entidad = r.id_entidad_target
+        WHERE {filtro}
+        ORDER BY r.fecha, r.hora_inicio, r.id_reunion
+    """
+
+    # una sola consulta para los asistentes de todas las reuniones del rango
+    sql_asistentes = f"""
+        SELECT a.id_reunion, a.id_contacto, CONCAT_WS(' ', ca.nombre, ca.apellidos) AS contacto
+        FROM sgi_asistentes a
+        JOIN sgi_contactos ca ON ca.id_contacto = a.id_contacto
+        WHERE a.id_reunion IN (
+            SELECT r.id_reunion FROM sgi_reuniones r WHERE {filtro}
+        )
+        ORDER BY ca.apellidos, ca.nombre
+    """
+    return sql_reuniones, sql_asistentes, params
+
+
+consultas.dinamica(
+    "reuniones.calendario",
+    ejemplo=lambda: construir_consultas_calendario(date(2025, 1, 1), date(2025, 1, 31), id_contacto=1)[::2],
+)
+consultas.dinamica(
+    "reuniones.calendario_asistentes",
+    ejemplo=lambda: construir_consultas_calendario(date(2025, 1, 1), date(2025, 1, 31), id_contacto=1)[1:],
+)
+
+
+def comprobar_solapes(db: Session, payload: ReunionCreate, excluir: int = 0) -> None:
+    """409 con las reuniones que se pisan (misma zona o alguna persona en común)."""
+    contactos = set(payload.asistentes)
+    if payload.id_contacto is not None:
+        contactos.add(payload.id_contacto)
+
+    choques = consultas.ejecutar(db, "reuniones.solapes", {
+        "fecha": payload.fecha,
+        "hora_inicio": payload.hora_inicio,
+        "hora_fin": payload.hora_fin,
+        "id_zona": payload.id_zona,
+        "contactos": list(contactos),
+        "excluir": excluir,
+    }).mappings().all()
+
+    if choques:
+        db.rollback()
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "message": "La reunión se solapa con otras de la misma zona o con las mismas personas",
+                "solapes": [dict(c) for c in choques],
+            },
+        )
+
+
+def conflicto_si_bloqueo(db: Session, e: OperationalError) -> HTTPException:
+    """
+    El FOR UPDATE por rango de reuniones.solapes bloquea también los huecos del
+    índice fecha_horas: dos altas del mismo día a la vez pueden interbloquearse
+    en el INSERT y MySQL deshace una. Eso es un 409 (la otra ha ganado), no un 500.
+    """
+    db.rollback()
+    if not es_bloqueo(e):
+        raise e
+    return HTTPException(status_code=409, detail="Se está guardando a la vez otra reunión de ese día; vuelve a intentarlo")
+
+
+def guardar_asistentes(db: Session, id_reunion: int, asistentes: list[int]) -> None:
+    # sin repetidos (UNIQUE id_reunion + id_contacto) y en un solo INSERT por lotes
+    filas = [{"id_reunion": id_reunion, "id_contacto": c} for c in dict.fromkeys(asistentes)]
+    if filas:
+        consultas.ejecutar(db, "asistentes.insertar", filas)
+
+
+router = APIRouter(prefix="/reuniones", tags=["reuniones"])
+
+@router.get("")
+def listar_reuniones(
+    desde: date,
+    hasta: date,
+    id_zona: int | None = None,
+    id_contacto: int | None = None,
+    incluir_solapes: bool = False,
+    db: Session = Depends(get_db),
+    user=Depends(require_token),
+):
+    """
+    Calendario: reuniones entre `desde` y `hasta` (ambos incluidos) con sus
+    asistentes. Con incluir_solapes=true cada reunión lleva también los ids de
+    las que se pisan con ella.
+    """
+    if hasta < desde:
+        raise HTTPException(status_code=400, detail="hasta no puede ser anterior a desde")
+    if (hasta - desde).days >= REUNIONES_MAX_DIAS:
+        raise HTTPException(status_code=400, detail=f"El rango no puede pasar de {REUNIONES_MAX_DIAS} días")
+
+    sql_reuniones, sql_asistentes, params = construir_consultas_calendario(desde, hasta, id_zona, id_contacto)
+
+    # 1) reuniones del rango (una consulta, por el índice de fecha)
+    result = consultas.ejecutar_sql(db, "reuniones.calendario", sql_reuniones, params)
+    # con miles de filas, dict(zip()) sobre las tuplas es bastante más rápido que .mappings()
+    columnas = list(result.keys())
+    data = [dict(zip(columnas, row)) for row in result]
+
+    # 2) asistentes de todas ellas (una consulta más, no una por reunión)
+    asistentes = defaultdict(list)
+    if data:
+        result = consultas.ejecutar_sql(db, "reuniones.calendario_asistentes", sql_asistentes, params)
+        for id_reunion, id_contacto, contacto in result:
+            asistentes[id_reunion].append({"id_contacto": id_contacto, "contacto": contacto})
+
+    for r in data:
+        r["asistentes"] = asistentes.get(r["id_reunion"], [])
+
+    if incluir_solapes:
+        # ojo: con id_contacto / id_zona solo se ven los solapes entre las reuniones filtradas
+        pisadas = solapes(data)
+        for r in data:
+            r["solapes"] = sorted(pisadas.get(r["id_reunion"], ()))
+
+    return RespuestaJSON({"ok": True, "message": "Calendario de reuniones", "data": data})
+
+@router.get("/{id_reunion}")
+def obtener_reunion(
+    id_reunion: int,
+    db: Session = Depends(get_db),
+    user=Depends(require_token),
+):
+    row = consultas.ejecutar(db, "reuniones.detalle", {"id": id_reunion}).mappings().first()
+
+    if not row:
+        raise HTTPException(status_code=404, detail="Reunión no encontrada")
+
+    asistentes = consultas.ejecutar(db, "reuniones.asistentes", {"id": id_reunion}).mappings().all()
+
+    return RespuestaJSON({
+        "ok": True,
+        "message": "Detalle de reunión",
+        "data": {**row, "asistentes": asistentes},
+    })
+
+@router.post("")
+def crear_reunion(
+    payload: ReunionCreate,
+    forzar: bool = False,
+    db: Session = Depends(get_db),
+    user=Depends(require_token),
+):
+    try:
+        # forzar=true: se guarda aunque se solape (p.ej. dos reuniones cortas seguidas a propósito)
+        if not forzar:
+            comprobar_solapes(db, payload)
+
+        params = payload.model_dump(exclude={"asistentes"})
+        id_reunion = consultas.ejecutar(db, "reuniones.insertar", params).lastrowid
+        guardar_asistentes(db, id_reunion, payload.asistentes)
+        db.commit()
+
+    except IntegrityError:
+        db.rollback()
+        return {
+            "ok": False,
+            "message": "No se pudo crear: zona, modo, motivo, entidad o algún contacto no existen.",
+            "data": None
+        }
+
+    except OperationalError as e:
+        raise conflicto_si_bloqueo(db, e)
+
+    auditoria.registrar(user, "crear", "reunion", id_reunion)
+
+    return {"ok": True, "message": "Reunión creada", "data": {"id_reunion": id_reunion}}
+
+@router.put("/{id_reunion}")
+def actualizar_reunion(
+    id_reunion: int,
+    payload: ReunionUpdate,
+    forzar: bool = False,
+    db: Session = Depends(get_db),
+    user=Depends(require_token),
+):
+    # 1) comprobar que existe (bloqueada hasta el commit)
+    existe = consultas.ejecutar(db, "reuniones.existe_bloqueo", {"id": id_reunion}).scalar()
+
+    if not existe:
+        db.rollback()
+        raise HTTPException(status_code=404, detail="Reunión no encontrada")
+
+    try:
+        # 2) solapes con las demás (ella misma no cuenta)
+        if not forzar:
+            comprobar_solapes(db, payload, excluir=id_reunion)
+
+        # 3) update + asistentes sustituidos
+        params = payload.model_dump(exclude={"asistentes"})
+        params["id_reunion"] = id_reunion
+
+        consultas.ejecutar(db, "reuniones.actualizar", params)
+        consultas.ejecutar(db, "asistentes.borrar_de_reunion", {"id": id_reunion})
+        guardar_asistentes(db, id_reunion, payload.asistentes)
+
+        db.commit()
+
+    except IntegrityError:
+        db.rollback()
+        return {
+            "ok": False,
+            "message": "No se pudo actualizar: zona, modo, motivo, entidad o algún contacto no existen.",
+            "data": None
+        }
+
+    except OperationalError as e:
+        raise conflicto_si_bloqueo(db, e)
+
+    auditoria.registrar(user, "actualizar", "reunion", id_reunion)
+
+    return {"ok": True, "message": "Reunión actualizada", "data": None}
+
+@router.delete("/{id_reunion}")
+def borrar_reunion(
+    id_reunion: int,
+    db: Session = Depends(get_db),
+    user=Depends(require_token),
+):
+    existe = consultas.ejecutar(db, "reuniones.existe_bloqueo", {"id": id_reunion}).scalar()
+
+    if not existe:
+        db.rollback()
+        raise HTTPException(status_code=404, detail="Reunión no encontrada")
+
+    # los asistentes primero (FK sin ON DELETE CASCADE)
+    consultas.ejecutar(db, "asistentes.borrar_de_reunion", {"id": id_reunion})
+    consultas.ejecutar(db, "reuniones.borrar", {"id": id_reunion})
+    db.commit()
+
+    auditoria.registrar(user, "borrar", "reunion", id_reunion)
+
+    return {"ok": True, "message": "Reunión eliminada", "data": None}
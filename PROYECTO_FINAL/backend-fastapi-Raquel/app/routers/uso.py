@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.core.security import require_token
+from app.core.uso_opciones import uso_opciones, resumen_uso
+from app.core.config import USO_MAX_ANTIGUEDAD_H
+
+from app.schemas.uso import UsoOpcionesLote
+
+
+router = APIRouter(prefix="/uso", tags=["uso"])
+
+
+@router.post("/opciones")
+def registrar_uso_opciones(
+    payload: UsoOpcionesLote,
+    user=Depends(require_token),
+):
+    """
+    Lote de aperturas de opciones de menú desde el frontend. No escribe en BD:
+    se junta en memoria y se vuelca a sgi_historico_opciones cada pocos segundos.
+    """
+    ahora = datetime.now()
+    limite = ahora - timedelta(hours=USO_MAX_ANTIGUEDAD_H)
+
+    eventos = []
+    descartados = 0
+    for e in payload.eventos:
+        fecha = e.fecha or ahora
+        if fecha.tzinfo is not None:
+            # la columna es hora local sin zona
+            fecha = fecha.astimezone().replace(tzinfo=None)
+        if fecha < limite:
+            descartados += 1
+            continue
+        # relojes de cliente adelantados: como mucho "ahora"
+        eventos.append((e.id_opcion_menu, min(fecha, ahora)))
+
+    nuevas = uso_opciones.apuntar(user["id_usuario"], eventos) if eventos else 0
+
+    return {
+        "ok": True,
+        "message": "Uso registrado",
+        "data": {"recibidos": len(payload.eventos), "nuevos": nuevas, "descartados": descartados},
+    }
+
+
+@router.get("/opciones/resumen")
+def resumen_uso_opciones(
+    limit: int = Query(default=10, ge=1, le=100),
+    id_rol: int | None = None,
+    db: Session = Depends(get_db),
+    user=Depends(require_token),
+):
+    """Opciones más usadas por rol (agregado que se recalcula cada USO_RESUMEN_TTL segundos)."""
+    return {"ok": True, "message": "Uso de opciones por rol", "data": resumen_uso.top(db, limit, id_rol)}
@@ -1,11 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
+from collections import Counter
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Header
+from fastapi.responses import StreamingResponse
 
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
-from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError, OperationalError
 
 from app.db.session import get_db
-from app.core.security import require_token
+from app.db.consultas import consultas
+from app.db.errores import es_bloqueo
+from app.core.security import require_token, require_token_o_query
+from app.core.permisos import requiere_permiso
+from app.core.auditoria import auditoria
+from app.core.exportar import respuesta_exportacion
+from app.core.respuestas import RespuestaJSON
+from app.core.asignacion import repartir
+from app.core.eventos import difusor_vacantes
 
 from app.schemas.vacantes import VacanteCreate
 from app.schemas.vacantes import VacanteUpdate
@@ -13,14 +23,44 @@ from app.schemas.vacantes import VacanteUpdate
 
 
 
-router = APIRouter(prefix="/vacantes", tags=["vacantes"])
+def construir_consulta_vacantes(
+    id_entidad: int | None = None,
+    id_ciclo: int | None = None,
+    curso: int | None = None,
+    incluir_alumnos: bool = False,
+) -> tuple[str, dict]:
+    """
+    SELECT del listado de vacantes aplicando los filtros opcionales.
 
-@router.get("")
-def listar_vacantes(
-    db: Session = Depends(get_db),
-    user=Depends(require_token),
-):
-    rows = db.execute(text("""
+    La ocupación sale del contador sgi_vacantes.alumnos_asignados (lo mantienen
+    asignar/desasignar), así que no hay GROUP BY. La lista de nombres solo se
+    calcula si se pide con incluir_alumnos.
+    """
+    where = []
+    params = {}
+
+    if id_entidad is not None:
+        where.append("v.id_entidad = :id_entidad")
+        params["id_entidad"] = id_entidad
+    if id_ciclo is not None:
+        where.append("v.id_ciclo = :id_ciclo")
+        params["id_ciclo"] = id_ciclo
+    if curso is not None:
+        where.append("v.curso = :curso")
+        params["curso"] = curso
+
+    filtro = ("WHERE " + " AND ".join(where)) if where else ""
+
+    lista = ""
+    if incluir_alumnos:
+        lista = """,
+
+            (SELECT GROUP_CONCAT(CONCAT(a.nombre, ' ', a.apellidos) ORDER BY a.apellidos SEPARATOR ', ')
+             FROM sgi_vacantes_x_alumnos vxa
+             JOIN sgi_alumnos a ON a.id_alumno = vxa.id_alumno
+             WHERE vxa.id_vacante = v.id_vacante) AS lista_alumnos"""
+
+    sql = f"""
         SELECT
             v.id_vacante,
             v.curso,
@@ -30,46 +70,165 @@ def listar_vacantes(
             e.entidad AS entidad,
             c.ciclo AS ciclo,
 
-           COUNT(vxa.id_alumno) AS alumnos_asignados,
+            v.alumnos_asignados,
 
-            (v.num_vacantes - COUNT(vxa.id_alumno)) AS vacantes_disponibles,
-
-            GROUP_CONCAT(CONCAT(a.nombre, ' ', a.apellidos) ORDER BY a.apellidos SEPARATOR ', ') AS lista_alumnos
+            (v.num_vacantes - v.alumnos_asignados) AS vacantes_disponibles{lista}
         FROM sgi_vacantes v
         JOIN sgi_entidades e ON e.id_entidad = v.id_entidad
         JOIN sgi_ciclos c ON c.id_ciclo = v.id_ciclo
-        LEFT JOIN sgi_vacantes_x_alumnos vxa ON vxa.id_vacante = v.id_vacante
-        LEFT JOIN sgi_alumnos a ON a.id_alumno = vxa.id_alumno
-        GROUP BY
-            v.id_vacante, v.curso, v.num_vacantes, v.observaciones, e.entidad, c.ciclo
+        {filtro}
         ORDER BY
             e.entidad, c.ciclo, v.curso
-    """)).mappings().all()
+    """
+    return sql, params
+
+
+def construir_consultas_reparto(
+    id_ciclo: int | None = None,
+    curso: int | None = None,
+    bloquear: bool = False,
+) -> tuple[str, str, dict]:
+    """SELECTs de la asignación automática: alumnos sin vacante y vacantes con plazas libres."""
+    filtro_alumnos = ""
+    filtro_vacantes = ""
+    params = {}
+    if id_ciclo is not None:
+        filtro_alumnos += " AND a.id_ciclo = :id_ciclo"
+        filtro_vacantes += " AND v.id_ciclo = :id_ciclo"
+        params["id_ciclo"] = id_ciclo
+    if curso is not None:
+        filtro_alumnos += " AND a.curso = :curso"
+        filtro_vacantes += " AND v.curso = :curso"
+        params["curso"] = curso
+
+    # si se va a guardar, bloqueamos vacantes y alumnos leídos hasta el commit
+    bloqueo = "FOR UPDATE" if bloquear else ""
+
+    sql_alumnos = f"""
+        SELECT
+            a.id_alumno,
+            a.nombre,
+            a.apellidos,
+            a.id_ciclo,
+            a.curso,
+            a.id_provincia,
+            ec.id_zona AS id_zona_centro
+        FROM sgi_alumnos a
+        JOIN sgi_entidades ec ON ec.id_entidad = a.id_entidad_centro
+        WHERE NOT EXISTS (
+            SELECT 1 FROM sgi_vacantes_x_alumnos x WHERE x.id_alumno = a.id_alumno
+        ){filtro_alumnos}
+        {bloqueo}
+    """
+
+    sql_vacantes = f"""
+        SELECT
+            v.id_vacante,
+            v.id_ciclo,
+            v.curso,
+            v.num_vacantes,
+            e.entidad,
+            e.id_provincia,
+            e.id_zona,
+            v.alumnos_asignados AS ocupadas
+        FROM sgi_vacantes v
+        JOIN sgi_entidades e ON e.id_entidad = v.id_entidad
+        WHERE v.num_vacantes > v.alumnos_asignados{filtro_vacantes}
+        {bloqueo}
+    """
+    return sql_alumnos, sql_vacantes, params
+
+
+# el listado y el reparto sin filtros leen las tablas enteras a propósito
+consultas.dinamica("vacantes.listado", ejemplo=lambda: construir_consulta_vacantes(), escaneo_ok=True)
+consultas.dinamica("vacantes.export", ejemplo=lambda: construir_consulta_vacantes(incluir_alumnos=True), escaneo_ok=True)
+consultas.dinamica(
+    "vacantes.reparto_alumnos",
+    ejemplo=lambda: construir_consultas_reparto(id_ciclo=1, curso=1)[::2],
+)
+consultas.dinamica(
+    "vacantes.reparto_vacantes",
+    ejemplo=lambda: construir_consultas_reparto(id_ciclo=1, curso=1)[1:],
+)
+
+def avisar_ocupacion(id_vacante: int, num_vacantes: int, ocupadas: int) -> None:
+    """Evento SSE "ocupacion" para GET /vacantes/stream (después del commit)."""
+    difusor_vacantes.publicar("ocupacion", {
+        "id_vacante": id_vacante,
+        "num_vacantes": int(num_vacantes),
+        "alumnos_asignados": int(ocupadas),
+        "vacantes_disponibles": int(num_vacantes) - int(ocupadas),
+    })
+
+
+# opción de menú (sgi_opciones_menu.accion) cuyos permisos post/put/delete se exigen al escribir
+OPCION_MENU = "vacantes"
+
+router = APIRouter(prefix="/vacantes", tags=["vacantes"])
+
+@router.get("")
+def listar_vacantes(
+    id_entidad: int | None = None,
+    id_ciclo: int | None = None,
+    curso: int | None = None,
+    incluir_alumnos: bool = False,
+    db: Session = Depends(get_db),
+    user=Depends(require_token),
+):
+    # los nombres de los alumnos son opcionales (o /vacantes/{id}/alumnos bajo demanda)
+    sql, params = construir_consulta_vacantes(
+        id_entidad=id_entidad, id_ciclo=id_ciclo, curso=curso, incluir_alumnos=incluir_alumnos
+    )
+    rows = consultas.ejecutar_sql(db, "vacantes.listado", sql, params).mappings().all()
 
-    data = []
-    for r in rows:
-        d = dict(r)
+    if incluir_alumnos:
         # si no hay alumnos, GROUP_CONCAT devuelve None -> lo dejamos en "" para el grid
-        if d["lista_alumnos"] is None:
-            d["lista_alumnos"] = ""
-        data.append(d)
+        rows = [r if r["lista_alumnos"] is not None else {**r, "lista_alumnos": ""} for r in rows]
+
+    return RespuestaJSON({"ok": True, "message": "Listado de vacantes", "data": rows})
 
-    return {"ok": True, "message": "Listado de vacantes", "data": data}
+@router.get("/export")
+def exportar_vacantes(
+    formato: str = Query(default="csv", pattern="^(csv|ndjson)$"),
+    id_entidad: int | None = None,
+    id_ciclo: int | None = None,
+    curso: int | None = None,
+    incluir_alumnos: bool = False,
+    user=Depends(require_token),
+):
+    sql, params = construir_consulta_vacantes(
+        id_entidad=id_entidad, id_ciclo=id_ciclo, curso=curso, incluir_alumnos=incluir_alumnos
+    )
+    return respuesta_exportacion(sql, params, formato, "vacantes")
+
+@router.get("/stream")
+async def stream_vacantes(
+    last_event_id: int | None = Header(default=None),
+    db: Session = Depends(get_db),
+    user=Depends(require_token_o_query),
+):
+    """
+    Cambios de ocupación en vivo (Server-Sent Events) en lugar de repetir
+    GET /vacantes: eventos "ocupacion", "vacante_creada", "vacante_actualizada",
+    "vacante_borrada" y "resync" (recargar el listado entero).
+    """
+    # la conexión de la validación del token no se queda cogida mientras dure el stream
+    db.close()
+    return StreamingResponse(
+        difusor_vacantes.stream(last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @router.post("")
 def crear_vacante(
     payload: VacanteCreate,
     db: Session = Depends(get_db),
-    user=Depends(require_token),
+    user=Depends(requiere_permiso(OPCION_MENU, "post")),
 ):
     try:
-        db.execute(text("""
-            INSERT INTO sgi_vacantes (
-                id_entidad, id_ciclo, curso, num_vacantes, observaciones
-            ) VALUES (
-                :id_entidad, :id_ciclo, :curso, :num_vacantes, :observaciones
-            )
-        """), payload.model_dump())
+        params = payload.model_dump()
+        id_vacante = consultas.ejecutar(db, "vacantes.insertar", params).lastrowid
         db.commit()
 
     except IntegrityError:
@@ -80,8 +239,90 @@ def crear_vacante(
             "data": None
         }
 
+    difusor_vacantes.publicar("vacante_creada", {
+        "id_vacante": id_vacante,
+        **params,
+        "alumnos_asignados": 0,
+        "vacantes_disponibles": params["num_vacantes"],
+    })
+    auditoria.registrar(user, "crear", "vacante", id_vacante)
+
     return {"ok": True, "message": "Vacante creada", "data": None}
 
+@router.post("/asignacion-automatica")
+def asignacion_automatica(
+    dry_run: bool = False,
+    estrategia: str = Query(default="afinidad", pattern="^(afinidad|alfabetica)$"),
+    id_ciclo: int | None = None,
+    curso: int | None = None,
+    db: Session = Depends(get_db),
+    user=Depends(requiere_permiso(OPCION_MENU, "put")),
+):
+    """
+    Reparte de una vez los alumnos sin vacante entre las vacantes con plazas
+    libres del mismo ciclo y curso. Con dry_run=true solo devuelve la propuesta.
+    """
+    sql_alumnos, sql_vacantes, params = construir_consultas_reparto(id_ciclo, curso, bloquear=not dry_run)
+
+    try:
+        # 1) alumnos sin vacante (una consulta)
+        alumnos = consultas.ejecutar_sql(db, "vacantes.reparto_alumnos", sql_alumnos, params).mappings().all()
+
+        # 2) vacantes con plazas libres (una consulta)
+        vacantes = consultas.ejecutar_sql(db, "vacantes.reparto_vacantes", sql_vacantes, params).mappings().all()
+
+        # 3) reparto en memoria
+        asignaciones, sin_plaza = repartir(alumnos, vacantes, estrategia)
+
+        # 4) guardar todo en un único INSERT por lotes
+        if not dry_run:
+            if asignaciones:
+                consultas.ejecutar(
+                    db, "vacantes_x_alumnos.insertar",
+                    [{"id_vacante": x["id_vacante"], "id_alumno": x["id_alumno"]} for x in asignaciones],
+                )
+
+                # contadores de ocupación: un UPDATE por vacante tocada, también por lotes
+                por_vacante = Counter(x["id_vacante"] for x in asignaciones)
+                consultas.ejecutar(
+                    db, "vacantes.sumar_ocupadas",
+                    [{"id_vacante": k, "n": n} for k, n in por_vacante.items()],
+                )
+            db.commit()
+
+    except IntegrityError:
+        # UNIQUE(id_alumno): alguien asignó a mano a uno de estos alumnos a la vez
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Otro usuario ha asignado alumnos mientras tanto; vuelve a lanzar el reparto")
+
+    except OperationalError as e:
+        db.rollback()
+        if not es_bloqueo(e):
+            raise
+        raise HTTPException(status_code=409, detail="Otro usuario está asignando alumnos; vuelve a lanzar el reparto")
+
+    if not dry_run and asignaciones:
+        por_id = {v["id_vacante"]: v for v in vacantes}
+        for k, n in por_vacante.items():
+            avisar_ocupacion(k, por_id[k]["num_vacantes"], por_id[k]["ocupadas"] + n)
+        auditoria.registrar(
+            user, "asignacion_automatica", "vacante",
+            asignaciones=[[x["id_vacante"], x["id_alumno"]] for x in asignaciones],
+        )
+
+    return {
+        "ok": True,
+        "message": ("Propuesta" if dry_run else "Asignación automática") + f": {len(asignaciones)} alumnos asignados, {len(sin_plaza)} sin plaza",
+        "data": {
+            "dry_run": dry_run,
+            "asignaciones": asignaciones,
+            "sin_plaza": [
+                {"id_alumno": a["id_alumno"], "alumno": f"{a['nombre']} {a['apellidos']}"}
+                for a in sin_plaza
+            ],
+        },
+    }
+
 @router.get("/{id_vacante}/alumnos")
 def alumnos_asignados(
     id_vacante: int,
@@ -89,31 +330,15 @@ def alumnos_asignados(
     user=Depends(require_token),
 ):
     # 1) comprobar que la vacante existe
-    existe = db.execute(text("""
-        SELECT id_vacante
-        FROM sgi_vacantes
-        WHERE id_vacante = :id
-        LIMIT 1
-    """), {"id": id_vacante}).scalar()
+    existe = consultas.ejecutar(db, "vacantes.existe", {"id": id_vacante}).scalar()
 
     if not existe:
         raise HTTPException(status_code=404, detail="Vacante no encontrada")
 
     # 2) alumnos asignados a esa vacante
-    rows = db.execute(text("""
-        SELECT
-            a.id_alumno,
-            a.nombre,
-            a.apellidos,
-            a.nif_nie
-        FROM sgi_vacantes_x_alumnos vxa
-        JOIN sgi_alumnos a ON a.id_alumno = vxa.id_alumno
-        WHERE vxa.id_vacante = :id_vacante
-        ORDER BY a.apellidos, a.nombre
-    """), {"id_vacante": id_vacante}).mappings().all()
+    rows = consultas.ejecutar(db, "vacantes.alumnos_asignados", {"id_vacante": id_vacante}).mappings().all()
 
-    data = [dict(r) for r in rows]
-    return {"ok": True, "message": "Alumnos asignados", "data": data}
+    return RespuestaJSON({"ok": True, "message": "Alumnos asignados", "data": rows})
 
 
 @router.get("/{id_vacante}/alumnos-disponibles")
@@ -123,33 +348,17 @@ def alumnos_disponibles(
     user=Depends(require_token),
 ):
     # 1) obtener ciclo y curso de la vacante
-    vac = db.execute(text("""
-        SELECT id_ciclo, curso
-        FROM sgi_vacantes
-        WHERE id_vacante = :id
-        LIMIT 1
-    """), {"id": id_vacante}).mappings().first()
+    vac = consultas.ejecutar(db, "vacantes.ciclo_curso", {"id": id_vacante}).mappings().first()
 
     if not vac:
         raise HTTPException(status_code=404, detail="Vacante no encontrada")
 
     # 2) alumnos del mismo ciclo+curso que NO estén asignados en la tabla auxiliar
-    rows = db.execute(text("""
-        SELECT
-            a.id_alumno,
-            a.nombre,
-            a.apellidos,
-            a.nif_nie
-        FROM sgi_alumnos a
-        LEFT JOIN sgi_vacantes_x_alumnos vxa ON vxa.id_alumno = a.id_alumno
-        WHERE a.id_ciclo = :id_ciclo
-          AND a.curso = :curso
-          AND vxa.id_alumno IS NULL
-        ORDER BY a.apellidos, a.nombre
-    """), {"id_ciclo": vac["id_ciclo"], "curso": vac["curso"]}).mappings().all()
+    rows = consultas.ejecutar(
+        db, "vacantes.alumnos_disponibles", {"id_ciclo": vac["id_ciclo"], "curso": vac["curso"]}
+    ).mappings().all()
 
-    data = [dict(r) for r in rows]
-    return {"ok": True, "message": "Alumnos disponibles", "data": data}
+    return RespuestaJSON({"ok": True, "message": "Alumnos disponibles", "data": rows})
 
 @router.get("/{id_vacante}")
 def get_vacante_by_id(
@@ -157,88 +366,82 @@ def get_vacante_by_id(
     db: Session = Depends(get_db),
     user=Depends(require_token),
 ):
-    row = db.execute(text("""
-        SELECT
-            v.id_vacante,
-            v.id_entidad,
-            v.id_ciclo,
-            v.curso,
-            v.num_vacantes,
-            v.observaciones,
-            COUNT(vxa.id_alumno) AS alumnos_asignados
-        FROM sgi_vacantes v
-        LEFT JOIN sgi_vacantes_x_alumnos vxa ON vxa.id_vacante = v.id_vacante
-        WHERE v.id_vacante = :id
-        GROUP BY v.id_vacante, v.id_entidad, v.id_ciclo, v.curso, v.num_vacantes, v.observaciones
-        LIMIT 1
-    """), {"id": id_vacante}).mappings().first()
+    row = consultas.ejecutar(db, "vacantes.detalle", {"id": id_vacante}).mappings().first()
 
     if not row:
         raise HTTPException(status_code=404, detail="Vacante no encontrada")
 
-    return {"ok": True, "message": None, "data": dict(row)}
+    return RespuestaJSON({"ok": True, "message": None, "data": row})
 
 
-@router.post("/{id_vacante}/alumnos/{id_alumno}")
-def asignar_alumno(
-    id_vacante: int,
-    id_alumno: int,
-    db: Session = Depends(get_db),
-    user=Depends(require_token),
-):
-    # 1) vacante existe + datos necesarios
-    vac = db.execute(text("""
-        SELECT id_vacante, id_ciclo, curso, num_vacantes
-        FROM sgi_vacantes
-        WHERE id_vacante = :id
-        LIMIT 1
-    """), {"id": id_vacante}).mappings().first()
+def _asignar(db: Session, id_vacante: int, id_alumno: int) -> dict:
+    """Comprobaciones + INSERT en una transacción. Devuelve la fila de para_asignar."""
+    # 1) en una sola lectura: vacante, alumno y ocupación.
+    #    FOR UPDATE bloquea la fila de la vacante (y la del alumno) hasta el commit,
+    #    así dos asignaciones simultáneas a la última plaza no pueden pasar las dos.
+    fila = consultas.ejecutar(
+        db, "vacantes.para_asignar", {"id_vacante": id_vacante, "id_alumno": id_alumno}
+    ).mappings().first()
 
-    if not vac:
+    if not fila:
+        db.rollback()
         raise HTTPException(status_code=404, detail="Vacante no encontrada")
 
-    # 2) alumno existe + datos necesarios
-    alum = db.execute(text("""
-        SELECT id_alumno, id_ciclo, curso
-        FROM sgi_alumnos
-        WHERE id_alumno = :id
-        LIMIT 1
-    """), {"id": id_alumno}).mappings().first()
-
-    if not alum:
+    if fila["id_alumno"] is None:
+        db.rollback()
         raise HTTPException(status_code=404, detail="Alumno no encontrado")
 
-    # 3) compatibilidad ciclo+curso
-    if int(alum["id_ciclo"]) != int(vac["id_ciclo"]) or int(alum["curso"]) != int(vac["curso"]):
+    # 2) compatibilidad ciclo+curso
+    if int(fila["alumno_id_ciclo"]) != int(fila["id_ciclo"]) or int(fila["alumno_curso"]) != int(fila["curso"]):
+        db.rollback()
         raise HTTPException(status_code=400, detail="El alumno no coincide en ciclo y/o curso con la vacante")
 
-    # 4) alumno ya asignado a otra vacante
-    ya = db.execute(text("""
-        SELECT id_vacante
-        FROM sgi_vacantes_x_alumnos
-        WHERE id_alumno = :id_alumno
-        LIMIT 1
-    """), {"id_alumno": id_alumno}).scalar()
+    # 3) alumno ya asignado a otra vacante. Lectura normal, sin bloqueo (un FOR UPDATE
+    #    sobre un id_alumno que no está en el índice cogería un hueco y dos altas a la
+    #    vez se interbloquearían en el INSERT). Como la fila del alumno ya está bloqueada,
+    #    otra asignación del mismo alumno ha terminado antes de esta lectura; si aun así
+    #    se cuela algo, UNIQUE(id_alumno) (sql/006) rechaza el INSERT.
+    if consultas.ejecutar(db, "vacantes_x_alumnos.de_alumno", {"id": id_alumno}).scalar():
+        db.rollback()
+        raise HTTPException(status_code=400, detail="El alumno ya está asignado a una vacante")
 
-    if ya:
+    # 4) capacidad: no superar num_vacantes
+    if int(fila["ocupadas"]) >= int(fila["num_vacantes"]):
+        db.rollback()
+        raise HTTPException(status_code=400, detail="No hay plazas disponibles en esta vacante")
+
+    # 5) insertar en tabla auxiliar y subir el contador
+    #    (misma transacción: se libera el bloqueo al hacer commit)
+    try:
+        consultas.ejecutar(db, "vacantes_x_alumnos.insertar", {"id_vacante": id_vacante, "id_alumno": id_alumno})
+        consultas.ejecutar(db, "vacantes.sumar_ocupadas", {"id_vacante": id_vacante, "n": 1})
+        db.commit()
+
+    except IntegrityError:
+        db.rollback()
         raise HTTPException(status_code=400, detail="El alumno ya está asignado a una vacante")
 
-    # 5) capacidad: no superar num_vacantes
-    ocupadas = db.execute(text("""
-        SELECT COUNT(*) 
-        FROM sgi_vacantes_x_alumnos
-        WHERE id_vacante = :id_vacante
-    """), {"id_vacante": id_vacante}).scalar()
+    return fila
 
-    if int(ocupadas) >= int(vac["num_vacantes"]):
-        raise HTTPException(status_code=400, detail="No hay plazas disponibles en esta vacante")
 
-    # 6) insertar en tabla auxiliar
-    db.execute(text("""
-        INSERT INTO sgi_vacantes_x_alumnos (id_vacante, id_alumno)
-        VALUES (:id_vacante, :id_alumno)
-    """), {"id_vacante": id_vacante, "id_alumno": id_alumno})
-    db.commit()
+@router.post("/{id_vacante}/alumnos/{id_alumno}")
+def asignar_alumno(
+    id_vacante: int,
+    id_alumno: int,
+    db: Session = Depends(get_db),
+    user=Depends(requiere_permiso(OPCION_MENU, "put")),
+):
+    try:
+        fila = _asignar(db, id_vacante, id_alumno)
+
+    except OperationalError as e:
+        db.rollback()
+        if not es_bloqueo(e):
+            raise
+        raise HTTPException(status_code=409, detail="Otra asignación ha bloqueado esta vacante; vuelve a intentarlo")
+
+    avisar_ocupacion(id_vacante, fila["num_vacantes"], int(fila["ocupadas"]) + 1)
+    auditoria.registrar(user, "asignar", "vacante", id_vacante, id_alumno=id_alumno)
 
     return {"ok": True, "message": "Alumno asignado a la vacante", "data": None}
 
@@ -248,28 +451,23 @@ def desasignar_alumno(
     id_vacante: int,
     id_alumno: int,
     db: Session = Depends(get_db),
-    user=Depends(require_token),
+    user=Depends(requiere_permiso(OPCION_MENU, "put")),
 ):
-    # 1) comprobar que la relación existe
-    rel = db.execute(text("""
-        SELECT id_vacante_x_alumno
-        FROM sgi_vacantes_x_alumnos
-        WHERE id_vacante = :id_vacante
-          AND id_alumno = :id_alumno
-        LIMIT 1
-    """), {"id_vacante": id_vacante, "id_alumno": id_alumno}).scalar()
-
-    if not rel:
+    # 1) borrar relación (si no borra nada, es que no existía)
+    borradas = consultas.ejecutar(db, "vacantes_x_alumnos.borrar", {"id_vacante": id_vacante, "id_alumno": id_alumno}).rowcount
+
+    if not borradas:
+        db.rollback()
         raise HTTPException(status_code=404, detail="El alumno no está asignado a esta vacante")
 
-    # 2) borrar relación
-    db.execute(text("""
-        DELETE FROM sgi_vacantes_x_alumnos
-        WHERE id_vacante = :id_vacante
-          AND id_alumno = :id_alumno
-    """), {"id_vacante": id_vacante, "id_alumno": id_alumno})
+    # 2) bajar el contador en la misma transacción
+    consultas.ejecutar(db, "vacantes.sumar_ocupadas", {"id_vacante": id_vacante, "n": -borradas})
+    ocupacion = consultas.ejecutar(db, "vacantes.ocupacion", {"id": id_vacante}).mappings().first()
     db.commit()
 
+    avisar_ocupacion(id_vacante, ocupacion["num_vacantes"], ocupacion["alumnos_asignados"])
+    auditoria.registrar(user, "desasignar", "vacante", id_vacante, id_alumno=id_alumno)
+
     return {"ok": True, "message": "Alumno desasignado de la vacante", "data": None}
 
 @router.put("/{id_vacante}")
@@ -277,48 +475,30 @@ def actualizar_vacante(
     id_vacante: int,
     payload: VacanteUpdate,
     db: Session = Depends(get_db),
-    user=Depends(require_token),
+    user=Depends(requiere_permiso(OPCION_MENU, "put")),
 ):
-    # 1) comprobar que existe
-    existe = db.execute(text("""
-        SELECT id_vacante
-        FROM sgi_vacantes
-        WHERE id_vacante = :id
-        LIMIT 1
-    """), {"id": id_vacante}).scalar()
+    # 1) comprobar que existe y leer los alumnos asignados (contador);
+    #    FOR UPDATE para que no entre una asignación mientras tanto
+    ocupadas = consultas.ejecutar(db, "vacantes.ocupadas_bloqueo", {"id": id_vacante}).scalar()
 
-    if not existe:
+    if ocupadas is None:
+        db.rollback()
         raise HTTPException(status_code=404, detail="Vacante no encontrada")
 
-    # 2) contar alumnos asignados
-    ocupadas = db.execute(text("""
-        SELECT COUNT(*)
-        FROM sgi_vacantes_x_alumnos
-        WHERE id_vacante = :id_vacante
-    """), {"id_vacante": id_vacante}).scalar()
-
-    # 3) regla: no bajar num_vacantes por debajo de ocupadas
+    # 2) regla: no bajar num_vacantes por debajo de ocupadas
     if int(payload.num_vacantes) < int(ocupadas):
+        db.rollback()
         raise HTTPException(
             status_code=400,
             detail=f"No se puede poner num_vacantes={payload.num_vacantes} porque ya hay {ocupadas} alumnos asignados"
         )
 
-    # 4) update (ojo con UNIQUE entidad+ciclo+curso)
+    # 3) update (ojo con UNIQUE entidad+ciclo+curso)
     try:
         params = payload.model_dump()
         params["id_vacante"] = id_vacante
 
-        db.execute(text("""
-            UPDATE sgi_vacantes
-            SET
-                id_entidad = :id_entidad,
-                id_ciclo = :id_ciclo,
-                curso = :curso,
-                num_vacantes = :num_vacantes,
-                observaciones = :observaciones
-            WHERE id_vacante = :id_vacante
-        """), params)
+        consultas.ejecutar(db, "vacantes.actualizar", params)
 
         db.commit()
 
@@ -330,43 +510,41 @@ def actualizar_vacante(
             "data": None
         }
 
+    difusor_vacantes.publicar("vacante_actualizada", {
+        **params,
+        "alumnos_asignados": int(ocupadas),
+        "vacantes_disponibles": int(payload.num_vacantes) - int(ocupadas),
+    })
+    auditoria.registrar(user, "actualizar", "vacante", id_vacante)
+
     return {"ok": True, "message": "Vacante actualizada", "data": None}
 
 @router.delete("/{id_vacante}")
 def borrar_vacante(
     id_vacante: int,
     db: Session = Depends(get_db),
-    user=Depends(require_token),
+    user=Depends(requiere_permiso(OPCION_MENU, "delete")),
 ):
-    # 1) comprobar que existe
-    existe = db.execute(text("""
-        SELECT id_vacante
-        FROM sgi_vacantes
-        WHERE id_vacante = :id
-        LIMIT 1
-    """), {"id": id_vacante}).scalar()
+    # 1) comprobar que existe y leer los alumnos asignados (contador)
+    ocupadas = consultas.ejecutar(db, "vacantes.ocupadas_bloqueo", {"id": id_vacante}).scalar()
 
-    if not existe:
+    if ocupadas is None:
+        db.rollback()
         raise HTTPException(status_code=404, detail="Vacante no encontrada")
 
     # 2) comprobar si tiene alumnos asignados
-    ocupadas = db.execute(text("""
-        SELECT COUNT(*)
-        FROM sgi_vacantes_x_alumnos
-        WHERE id_vacante = :id
-    """), {"id": id_vacante}).scalar()
-
     if int(ocupadas) > 0:
+        db.rollback()
         raise HTTPException(
             status_code=400,
             detail="No se puede borrar la vacante porque tiene alumnos asignados. Desasígnalos primero."
         )
 
     # 3) borrar vacante
-    db.execute(text("""
-        DELETE FROM sgi_vacantes
-        WHERE id_vacante = :id
-    """), {"id": id_vacante})
+    consultas.ejecutar(db, "vacantes.borrar", {"id": id_vacante})
     db.commit()
 
+    difusor_vacantes.publicar("vacante_borrada", {"id_vacante": id_vacante})
+    auditoria.registrar(user, "borrar", "vacante", id_vacante)
+
     return {"ok": True, "message": "Vacante eliminada", "data": None}
@@ -0,0 +1,23 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+class ContactoCreate(BaseModel):
+    nombre: Optional[str] = Field(default=None, max_length=50)
+    apellidos: str = Field(min_length=1, max_length=50)
+    id_entidad: int
+    cargo: Optional[str] = Field(default=None, max_length=100)
+    id_zona: Optional[int] = None
+    id_familia: Optional[int] = None
+
+    email: Optional[str] = Field(default=None, max_length=100)
+    corporativo_largo: Optional[str] = Field(default=None, max_length=15)
+    corporativo_corto: Optional[str] = Field(default=None, max_length=15)
+    telefono_personal: Optional[str] = Field(default=None, max_length=15)
+    direccion: Optional[str] = Field(default=None, max_length=100)
+    cp: Optional[str] = Field(default=None, max_length=10)
+    localidad: Optional[str] = Field(default=None, max_length=50)
+    id_provincia: Optional[int] = None
+    observaciones: Optional[str] = None
+
+class ContactoUpdate(ContactoCreate):
+    pass
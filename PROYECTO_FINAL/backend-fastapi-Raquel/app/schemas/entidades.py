@@ -0,0 +1,21 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+class EntidadCreate(BaseModel):
+    entidad: str = Field(min_length=1, max_length=50)
+    id_tipo_entidad: int
+    id_zona: int
+    id_contacto: Optional[int] = None
+    codigo: Optional[str] = Field(default=None, max_length=50)
+
+    direccion: Optional[str] = Field(default=None, max_length=100)
+    cp: Optional[str] = Field(default=None, max_length=10)
+    localidad: Optional[str] = Field(default=None, max_length=50)
+    id_provincia: Optional[int] = None
+    telefono: Optional[str] = Field(default=None, max_length=15)
+    email: Optional[str] = Field(default=None, max_length=100)
+    web: Optional[str] = Field(default=None, max_length=100)
+    observaciones: Optional[str] = None
+
+class EntidadUpdate(EntidadCreate):
+    pass
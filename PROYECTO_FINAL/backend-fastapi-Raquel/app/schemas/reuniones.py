@@ -0,0 +1,33 @@
+from datetime import date, time
+from typing import Optional
+
+from pydantic import BaseModel, Field, model_validator
+
+class ReunionCreate(BaseModel):
+    reunion: str = Field(min_length=1, max_length=100)
+    fecha: date
+    hora_inicio: time
+    hora_fin: time
+    id_zona: int
+    id_modo_reunion: int
+    id_motivo_reunion: int
+    id_contacto: Optional[int] = None
+    id_entidad_target: Optional[int] = None
+
+    objetivo: Optional[str] = None
+    resultado: Optional[str] = None
+    observaciones: Optional[str] = None
+    ubicacion: Optional[str] = Field(default=None, max_length=250)
+    localidad: str = Field(default="Málaga", max_length=50)
+
+    # ids de sgi_contactos (sgi_asistentes); en el PUT sustituyen a los que hubiera
+    asistentes: list[int] = Field(default_factory=list, max_length=200)
+
+    @model_validator(mode="after")
+    def horas_en_orden(self):
+        if self.hora_fin <= self.hora_inicio:
+            raise ValueError("hora_fin debe ser posterior a hora_inicio")
+        return self
+
+class ReunionUpdate(ReunionCreate):
+    pass
@@ -0,0 +1,14 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from app.core.config import USO_MAX_EVENTOS
+
+class UsoOpcion(BaseModel):
+    id_opcion_menu: int = Field(ge=1)
+    # cuándo se abrió en el cliente (si va en cola offline); si no, ahora
+    fecha: Optional[datetime] = None
+
+class UsoOpcionesLote(BaseModel):
+    eventos: list[UsoOpcion] = Field(min_length=1, max_length=USO_MAX_EVENTOS)
@@ -0,0 +1,63 @@
+"""
+Lanza EXPLAIN sobre todas las consultas del registro (app/db/consultas.py)
+y marca las que recorren tablas enteras sin que se espere o que no se pueden
+explicar (tabla o columna que no existe, SQL que no compila). Sale con código
+1 si hay alguna, para poder usarlo en CI tras una migración.
+
+    python -m app.scripts.explicar_consultas
+    python -m app.scripts.explicar_consultas --plan          # con el plan completo de cada una
+    python -m app.scripts.explicar_consultas --solo vacantes
+"""
+import argparse
+import sys
+
+# importa los routers: las consultas dinámicas se registran junto a su constructor
+import app.main  # noqa: F401
+from app.db.session import engine
+from app.db.consultas import revisar_planes
+from app.db import sqlite_compat
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="EXPLAIN de las consultas registradas")
+    parser.add_argument("--plan", action="store_true", help="mostrar el plan completo de cada consulta")
+    parser.add_argument("--solo", help="solo las consultas cuyo nombre empiece por esto")
+    args = parser.parse_args()
+
+    # con SQLite (el arnés de bench/): CONCAT, CONCAT_WS... como en los benchmarks
+    sqlite_compat.instalar(engine)
+    informe = revisar_planes(engine)
+    if args.solo:
+        informe = [r for r in informe if r["consulta"].startswith(args.solo)]
+
+    avisos = fallos = 0
+    for r in informe:
+        if "error" in r:
+            fallos += 1
+            print(f"???  {r['consulta']}: no se pudo explicar ({r['error']})")
+            continue
+        if r["aviso"]:
+            avisos += 1
+            estado = "SCAN"
+        elif r["escaneos"]:
+            estado = "ok* "  # recorrido completo esperado
+        else:
+            estado = "ok  "
+        tablas = f"  [{', '.join(r['escaneos'])}]" if r["escaneos"] else ""
+        print(f"{estado} {r['consulta']}{tablas}")
+        if args.plan:
+            for fila in r["plan"]:
+                print("       " + "  ".join(f"{k}={v}" for k, v in fila.items() if v is not None))
+
+    if fallos:
+        print(f"\n{fallos} consultas no se pudieron explicar")
+    if avisos:
+        print(f"\n{avisos} consultas recorren tablas enteras")
+    if fallos or avisos:
+        return 1
+    print("\nNinguna consulta recorre tablas enteras sin esperarlo")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Comprueba que el contador sgi_vacantes.alumnos_asignados coincide con las
+filas reales de sgi_vacantes_x_alumnos y, con --reparar, corrige las que no.
+
+    python -m app.scripts.reconciliar_ocupacion
+    python -m app.scripts.reconciliar_ocupacion --reparar
+"""
+import argparse
+import sys
+
+from sqlalchemy import text, bindparam
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+
+
+def buscar_descuadres(db: Session, bloquear: bool = False) -> list[dict]:
+    rows = db.execute(text(f"""
+        SELECT
+            v.id_vacante,
+            v.alumnos_asignados AS contador,
+            (SELECT COUNT(*)
+             FROM sgi_vacantes_x_alumnos x
+             WHERE x.id_vacante = v.id_vacante) AS reales
+        FROM sgi_vacantes v
+        {"FOR UPDATE" if bloquear else ""}
+    """)).mappings().all()
+
+    return [dict(r) for r in rows if int(r["contador"]) != int(r["reales"])]
+
+
+def reparar(db: Session) -> list[dict]:
+    """Recalcula el contador de las vacantes descuadradas (bloqueadas hasta el commit)."""
+    descuadres = buscar_descuadres(db, bloquear=True)
+
+    if descuadres:
+        db.execute(
+            text("""
+                UPDATE sgi_vacantes
+                SET alumnos_asignados = (
+                    SELECT COUNT(*)
+                    FROM sgi_vacantes_x_alumnos x
+                    WHERE x.id_vacante = sgi_vacantes.id_vacante
+                )
+                WHERE id_vacante IN :ids
+            """).bindparams(bindparam("ids", expanding=True)),
+            {"ids": [d["id_vacante"] for d in descuadres]},
+        )
+    db.commit()
+
+    return descuadres
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Reconciliar el contador de ocupación de las vacantes")
+    parser.add_argument("--reparar", action="store_true", help="corregir los contadores descuadrados")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        descuadres = reparar(db) if args.reparar else buscar_descuadres(db)
+    finally:
+        db.close()
+
+    for d in descuadres:
+        print(f"vacante {d['id_vacante']}: contador={d['contador']} reales={d['reales']}")
+
+    if not descuadres:
+        print("Todos los contadores cuadran")
+        return 0
+
+    if args.reparar:
+        print(f"{len(descuadres)} vacantes corregidas")
+        return 0
+
+    print(f"{len(descuadres)} vacantes descuadradas (usa --reparar para corregirlas)")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
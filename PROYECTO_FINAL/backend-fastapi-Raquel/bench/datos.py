@@ -0,0 +1,315 @@
+"""
+Generador de datos sintéticos para los benchmarks.
+
+Rellena catálogos, entidades, contactos, alumnos, vacantes, asignaciones y
+reuniones con sus asistentes respetando lo que exige app_radfpd.sql (NOT
+NULL, claves únicas, tipos de entidad) y lo que comprueban los routers: los
+alumnos van a centros de tipo CENTRO EDUCATIVO, las vacantes son de
+empresas, cada alumno está como mucho en una vacante de su mismo ciclo y
+curso, y alumnos_asignados cuadra con las asignaciones.
+
+Con la misma semilla sale siempre lo mismo.
+"""
+import random
+from datetime import date, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+# esquema para SQLite (en MySQL se usa el de app_radfpd.sql + sql/*.sql)
+ESQUEMA_SQLITE = """
+CREATE TABLE sgi_provincias (id_provincia INTEGER PRIMARY KEY, ine_provincia INT NOT NULL DEFAULT 0, siglas_provincia TEXT, provincia TEXT NOT NULL, observaciones TEXT);
+CREATE TABLE sgi_tipos_entidad (id_tipo_entidad INTEGER PRIMARY KEY, tipo_entidad TEXT NOT NULL, observaciones TEXT);
+CREATE TABLE sgi_zonas (id_zona INTEGER PRIMARY KEY, zona TEXT NOT NULL, id_provincia INT, observaciones TEXT);
+CREATE TABLE sgi_familias (id_familia INTEGER PRIMARY KEY, familia TEXT NOT NULL, observaciones TEXT);
+CREATE TABLE sgi_ciclos (id_ciclo INTEGER PRIMARY KEY, ciclo TEXT NOT NULL, cod_ciclo TEXT NOT NULL, id_nivel INT NOT NULL, id_familia INT NOT NULL, observaciones TEXT);
+CREATE TABLE sgi_entidades (id_entidad INTEGER PRIMARY KEY, entidad TEXT NOT NULL, id_zona INT NOT NULL, id_contacto INT, id_tipo_entidad INT NOT NULL, direccion TEXT, cp TEXT, localidad TEXT, id_provincia INT, telefono TEXT, email TEXT, web TEXT, codigo TEXT, observaciones TEXT);
+CREATE TABLE sgi_contactos (id_contacto INTEGER PRIMARY KEY AUTOINCREMENT, nombre TEXT NOT NULL, apellidos TEXT, email TEXT, corporativo_largo TEXT, corporativo_corto TEXT, telefono_personal TEXT, id_zona INT, id_entidad INT, cargo TEXT, id_familia INT, direccion TEXT, cp TEXT, localidad TEXT, id_provincia INT, observaciones TEXT);
+CREATE INDEX sgi_contactos_ibfk_2 ON sgi_contactos (id_entidad);
+CREATE TABLE sgi_motivos_nodual (id_motivo_nodual INTEGER PRIMARY KEY, id_tipo_entidad INT NOT NULL, motivo_nodual TEXT NOT NULL, observaciones TEXT);
+CREATE TABLE sgi_roles (id_rol INTEGER PRIMARY KEY, rol TEXT NOT NULL, id_opcion_menu INT, observaciones TEXT);
+CREATE TABLE sgi_usuarios (id_usuario INTEGER PRIMARY KEY, usuario TEXT NOT NULL, nombre_publico TEXT, pass_user TEXT NOT NULL, id_rol INT NOT NULL, habilitado INT NOT NULL DEFAULT 1, token_sesion TEXT UNIQUE, token_passwd TEXT, token_passwd_expira TEXT, observaciones TEXT);
+CREATE TABLE sgi_alumnos (id_alumno INTEGER PRIMARY KEY AUTOINCREMENT, nif_nie TEXT NOT NULL UNIQUE, nombre TEXT NOT NULL, apellidos TEXT NOT NULL, fecha_nacimiento DATE NOT NULL, id_entidad_centro INT NOT NULL, id_ciclo INT NOT NULL, curso INT NOT NULL, telefono TEXT NOT NULL, direccion TEXT, cp TEXT, localidad TEXT, id_provincia INT, observaciones TEXT);
+CREATE INDEX listado_orden ON sgi_alumnos (apellidos, nombre, id_alumno);
+CREATE INDEX ciclo_curso ON sgi_alumnos (id_ciclo, curso);
+CREATE TABLE sgi_vacantes (id_vacante INTEGER PRIMARY KEY AUTOINCREMENT, id_entidad INT NOT NULL, id_ciclo INT NOT NULL, curso INT NOT NULL, num_vacantes INT NOT NULL, alumnos_asignados INT NOT NULL DEFAULT 0, observaciones TEXT, UNIQUE (id_entidad, id_ciclo, curso));
+CREATE TABLE sgi_vacantes_x_alumnos (id_vacante_x_alumno INTEGER PRIMARY KEY AUTOINCREMENT, id_vacante INT NOT NULL, id_alumno INT NOT NULL UNIQUE);
+CREATE INDEX vxa_vacante ON sgi_vacantes_x_alumnos (id_vacante);
+CREATE INDEX vacantes_ciclo_curso ON sgi_vacantes (id_ciclo, curso);
+CREATE TABLE sgi_modos_reunion (id_modo_reunion INTEGER PRIMARY KEY, modo_reunion TEXT NOT NULL, observaciones TEXT);
+CREATE TABLE sgi_motivos_reunion (id_motivo_reunion INTEGER PRIMARY KEY, motivo_reunion TEXT NOT NULL, observaciones TEXT);
+CREATE TABLE sgi_reuniones (id_reunion INTEGER PRIMARY KEY AUTOINCREMENT, id_contacto INT, id_modo_reunion INT NOT NULL, id_motivo_reunion INT NOT NULL, id_entidad_target INT, id_zona INT NOT NULL, objetivo TEXT, resultado TEXT, observaciones TEXT, reunion TEXT NOT NULL, fecha DATE NOT NULL, hora_inicio TIME NOT NULL, hora_fin TIME NOT NULL, ubicacion TEXT, localidad TEXT NOT NULL DEFAULT 'Málaga');
+CREATE INDEX fecha_horas ON sgi_reuniones (fecha, hora_inicio, hora_fin);
+CREATE INDEX zona_fecha ON sgi_reuniones (id_zona, fecha, hora_inicio);
+CREATE TABLE sgi_asistentes (id_asistente INTEGER PRIMARY KEY AUTOINCREMENT, id_reunion INT NOT NULL, id_contacto INT NOT NULL, observaciones TEXT, UNIQUE (id_reunion, id_contacto));
+CREATE INDEX asistentes_contacto ON sgi_asistentes (id_contacto);
+CREATE TABLE sgi_grupos_menu (id_grupo_menu INTEGER PRIMARY KEY, grupo TEXT NOT NULL, orden INT NOT NULL, observaciones TEXT);
+CREATE TABLE sgi_opciones_menu (id_opcion_menu INTEGER PRIMARY KEY, opcion TEXT NOT NULL, accion TEXT NOT NULL, texto_tooltip TEXT, observaciones TEXT);
+CREATE TABLE sgi_rol_menu (id_rol_menu INTEGER PRIMARY KEY, id_opcion_menu INT, id_grupo_menu INT, id_rol INT, permiso_post INT NOT NULL DEFAULT 0, permiso_put INT NOT NULL DEFAULT 0, permiso_delete INT NOT NULL DEFAULT 0, observaciones TEXT);
+CREATE VIEW sgi_vista_rol_menu AS
+SELECT rm.id_rol_menu, rm.id_opcion_menu, rm.id_grupo_menu, rm.id_rol, rm.observaciones,
+    op.opcion, op.accion, op.texto_tooltip, gp.grupo, pr.rol, gp.orden,
+    CASE WHEN pr.rol = 'Superadmin' THEN 1 ELSE rm.permiso_post END AS permiso_post,
+    CASE WHEN pr.rol = 'Superadmin' THEN 1 ELSE rm.permiso_put END AS permiso_put,
+    CASE WHEN pr.rol = 'Superadmin' THEN 1 ELSE rm.permiso_delete END AS permiso_delete
+FROM sgi_rol_menu rm
+JOIN sgi_opciones_menu op ON op.id_opcion_menu = rm.id_opcion_menu
+JOIN sgi_grupos_menu gp ON gp.id_grupo_menu = rm.id_grupo_menu
+JOIN sgi_roles pr ON pr.id_rol = rm.id_rol;
+CREATE TABLE sgi_historico_opciones (id_historial INTEGER PRIMARY KEY AUTOINCREMENT, id_opcion_menu INT, id_usuario INT, fecha TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP, observaciones TEXT, UNIQUE (id_opcion_menu, id_usuario, fecha));
+"""
+
+# en orden de borrado (hijas primero)
+TABLAS = (
+    "sgi_asistentes", "sgi_reuniones", "sgi_motivos_reunion", "sgi_modos_reunion",
+    "sgi_vacantes_x_alumnos", "sgi_vacantes", "sgi_alumnos", "sgi_usuarios", "sgi_roles",
+    "sgi_motivos_nodual", "sgi_contactos", "sgi_entidades", "sgi_ciclos", "sgi_familias",
+    "sgi_zonas", "sgi_tipos_entidad", "sgi_provincias",
+)
+
+# menú, permisos por rol (app/core/permisos.py) y su uso (app/core/uso_opciones.py):
+# en MySQL ya están en app_radfpd.sql + sql/005 y no se tocan; en SQLite se crean
+TABLAS_MENU = ("sgi_historico_opciones", "sgi_rol_menu", "sgi_opciones_menu", "sgi_grupos_menu")
+
+TOKEN_BENCH = "bench-token"
+
+PROVINCIAS = ["Almería", "Cádiz", "Córdoba", "Granada", "Huelva", "Jaén", "Málaga", "Sevilla"]
+TIPOS_ENTIDAD = [(1, "Centro Educativo"), (2, "Empresa Privada"), (3, "Administración Pública")]
+CICLOS = [
+    ("Sistemas Microinformáticos y Redes", "SMR", 2), ("Desarrollo de Aplicaciones Web", "DAW", 3),
+    ("Desarrollo de Aplicaciones Multiplataforma", "DAM", 3), ("Administración de Sistemas Informáticos en Red", "ASIR", 3),
+    ("Gestión Administrativa", "GA", 2), ("Administración y Finanzas", "AF", 3),
+    ("Cuidados Auxiliares de Enfermería", "CAE", 2), ("Electromecánica de Vehículos", "EMV", 2),
+    ("Cocina y Gastronomía", "CyG", 2), ("Marketing y Publicidad", "MyP", 3),
+    ("Comercio Internacional", "CI", 3), ("Automatización y Robótica Industrial", "ARI", 3),
+]
+NOMBRES = ["Lucía", "Hugo", "Martina", "Daniel", "Sofía", "Pablo", "Julia", "Álvaro", "Paula", "Adrián",
+           "Carmen", "David", "Irene", "Javier", "Elena", "Manuel", "Marta", "Sergio", "Noelia", "Raúl"]
+APELLIDOS = ["García", "Fernández", "González", "Rodríguez", "López", "Martínez", "Sánchez", "Pérez",
+             "Gómez", "Martín", "Jiménez", "Ruiz", "Hernández", "Díaz", "Moreno", "Muñoz", "Álvarez",
+             "Romero", "Navarro", "Torres", "Domínguez", "Vázquez", "Ramos", "Gil", "Serrano"]
+LETRAS_NIF = "TRWAGMYFPDXBNJZSQVHLCKE"
+MODOS_REUNION = ["Presencial", "Telemática"]
+MOTIVOS_REUNION = ["Prospección", "Organización", "Seguimiento", "Evaluación"]
+# las reuniones caen en días laborables de un curso escolar (septiembre a junio)
+INICIO_REUNIONES = date(2025, 9, 1)
+DIAS_REUNIONES = 300
+
+LOTE = 5000
+
+
+def crear_esquema_sqlite(engine: Engine) -> None:
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP VIEW IF EXISTS sgi_vista_rol_menu")
+        for tabla in TABLAS + TABLAS_MENU:
+            conn.exec_driver_sql(f"DROP TABLE IF EXISTS {tabla}")
+        for sentencia in ESQUEMA_SQLITE.strip().split(";"):
+            if sentencia.strip():
+                conn.exec_driver_sql(sentencia)
+
+
+def _insertar(conn, tabla: str, filas: list[dict]) -> None:
+    if not filas:
+        return
+    columnas = list(filas[0])
+    sql = text(f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES ({', '.join(':' + c for c in columnas)})")
+    for i in range(0, len(filas), LOTE):
+        conn.execute(sql, filas[i:i + LOTE])
+
+
+def generar(engine: Engine, alumnos: int = 1000, semilla: int = 42) -> dict:
+    """Borra las tablas del benchmark y las llena. Devuelve cuántas filas hay de cada cosa."""
+    rnd = random.Random(semilla)
+
+    if engine.dialect.name == "sqlite":
+        crear_esquema_sqlite(engine)
+
+    provincias = [{"id_provincia": i, "provincia": p} for i, p in enumerate(PROVINCIAS, 1)]
+    zonas = [
+        {"id_zona": (p - 1) * 2 + z, "zona": f"CEP {PROVINCIAS[p - 1]} {z}", "id_provincia": p}
+        for p in range(1, len(PROVINCIAS) + 1) for z in (1, 2)
+    ]
+    ciclos = [
+        {"id_ciclo": i, "ciclo": c, "cod_ciclo": cod, "id_nivel": nivel, "id_familia": 1}
+        for i, (c, cod, nivel) in enumerate(CICLOS, 1)
+    ]
+
+    n_centros = max(10, alumnos // 100)
+    n_empresas = max(20, alumnos // 20)
+    entidades = []
+    for i in range(1, n_centros + n_empresas + 1):
+        zona = rnd.choice(zonas)
+        es_centro = i <= n_centros
+        entidades.append({
+            "id_entidad": i,
+            "entidad": f"IES Bench {i}" if es_centro else f"Empresa Bench {i}",
+            "id_zona": zona["id_zona"],
+            "id_tipo_entidad": 1 if es_centro else rnd.choice((2, 2, 2, 3)),
+            "id_provincia": zona["id_provincia"],
+            "localidad": PROVINCIAS[zona["id_provincia"] - 1],
+        })
+    centros = entidades[:n_centros]
+    empresas = entidades[n_centros:]
+
+    filas_alumnos = []
+    inicio = date(2000, 1, 1)
+    for i in range(1, alumnos + 1):
+        centro = rnd.choice(centros)
+        filas_alumnos.append({
+            "id_alumno": i,
+            "nif_nie": f"{i:08d}{LETRAS_NIF[i % 23]}",
+            "nombre": rnd.choice(NOMBRES),
+            "apellidos": f"{rnd.choice(APELLIDOS)} {rnd.choice(APELLIDOS)}",
+            "fecha_nacimiento": inicio + timedelta(days=rnd.randrange(2500)),
+            "id_entidad_centro": centro["id_entidad"],
+            "id_ciclo": rnd.randrange(1, len(CICLOS) + 1),
+            "curso": rnd.choice((1, 2)),
+            "telefono": f"6{rnd.randrange(10**8):08d}",
+            "localidad": centro["localidad"],
+            "id_provincia": centro["id_provincia"] if rnd.random() < 0.9 else rnd.randrange(1, len(PROVINCIAS) + 1),
+        })
+
+    # ~0,6 plazas por alumno repartidas en vacantes de 1 a 5 plazas
+    vacantes = []
+    usadas = set()
+    plazas = 0
+    while plazas < alumnos * 0.6:
+        clave = (rnd.choice(empresas)["id_entidad"], rnd.randrange(1, len(CICLOS) + 1), rnd.choice((1, 2)))
+        if clave in usadas:
+            continue
+        usadas.add(clave)
+        num = rnd.randrange(1, 6)
+        plazas += num
+        vacantes.append({
+            "id_vacante": len(vacantes) + 1,
+            "id_entidad": clave[0], "id_ciclo": clave[1], "curso": clave[2],
+            "num_vacantes": num, "alumnos_asignados": 0,
+        })
+
+    # se ocupa más o menos la mitad de las plazas con alumnos del mismo ciclo y curso
+    por_grupo: dict[tuple[int, int], list[dict]] = {}
+    for a in filas_alumnos:
+        por_grupo.setdefault((a["id_ciclo"], a["curso"]), []).append(a)
+    for grupo in por_grupo.values():
+        rnd.shuffle(grupo)
+
+    asignaciones = []
+    for v in vacantes:
+        libres = por_grupo.get((v["id_ciclo"], v["curso"]), [])
+        for _ in range(rnd.randrange(v["num_vacantes"] + 1)):
+            if not libres:
+                break
+            asignaciones.append({"id_vacante": v["id_vacante"], "id_alumno": libres.pop()["id_alumno"]})
+            v["alumnos_asignados"] += 1
+
+    # contactos y reuniones van después de lo demás: así los alumnos y vacantes
+    # de una semilla no cambian respecto a las pasadas guardadas con --baseline
+    # dos contactos por entidad, de la zona y provincia de su entidad
+    contactos = []
+    for e in entidades:
+        for _ in range(2):
+            contactos.append({
+                "id_contacto": len(contactos) + 1,
+                "nombre": rnd.choice(NOMBRES),
+                "apellidos": f"{rnd.choice(APELLIDOS)} {rnd.choice(APELLIDOS)}",
+                "id_zona": e["id_zona"],
+                "id_entidad": e["id_entidad"],
+                "id_familia": 1,
+                "localidad": e["localidad"],
+                "id_provincia": e["id_provincia"],
+            })
+
+    # una reunión por cada dos alumnos en el curso (unas 5.000 al mes con 100.000),
+    # con el contacto de una entidad de su zona y de 0 a 3 asistentes más. Se dan
+    # de alta por orden de fecha, como en la aplicación: las de un mes quedan juntas
+    laborables = [
+        d for d in (INICIO_REUNIONES + timedelta(days=n) for n in range(DIAS_REUNIONES))
+        if d.weekday() < 5
+    ]
+    reuniones = []
+    for _ in range(alumnos // 2):
+        contacto = rnd.choice(contactos)
+        inicio_min = rnd.randrange(8 * 60, 14 * 60, 30)
+        fin_min = inicio_min + rnd.choice((30, 60, 90, 120))
+        otros = {c["id_contacto"] for c in rnd.sample(contactos, rnd.randrange(4))} - {contacto["id_contacto"]}
+        reuniones.append(({
+            "fecha": rnd.choice(laborables),
+            "hora_inicio": f"{inicio_min // 60:02d}:{inicio_min % 60:02d}:00",
+            "hora_fin": f"{fin_min // 60:02d}:{fin_min % 60:02d}:00",
+            "id_zona": contacto["id_zona"],
+            "id_modo_reunion": rnd.randrange(1, len(MODOS_REUNION) + 1),
+            "id_motivo_reunion": rnd.randrange(1, len(MOTIVOS_REUNION) + 1),
+            "id_contacto": contacto["id_contacto"],
+            "id_entidad_target": contacto["id_entidad"],
+            "localidad": contacto["localidad"],
+        }, sorted(otros)))
+    reuniones.sort(key=lambda r: (r[0]["fecha"], r[0]["hora_inicio"]))
+
+    asistentes = []
+    for i, (r, otros) in enumerate(reuniones, 1):
+        r["id_reunion"] = i
+        r["reunion"] = f"Reunión Bench {i}"
+        asistentes.extend({"id_reunion": i, "id_contacto": c} for c in otros)
+    reuniones = [r for r, _ in reuniones]
+
+    with engine.begin() as conn:
+        if engine.dialect.name == "mysql":
+            # niveles, opciones de menú, unidades... no se tocan: que no molesten las FK
+            conn.execute(text("SET FOREIGN_KEY_CHECKS = 0"))
+
+        for tabla in TABLAS:
+            conn.execute(text(f"DELETE FROM {tabla}"))
+
+        _insertar(conn, "sgi_provincias", provincias)
+        _insertar(conn, "sgi_tipos_entidad", [{"id_tipo_entidad": i, "tipo_entidad": t} for i, t in TIPOS_ENTIDAD])
+        _insertar(conn, "sgi_zonas", zonas)
+        _insertar(conn, "sgi_familias", [{"id_familia": 1, "familia": "Familia Bench"}])
+        _insertar(conn, "sgi_ciclos", ciclos)
+        _insertar(conn, "sgi_entidades", entidades)
+        _insertar(conn, "sgi_contactos", contactos)
+        _insertar(conn, "sgi_motivos_nodual", [
+            {"id_motivo_nodual": i, "id_tipo_entidad": t, "motivo_nodual": f"Motivo {i}"}
+            for i, (t, _) in enumerate(TIPOS_ENTIDAD, 1)
+        ])
+        _insertar(conn, "sgi_roles", [{"id_rol": 1, "rol": "Superadmin"}])
+        _insertar(conn, "sgi_usuarios", [{
+            "id_usuario": 1, "usuario": "bench", "pass_user": "x", "id_rol": 1, "token_sesion": TOKEN_BENCH,
+        }])
+        if engine.dialect.name == "sqlite":
+            # como sql/005: opciones de alumnos y vacantes en "FP Dual", con todo para Superadmin
+            _insertar(conn, "sgi_grupos_menu", [{"id_grupo_menu": 1, "grupo": "FP Dual", "orden": 1}])
+            _insertar(conn, "sgi_opciones_menu", [
+                {"id_opcion_menu": 1, "opcion": "Alumnos", "accion": "alumnos", "texto_tooltip": "Alumnos de FP Dual"},
+                {"id_opcion_menu": 2, "opcion": "Vacantes", "accion": "vacantes",
+                 "texto_tooltip": "Vacantes de FP Dual en empresas"},
+            ])
+            _insertar(conn, "sgi_rol_menu", [
+                {"id_opcion_menu": o, "id_grupo_menu": 1, "id_rol": 1,
+                 "permiso_post": 1, "permiso_put": 1, "permiso_delete": 1}
+                for o in (1, 2)
+            ])
+        _insertar(conn, "sgi_alumnos", filas_alumnos)
+        _insertar(conn, "sgi_vacantes", vacantes)
+        _insertar(conn, "sgi_vacantes_x_alumnos", asignaciones)
+        _insertar(conn, "sgi_modos_reunion", [
+            {"id_modo_reunion": i, "modo_reunion": m} for i, m in enumerate(MODOS_REUNION, 1)
+        ])
+        _insertar(conn, "sgi_motivos_reunion", [
+            {"id_motivo_reunion": i, "motivo_reunion": m} for i, m in enumerate(MOTIVOS_REUNION, 1)
+        ])
+        _insertar(conn, "sgi_reuniones", reuniones)
+        _insertar(conn, "sgi_asistentes", asistentes)
+
+        if engine.dialect.name == "mysql":
+            conn.execute(text("SET FOREIGN_KEY_CHECKS = 1"))
+
+    return {
+        "alumnos": len(filas_alumnos),
+        "entidades": len(entidades),
+        "contactos": len(contactos),
+        "vacantes": len(vacantes),
+        "plazas": plazas,
+        "asignaciones": len(asignaciones),
+        "reuniones": len(reuniones),
+        "asistentes": len(asistentes),
+    }
@@ -0,0 +1,329 @@
+"""
+Qué se mide: una función por escenario que hace una "operación" (una o varias
+peticiones) con el índice `i` de la iteración. Cada petición se apunta con la
+etiqueta "MÉTODO /plantilla", igual que salen las rutas en /metrics.
+
+Los escenarios que escriben dejan la BD como estaba (crean y borran, asignan y
+desasignan) para que se puedan repetir las pasadas sin regenerar los datos.
+"""
+import asyncio
+import calendar
+import json
+import random
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+import httpx
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from bench.datos import APELLIDOS, NOMBRES, TOKEN_BENCH, INICIO_REUNIONES, DIAS_REUNIONES
+
+_SQL_EN_SERVER_TIMING = re.compile(r'db;dur=[\d.]+;desc="(\d+) sql"')
+
+
+@dataclass
+class Muestra:
+    segundos: float
+    sentencias: int
+    status: int
+
+
+@dataclass
+class Contexto:
+    """Ids reales sacados de la BD al empezar, para construir las URLs."""
+    alumnos: list[int]
+    vacantes: list[int]
+    centros: list[int]
+    empresas: list[int]
+    ciclos: list[int]
+    zonas: list[int]
+    # (id_vacante, id_alumno) con plaza libre y mismo ciclo/curso, para asignar y desasignar
+    parejas_libres: list[tuple[int, int]]
+    # (id_entidad, id_ciclo, curso) que no tienen vacante todavía
+    claves_vacante_libres: list[tuple[int, int, int]]
+    engine: Engine
+    muestras: dict[str, list[Muestra]] = field(default_factory=dict)
+
+
+def cargar_contexto(engine: Engine, semilla: int = 42) -> Contexto:
+    rnd = random.Random(semilla)
+    with engine.connect() as conn:
+        alumnos = list(conn.execute(text("SELECT id_alumno FROM sgi_alumnos ORDER BY id_alumno")).scalars())
+        vacantes = list(conn.execute(text("SELECT id_vacante FROM sgi_vacantes ORDER BY id_vacante")).scalars())
+        entidades = conn.execute(text("""
+            SELECT e.id_entidad, UPPER(t.tipo_entidad) AS tipo
+            FROM sgi_entidades e
+            JOIN sgi_tipos_entidad t ON t.id_tipo_entidad = e.id_tipo_entidad
+            ORDER BY e.id_entidad
+        """)).all()
+        ciclos = list(conn.execute(text("SELECT id_ciclo FROM sgi_ciclos ORDER BY id_ciclo")).scalars())
+        zonas = list(conn.execute(text("SELECT id_zona FROM sgi_zonas ORDER BY id_zona")).scalars())
+        libres = conn.execute(text("""
+            SELECT v.id_vacante, v.id_ciclo, v.curso
+            FROM sgi_vacantes v
+            WHERE v.num_vacantes > v.alumnos_asignados
+            ORDER BY v.id_vacante
+        """)).all()
+        sin_vacante = conn.execute(text("""
+            SELECT a.id_alumno, a.id_ciclo, a.curso
+            FROM sgi_alumnos a
+            LEFT JOIN sgi_vacantes_x_alumnos x ON x.id_alumno = a.id_alumno
+            WHERE x.id_alumno IS NULL
+            ORDER BY a.id_alumno
+        """)).all()
+        usadas = set(conn.execute(text("SELECT id_entidad, id_ciclo, curso FROM sgi_vacantes")).tuples())
+
+    centros = [e for e, t in entidades if t == "CENTRO EDUCATIVO"]
+    empresas = [e for e, t in entidades if t != "CENTRO EDUCATIVO"]
+
+    # cada vacante con plaza libre con un alumno sin vacante de su grupo, sin repetir
+    # ni vacante ni alumno: dos operaciones concurrentes no se pisan
+    sin_vacante_por_grupo: dict[tuple[int, int], list[int]] = {}
+    for a, c, k in sin_vacante:
+        sin_vacante_por_grupo.setdefault((c, k), []).append(a)
+    parejas = []
+    for id_vacante, id_ciclo, curso in libres:
+        candidatos = sin_vacante_por_grupo.get((id_ciclo, curso))
+        if candidatos:
+            parejas.append((id_vacante, candidatos.pop()))
+
+    claves = [(e, c, k) for e in empresas[:50] for c in ciclos for k in (1, 2) if (e, c, k) not in usadas]
+    rnd.shuffle(claves)
+
+    return Contexto(
+        alumnos=alumnos, vacantes=vacantes, centros=centros, empresas=empresas, ciclos=ciclos, zonas=zonas,
+        parejas_libres=parejas, claves_vacante_libres=claves, engine=engine,
+    )
+
+
+class Cliente:
+    """httpx.AsyncClient que apunta tiempo, nº de sentencias (Server-Timing) y status."""
+
+    def __init__(self, http: httpx.AsyncClient, ctx: Contexto):
+        self.http = http
+        self.ctx = ctx
+
+    async def pedir(self, etiqueta: str, metodo: str, url: str, **kwargs) -> httpx.Response:
+        headers = {"Authorization": f"Bearer {TOKEN_BENCH}", **kwargs.pop("headers", {})}
+        t0 = time.perf_counter()
+        r = await self.http.request(metodo, url, headers=headers, **kwargs)
+        segundos = time.perf_counter() - t0
+
+        m = _SQL_EN_SERVER_TIMING.search(r.headers.get("server-timing", ""))
+        muestra = Muestra(segundos, int(m.group(1)) if m else -1, r.status_code)
+        self.ctx.muestras.setdefault(etiqueta, []).append(muestra)
+        return r
+
+
+def _id_alumno_por_nif(engine: Engine, nif: str) -> int | None:
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT id_alumno FROM sgi_alumnos WHERE nif_nie = :n"), {"n": nif}).scalar()
+
+
+def _id_vacante_por_clave(engine: Engine, datos: dict) -> int | None:
+    with engine.connect() as conn:
+        return conn.execute(text("""
+            SELECT id_vacante FROM sgi_vacantes
+            WHERE id_entidad = :id_entidad AND id_ciclo = :id_ciclo AND curso = :curso
+        """), datos).scalar()
+
+
+def _borrar_alumnos_bulk(engine: Engine, prefijo: str) -> None:
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM sgi_alumnos WHERE nif_nie LIKE :p"), {"p": f"{prefijo}%"})
+
+
+def _elegir(lista: list, i: int):
+    return lista[(i * 7919) % len(lista)]
+
+
+# nombre -> (función, peso). peso < 1 = menos vueltas (exportaciones, bulk, reparto)
+ESCENARIOS = {}
+
+
+def escenario(nombre: str, peso: float = 1.0):
+    def registrar(fn):
+        ESCENARIOS[nombre] = (fn, peso)
+        return fn
+    return registrar
+
+
+@escenario("health")
+async def _health(c: Cliente, i: int):
+    await c.pedir("GET /health", "GET", "/health")
+    await c.pedir("GET /health/db", "GET", "/health/db")
+    await c.pedir("GET /private/whoami", "GET", "/private/whoami")
+
+
+@escenario("catalogos")
+async def _catalogos(c: Cliente, i: int):
+    for nombre in ("provincias", "ciclos", "centros", "entidades", "zonas", "tipos-entidad", "all"):
+        r = await c.pedir(f"GET /catalogos/{nombre}", "GET", f"/catalogos/{nombre}")
+    # lo normal en el frontend: ya tiene la versión y recibe un 304
+    await c.pedir("GET /catalogos/all (304)", "GET", "/catalogos/all", headers={"If-None-Match": r.headers["etag"]})
+
+
+@escenario("alumnos-listado")
+async def _alumnos_listado(c: Cliente, i: int):
+    await c.pedir("GET /alumnos", "GET", "/alumnos")
+    r = await c.pedir("GET /alumnos?limit=50", "GET", "/alumnos", params={"limit": 50})
+    cursor = r.json().get("next_cursor")
+    if cursor:
+        await c.pedir("GET /alumnos?limit=50&cursor", "GET", "/alumnos", params={"limit": 50, "cursor": cursor})
+    await c.pedir("GET /alumnos?id_ciclo&curso", "GET", "/alumnos", params={
+        "id_ciclo": _elegir(c.ctx.ciclos, i), "curso": 1 + i % 2, "limit": 100,
+    })
+    await c.pedir("GET /alumnos?fields", "GET", "/alumnos", params={
+        "fields": "id_alumno,nombre,apellidos,nif_nie", "limit": 200,
+    })
+
+
+@escenario("alumnos-detalle")
+async def _alumnos_detalle(c: Cliente, i: int):
+    await c.pedir("GET /alumnos/{id_alumno}", "GET", f"/alumnos/{_elegir(c.ctx.alumnos, i)}")
+
+
+@escenario("alumnos-buscar")
+async def _alumnos_buscar(c: Cliente, i: int):
+    await c.pedir("GET /alumnos/buscar?q", "GET", "/alumnos/buscar", params={
+        "q": f"{_elegir(NOMBRES, i)} {_elegir(APELLIDOS, i)}",
+    })
+    # con una errata y filtrando por ciclo/curso
+    await c.pedir("GET /alumnos/buscar?q&id_ciclo&curso", "GET", "/alumnos/buscar", params={
+        "q": _elegir(APELLIDOS, i)[:-1] + "x", "id_ciclo": _elegir(c.ctx.ciclos, i), "curso": 1 + i % 2,
+    })
+
+
+@escenario("alumnos-export", peso=0.05)
+async def _alumnos_export(c: Cliente, i: int):
+    await c.pedir("GET /alumnos/export?formato=csv", "GET", "/alumnos/export", params={"formato": "csv"})
+    await c.pedir("GET /alumnos/export?formato=ndjson", "GET", "/alumnos/export", params={"formato": "ndjson"})
+
+
+def _alumno_nuevo(c: Cliente, nif: str, i: int) -> dict:
+    return {
+        "nif_nie": nif,
+        "nombre": "Bench",
+        "apellidos": f"Escritura {i}",
+        "fecha_nacimiento": "2004-01-01",
+        "id_entidad_centro": _elegir(c.ctx.centros, i),
+        "id_ciclo": _elegir(c.ctx.ciclos, i),
+        "curso": 1 + i % 2,
+        "telefono": "600000000",
+    }
+
+
+@escenario("alumnos-escritura")
+async def _alumnos_escritura(c: Cliente, i: int):
+    nif = f"BW{i:09d}"
+    await c.pedir("POST /alumnos", "POST", "/alumnos", json=_alumno_nuevo(c, nif, i))
+    # lo que no se mide va a un hilo, para no frenar las peticiones en vuelo
+    id_alumno = await asyncio.to_thread(_id_alumno_por_nif, c.ctx.engine, nif)
+    if id_alumno is None:
+        return
+    datos = _alumno_nuevo(c, nif, i) | {"observaciones": "actualizado"}
+    await c.pedir("PUT /alumnos/{id_alumno}", "PUT", f"/alumnos/{id_alumno}", json=datos)
+    await c.pedir("DELETE /alumnos/{id_alumno}", "DELETE", f"/alumnos/{id_alumno}")
+
+
+@escenario("alumnos-bulk", peso=0.1)
+async def _alumnos_bulk(c: Cliente, i: int):
+    filas = [_alumno_nuevo(c, f"BK{i:05d}{j:04d}", j) for j in range(100)]
+    await c.pedir("POST /alumnos/bulk (100)", "POST", "/alumnos/bulk", content=json.dumps(filas),
+                  headers={"Content-Type": "application/json"})
+    await asyncio.to_thread(_borrar_alumnos_bulk, c.ctx.engine, f"BK{i:05d}")
+
+
+@escenario("vacantes-listado")
+async def _vacantes_listado(c: Cliente, i: int):
+    await c.pedir("GET /vacantes", "GET", "/vacantes")
+    await c.pedir("GET /vacantes?incluir_alumnos", "GET", "/vacantes", params={"incluir_alumnos": "true"})
+    await c.pedir("GET /vacantes?id_ciclo&curso", "GET", "/vacantes", params={
+        "id_ciclo": _elegir(c.ctx.ciclos, i), "curso": 1 + i % 2,
+    })
+
+
+@escenario("vacantes-detalle")
+async def _vacantes_detalle(c: Cliente, i: int):
+    id_vacante = _elegir(c.ctx.vacantes, i)
+    await c.pedir("GET /vacantes/{id_vacante}", "GET", f"/vacantes/{id_vacante}")
+    await c.pedir("GET /vacantes/{id_vacante}/alumnos", "GET", f"/vacantes/{id_vacante}/alumnos")
+    await c.pedir("GET /vacantes/{id_vacante}/alumnos-disponibles", "GET", f"/vacantes/{id_vacante}/alumnos-disponibles")
+
+
+@escenario("vacantes-export", peso=0.05)
+async def _vacantes_export(c: Cliente, i: int):
+    await c.pedir("GET /vacantes/export?formato=csv", "GET", "/vacantes/export", params={"formato": "csv"})
+
+
+@escenario("vacantes-asignacion")
+async def _vacantes_asignacion(c: Cliente, i: int):
+    if not c.ctx.parejas_libres:
+        return
+    id_vacante, id_alumno = c.ctx.parejas_libres[i % len(c.ctx.parejas_libres)]
+    url = f"/vacantes/{id_vacante}/alumnos/{id_alumno}"
+    await c.pedir("POST /vacantes/{id_vacante}/alumnos/{id_alumno}", "POST", url)
+    await c.pedir("DELETE /vacantes/{id_vacante}/alumnos/{id_alumno}", "DELETE", url)
+
+
+@escenario("vacantes-escritura")
+async def _vacantes_escritura(c: Cliente, i: int):
+    if not c.ctx.claves_vacante_libres:
+        return
+    id_entidad, id_ciclo, curso = c.ctx.claves_vacante_libres[i % len(c.ctx.claves_vacante_libres)]
+    datos = {"id_entidad": id_entidad, "id_ciclo": id_ciclo, "curso": curso, "num_vacantes": 2}
+    await c.pedir("POST /vacantes", "POST", "/vacantes", json=datos)
+    id_vacante = await asyncio.to_thread(_id_vacante_por_clave, c.ctx.engine, datos)
+    if id_vacante is None:
+        return
+    await c.pedir("PUT /vacantes/{id_vacante}", "PUT", f"/vacantes/{id_vacante}", json=datos | {"num_vacantes": 3})
+    await c.pedir("DELETE /vacantes/{id_vacante}", "DELETE", f"/vacantes/{id_vacante}")
+
+
+@escenario("vacantes-reparto", peso=0.1)
+async def _vacantes_reparto(c: Cliente, i: int):
+    await c.pedir("POST /vacantes/asignacion-automatica?dry_run", "POST", "/vacantes/asignacion-automatica",
+                  params={"dry_run": "true"})
+
+
+@escenario("entidades-contactos")
+async def _entidades_contactos(c: Cliente, i: int):
+    # lo que pide el lateral de facetas: listado entero, marcar valores, buscar y pasar de página
+    await c.pedir("GET /entidades", "GET", "/entidades")
+    await c.pedir("GET /entidades?id_zona (2)", "GET", "/entidades", params={
+        "id_zona": [_elegir(c.ctx.zonas, i), _elegir(c.ctx.zonas, i + 1)],
+    })
+    await c.pedir("GET /entidades?q&offset", "GET", "/entidades", params={"q": "a", "limit": 10, "offset": 10})
+    await c.pedir("GET /contactos", "GET", "/contactos")
+    await c.pedir("GET /contactos?id_zona&q", "GET", "/contactos", params={
+        "id_zona": _elegir(c.ctx.zonas, i), "q": _elegir(APELLIDOS, i)[:3],
+    })
+
+
+def _mes_reuniones(i: int) -> tuple[date, date]:
+    """Primer y último día de uno de los meses del curso que tiene reuniones."""
+    fin = INICIO_REUNIONES + timedelta(days=DIAS_REUNIONES - 1)
+    meses = (fin.year - INICIO_REUNIONES.year) * 12 + fin.month - INICIO_REUNIONES.month + 1
+    n = INICIO_REUNIONES.month - 1 + i % meses
+    anio, mes = INICIO_REUNIONES.year + n // 12, n % 12 + 1
+    return date(anio, mes, 1), date(anio, mes, calendar.monthrange(anio, mes)[1])
+
+
+@escenario("reuniones")
+async def _reuniones(c: Cliente, i: int):
+    # la vista de mes del calendario: todas las reuniones del mes con sus asistentes
+    desde, hasta = _mes_reuniones(i)
+    params = {"desde": desde.isoformat(), "hasta": hasta.isoformat()}
+    await c.pedir("GET /reuniones?desde&hasta (mes)", "GET", "/reuniones", params=params)
+    await c.pedir("GET /reuniones?desde&hasta&incluir_solapes (mes)", "GET", "/reuniones",
+                  params=params | {"incluir_solapes": "true"})
+    await c.pedir("GET /reuniones?desde&hasta&id_zona (mes)", "GET", "/reuniones",
+                  params=params | {"id_zona": _elegir(c.ctx.zonas, i)})
+
+
+@escenario("metrics", peso=0.1)
+async def _metrics(c: Cliente, i: int):
+    await c.pedir("GET /metrics", "GET", "/metrics")
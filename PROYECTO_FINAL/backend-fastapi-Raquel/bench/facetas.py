@@ -0,0 +1,214 @@
+"""
+Comprueba que los listados con facetas (GET /entidades y GET /contactos, que
+salen de los bitmaps en memoria de app/core/facetas.py) dan lo mismo que
+filtrar a lo bruto las filas de la BD: mismos ids en el mismo orden, mismo
+total y mismos totales por faceta.
+
+Prueba cada valor de cada faceta, combinaciones de dos dimensiones, varios
+valores de la misma, ?q= y la paginación. Después da de alta, cambia y borra
+un contacto por la API (refrescos parciales de los dos índices) y vuelve a
+comparar. Sale con código 1 si algo difiere.
+
+    python -m bench.facetas --url sqlite:///bench.db
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+# página pequeña a propósito: así se pasa por offset varias veces
+LIMITE = 7
+
+
+def leer(indice) -> tuple[list[dict], dict[str, dict]]:
+    """Todas las filas del índice directamente de la BD, con sus valores múltiples."""
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return indice._leer(db, None)
+    finally:
+        db.close()
+
+
+def esperado(indice, filas: list[dict], extras: dict[str, dict], filtros: dict[str, list], q: str | None) -> dict:
+    """Lo que tendría que devolver el listado, recorriendo todas las filas."""
+    from app.core.buscador_alumnos import normalizar
+
+    texto = " ".join(normalizar(q).split()) if q else ""
+
+    def valores(fila: dict, dim: str) -> set:
+        if dim in indice.multiples:
+            vs = [v for v, _ in extras[dim].get(fila[indice.clave], ())]
+        else:
+            vs = [fila[dim]]
+        return {indice._clave_valor(dim, v) for v in vs if v is not None and v != ""}
+
+    def cumple(fila: dict, sin: str | None = None) -> bool:
+        if texto and texto not in " ".join(normalizar(fila.get(c)) for c in indice.campos_texto):
+            return False
+        for dim, pedidos in filtros.items():
+            if dim != sin and not valores(fila, dim) & {indice._clave_valor(dim, v) for v in pedidos}:
+                return False
+        return True
+
+    def orden(fila: dict) -> tuple:
+        return tuple(normalizar(fila.get(c)) for c in indice.campos_orden) + (fila[indice.clave],)
+
+    facetas = {}
+    for dim in indice.dimensiones:
+        cuentas: dict = {}
+        for fila in filas:
+            if cumple(fila, sin=dim):
+                for v in valores(fila, dim):
+                    cuentas[v] = cuentas.get(v, 0) + 1
+        facetas[dim] = cuentas
+
+    ids = [f[indice.clave] for f in sorted((f for f in filas if cumple(f)), key=orden)]
+    return {"ids": ids, "total": len(ids), "facetas": facetas}
+
+
+def casos(indice, filas: list[dict], extras: dict[str, dict]) -> list[tuple[dict, str | None]]:
+    """(filtros, q) a probar, sacados de los valores que hay en los datos."""
+    por_dim: dict[str, list] = {}
+    for dim in indice.dimensiones:
+        if dim in indice.multiples:
+            vs = {v for pares in extras[dim].values() for v, _ in pares}
+        else:
+            vs = {f[dim] for f in filas if f[dim] is not None and f[dim] != ""}
+        por_dim[dim] = sorted(vs, key=str)
+
+    lista: list[tuple[dict, str | None]] = [({}, None)]
+    for dim, vs in por_dim.items():
+        lista += [({dim: [v]}, None) for v in vs]
+        if len(vs) >= 2:
+            lista.append(({dim: vs[:2]}, None))
+    dims = [d for d, vs in por_dim.items() if vs]
+    for a, b in zip(dims, dims[1:]):
+        lista.append(({a: por_dim[a][:1], b: por_dim[b][-1:]}, None))
+    # la misma localidad escrita en mayúsculas: es la misma faceta
+    if por_dim.get("localidad"):
+        lista.append(({"localidad": [por_dim["localidad"][0].upper()]}, None))
+    for fila in filas[:: max(1, len(filas) // 3)]:
+        palabra = str(fila.get(indice.campos_orden[0]) or "")
+        if palabra:
+            lista.append(({}, palabra[:4].lower()))
+            lista.append(({dims[0]: por_dim[dims[0]][:1]}, palabra[:3]))
+    return lista
+
+
+async def listado(http, ruta: str, clave: str, filtros: dict, q: str | None) -> dict:
+    """Todas las páginas de un listado: ids en orden, total y facetas {dim: {valor: total}}."""
+    from bench.datos import TOKEN_BENCH
+
+    params = [(d, v) for d, vs in filtros.items() for v in vs]
+    if q:
+        params.append(("q", q))
+    ids, offset, primera = [], 0, None
+    while True:
+        r = await http.get(ruta, params=params + [("limit", LIMITE), ("offset", offset)],
+                           headers={"Authorization": f"Bearer {TOKEN_BENCH}"})
+        r.raise_for_status()
+        cuerpo = r.json()
+        primera = primera or cuerpo
+        ids += [f[clave] for f in cuerpo["data"]]
+        offset += LIMITE
+        if offset >= cuerpo["total"]:
+            break
+    return {
+        "ids": ids,
+        "total": primera["total"],
+        "facetas": {d: {c["valor"]: c["total"] for c in cs} for d, cs in primera["facetas"].items()},
+    }
+
+
+async def comparar(http, momento: str) -> int:
+    """Compara los dos listados con la BD. Devuelve cuántos casos difieren."""
+    from app.core.facetas import facetas_entidades, facetas_contactos
+
+    malos = 0
+    for ruta, indice in (("/entidades", facetas_entidades), ("/contactos", facetas_contactos)):
+        filas, extras = await asyncio.to_thread(leer, indice)
+        lista = casos(indice, filas, extras)
+        antes = malos
+        for filtros, q in lista:
+            api = await listado(http, ruta, indice.clave, filtros, q)
+            bruto = esperado(indice, filas, extras, filtros, q)
+            if api != bruto:
+                malos += 1
+                print(f"DIF {momento} {ruta} filtros={filtros} q={q!r}", file=sys.stderr)
+                for k in ("total", "ids", "facetas"):
+                    if api[k] != bruto[k]:
+                        print(f"    {k}: api={api[k]!r}\n    {k}: bd ={bruto[k]!r}", file=sys.stderr)
+        print(f"{'OK ' if malos == antes else 'DIF'} {momento:<12} {ruta:<11} {len(lista):>4} casos, {len(filas)} filas")
+    return malos
+
+
+async def escribir(http, momento: str, metodo: str, url: str, **kwargs) -> dict:
+    from bench.datos import TOKEN_BENCH
+
+    r = await http.request(metodo, url, headers={"Authorization": f"Bearer {TOKEN_BENCH}"}, **kwargs)
+    cuerpo = r.json()
+    if r.status_code != 200 or not cuerpo.get("ok"):
+        raise RuntimeError(f"{momento}: {metodo} {url} -> {r.status_code} {cuerpo}")
+    return cuerpo
+
+
+async def pasada(app, ctx) -> int:
+    import httpx
+    from sqlalchemy import text
+
+    with ctx.engine.connect() as conn:
+        familias = list(conn.execute(text("SELECT id_familia FROM sgi_familias ORDER BY id_familia")).scalars())
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        malos = await comparar(http, "inicio")
+
+        # alta en una empresa con una familia: cambian las facetas de los dos índices
+        contacto = {
+            "nombre": "Bench", "apellidos": "Ñandú Facetas", "id_entidad": ctx.empresas[0],
+            "id_zona": ctx.zonas[-1], "id_familia": familias[0] if familias else None,
+            "localidad": "Vélez-Málaga",
+        }
+        cuerpo = await escribir(http, "alta", "POST", "/contactos", json=contacto)
+        id_contacto = cuerpo["data"]["id_contacto"]
+        try:
+            malos += await comparar(http, "tras alta")
+
+            # se cambia de entidad: se refrescan la de antes y la nueva
+            otra = ctx.empresas[-1] if len(ctx.empresas) > 1 else ctx.centros[0]
+            await escribir(http, "cambio", "PUT", f"/contactos/{id_contacto}",
+                           json=contacto | {"id_entidad": otra, "localidad": "Ronda"})
+            malos += await comparar(http, "tras cambio")
+        finally:
+            await escribir(http, "baja", "DELETE", f"/contactos/{id_contacto}")
+        malos += await comparar(http, "tras baja")
+    return malos
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Listados con facetas = filtrar la BD a lo bruto")
+    parser.add_argument("--url", default=os.getenv("DATABASE_URL") or "sqlite:///bench.db")
+    args = parser.parse_args()
+
+    from bench.runner import cargar_app
+
+    engine, app = cargar_app(args.url)
+    from bench.escenarios import cargar_contexto
+
+    ctx = cargar_contexto(engine)
+    if not ctx.empresas:
+        print("La BD está vacía: genera los datos con python -m bench.runner --generar", file=sys.stderr)
+        return 2
+
+    malos = asyncio.run(pasada(app, ctx))
+    if malos:
+        print(f"\n{malos} casos distintos", file=sys.stderr)
+        return 1
+    print("\nLos listados con facetas coinciden con la BD")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
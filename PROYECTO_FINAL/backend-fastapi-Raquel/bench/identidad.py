@@ -0,0 +1,94 @@
+"""
+Comprueba que RespuestaJSON (serialización rápida) da exactamente los mismos
+bytes que el camino de siempre: jsonable_encoder + JSONResponse de Starlette.
+
+Pide cada URL dos veces a la app en proceso, una con cada serializador, y
+compara. Sale con código 1 si alguna difiere.
+
+    python -m bench.identidad --url sqlite:///bench.db
+"""
+import argparse
+import asyncio
+import os
+import sys
+from contextlib import contextmanager
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from bench.runner import cargar_app
+
+
+def urls(ctx) -> list[str]:
+    id_alumno = ctx.alumnos[len(ctx.alumnos) // 2]
+    id_vacante = ctx.vacantes[len(ctx.vacantes) // 2]
+    return [
+        # /health/db no: lleva el estado del pool, que cambia entre una pasada y otra
+        "/health", "/private/whoami",
+        "/alumnos", "/alumnos?limit=50", "/alumnos?fields=nombre,fecha_nacimiento&limit=20",
+        f"/alumnos?id_ciclo={ctx.ciclos[0]}&curso=1", f"/alumnos/{id_alumno}",
+        "/vacantes", "/vacantes?incluir_alumnos=true", f"/vacantes?id_ciclo={ctx.ciclos[0]}",
+        f"/vacantes/{id_vacante}", f"/vacantes/{id_vacante}/alumnos", f"/vacantes/{id_vacante}/alumnos-disponibles",
+    ]
+
+
+@contextmanager
+def serializador_de_referencia():
+    from app.core.respuestas import RespuestaJSON
+
+    rapido = RespuestaJSON.render
+
+    def referencia(self, content):
+        return JSONResponse.render(self, jsonable_encoder(content))
+
+    RespuestaJSON.render = referencia
+    try:
+        yield
+    finally:
+        RespuestaJSON.render = rapido
+
+
+async def pedir_todas(app, lista: list[str]) -> dict[str, bytes]:
+    import httpx
+    from bench.datos import TOKEN_BENCH
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        salida = {}
+        for url in lista:
+            r = await http.get(url, headers={"Authorization": f"Bearer {TOKEN_BENCH}"})
+            salida[url] = r.content
+        return salida
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Salida idéntica del serializador JSON rápido")
+    parser.add_argument("--url", default=os.getenv("DATABASE_URL") or "sqlite:///bench.db")
+    args = parser.parse_args()
+
+    engine, app = cargar_app(args.url)
+    from bench.escenarios import cargar_contexto
+
+    ctx = cargar_contexto(engine)
+    if not ctx.alumnos:
+        print("La BD está vacía: genera los datos con python -m bench.runner --generar", file=sys.stderr)
+        return 2
+
+    lista = urls(ctx)
+    rapido = asyncio.run(pedir_todas(app, lista))
+    with serializador_de_referencia():
+        referencia = asyncio.run(pedir_todas(app, lista))
+
+    distintas = [u for u in lista if rapido[u] != referencia[u]]
+    for u in lista:
+        print(f"{'OK ' if u not in distintas else 'DIF'} {len(rapido[u]):>9} bytes  {u}")
+
+    if distintas:
+        print(f"\n{len(distintas)} respuestas distintas", file=sys.stderr)
+        return 1
+    print("\nTodas las respuestas son idénticas byte a byte")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+"""
+Lanza los escenarios de bench/escenarios.py contra la app en proceso
+(httpx + ASGITransport, sin servidor ni red) y saca por ruta p50/p95/p99,
+peticiones por segundo y sentencias SQL por petición (de Server-Timing).
+
+Con --baseline compara con una pasada guardada y sale con código 1 si alguna
+ruta empeora más de --umbral en p95 o lanza más sentencias SQL que antes.
+Ver bench/__init__.py para ejemplos.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+
+# p95 por debajo de esto (ms) se considera ruido y no cuenta como regresión
+MARGEN_MS = 2.0
+
+
+def cargar_app(url: str):
+    """Importa la app apuntando a `url`. Devuelve (engine, app)."""
+    if url.startswith("sqlite") and "timeout=" not in url:
+        # las escrituras concurrentes esperan al bloqueo en vez de fallar con "database is locked"
+        url += ("&" if "?" in url else "?") + "timeout=30"
+
+    # la app lee DATABASE_URL al importar app.db.session: hay que fijarla antes
+    os.environ["DATABASE_URL"] = url
+
+    from app.db.session import engine
+    from app.main import app
+    from app.db import sqlite_compat
+
+    sqlite_compat.instalar(engine)
+    return engine, app
+
+
+def percentil(valores: list[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    orden = sorted(valores)
+    k = (len(orden) - 1) * p
+    i = int(k)
+    j = min(i + 1, len(orden) - 1)
+    return orden[i] + (orden[j] - orden[i]) * (k - i)
+
+
+async def correr_escenario(app, ctx, fn, iteraciones: int, concurrencia: int) -> float:
+    import httpx
+    from bench.escenarios import Cliente
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+        cliente = Cliente(http, ctx)
+        semaforo = asyncio.Semaphore(concurrencia)
+
+        async def una(i: int):
+            async with semaforo:
+                await fn(cliente, i)
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(una(i) for i in range(iteraciones)))
+        return time.perf_counter() - t0
+
+
+def resumir(ctx, duraciones: dict[str, float], etiquetas_escenario: dict[str, str]) -> dict:
+    rutas = {}
+    for etiqueta, muestras in sorted(ctx.muestras.items()):
+        ms = [m.segundos * 1000 for m in muestras]
+        sql = [m.sentencias for m in muestras if m.sentencias >= 0]
+        duracion = duraciones[etiquetas_escenario[etiqueta]]
+        rutas[etiqueta] = {
+            "n": len(muestras),
+            "errores": sum(1 for m in muestras if m.status >= 400),
+            "p50_ms": round(percentil(ms, 0.50), 3),
+            "p95_ms": round(percentil(ms, 0.95), 3),
+            "p99_ms": round(percentil(ms, 0.99), 3),
+            "rps": round(len(muestras) / duracion, 1) if duracion else 0.0,
+            "sql_media": round(sum(sql) / len(sql), 2) if sql else None,
+        }
+    return rutas
+
+
+def imprimir(rutas: dict) -> None:
+    print(f"{'ruta':<58} {'n':>6} {'err':>4} {'p50':>8} {'p95':>8} {'p99':>8} {'rps':>8} {'sql':>6}")
+    for etiqueta, r in rutas.items():
+        sql = "-" if r["sql_media"] is None else f"{r['sql_media']:g}"
+        print(f"{etiqueta:<58} {r['n']:>6} {r['errores']:>4} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} "
+              f"{r['p99_ms']:>8.2f} {r['rps']:>8.1f} {sql:>6}")
+
+
+def comparar(rutas: dict, baseline: dict, umbral: float) -> list[str]:
+    regresiones = []
+    for etiqueta, base in baseline["rutas"].items():
+        actual = rutas.get(etiqueta)
+        if actual is None:
+            continue
+        limite = base["p95_ms"] * (1 + umbral)
+        if actual["p95_ms"] > limite and actual["p95_ms"] - base["p95_ms"] > MARGEN_MS:
+            regresiones.append(
+                f"{etiqueta}: p95 {actual['p95_ms']:.2f} ms > {base['p95_ms']:.2f} ms (+{umbral:.0%})"
+            )
+        if base["sql_media"] is not None and actual["sql_media"] is not None \
+                and actual["sql_media"] > base["sql_media"] + 0.01:
+            regresiones.append(
+                f"{etiqueta}: {actual['sql_media']:g} sentencias SQL por petición (antes {base['sql_media']:g})"
+            )
+        if actual["errores"] > base["errores"]:
+            regresiones.append(f"{etiqueta}: {actual['errores']} errores (antes {base['errores']})")
+    return regresiones
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de la API SGE en proceso")
+    parser.add_argument("--url", default=os.getenv("DATABASE_URL") or "sqlite:///bench.db",
+                        help="BD del benchmark (sqlite:///bench.db o mysql+pymysql://...)")
+    parser.add_argument("--generar", action="store_true", help="borrar y regenerar los datos sintéticos")
+    parser.add_argument("--alumnos", type=int, default=1000, help="escala de los datos: nº de alumnos")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--iteraciones", type=int, default=200, help="operaciones por escenario (peso 1)")
+    parser.add_argument("--concurrencia", type=int, default=8)
+    parser.add_argument("--escenarios", help="lista separada por comas (por defecto, todos)")
+    parser.add_argument("--json", help="guardar aquí los resultados completos")
+    parser.add_argument("--guardar-baseline", metavar="FICHERO", help="guardar esta pasada como referencia")
+    parser.add_argument("--baseline", metavar="FICHERO", help="comparar con una pasada guardada")
+    parser.add_argument("--umbral", type=float, default=0.25, help="empeoramiento de p95 permitido (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    engine, app = cargar_app(args.url)
+
+    from bench import datos
+    from bench.escenarios import ESCENARIOS, cargar_contexto
+
+    if args.generar:
+        t0 = time.perf_counter()
+        resumen = datos.generar(engine, alumnos=args.alumnos, semilla=args.semilla)
+        print(f"Datos generados en {time.perf_counter() - t0:.1f}s: {resumen}")
+
+    ctx = cargar_contexto(engine, semilla=args.semilla)
+    if not ctx.alumnos:
+        print("La BD está vacía: lanza con --generar", file=sys.stderr)
+        return 2
+
+    nombres = args.escenarios.split(",") if args.escenarios else list(ESCENARIOS)
+    desconocidos = [n for n in nombres if n not in ESCENARIOS]
+    if desconocidos:
+        print(f"Escenarios desconocidos: {', '.join(desconocidos)}", file=sys.stderr)
+        return 2
+
+    duraciones: dict[str, float] = {}
+    etiquetas_escenario: dict[str, str] = {}
+    for nombre in nombres:
+        fn, peso = ESCENARIOS[nombre]
+        iteraciones = max(1, int(args.iteraciones * peso))
+        antes = set(ctx.muestras)
+        # una vuelta de calentamiento (cachés, índices, pool) que no cuenta
+        asyncio.run(correr_escenario(app, ctx, fn, 1, 1))
+        for etiqueta in set(ctx.muestras) - antes:
+            del ctx.muestras[etiqueta]
+
+        duraciones[nombre] = asyncio.run(correr_escenario(app, ctx, fn, iteraciones, args.concurrencia))
+        for etiqueta in set(ctx.muestras) - antes:
+            etiquetas_escenario[etiqueta] = nombre
+
+    rutas = resumir(ctx, duraciones, etiquetas_escenario)
+    imprimir(rutas)
+    print("(las exportaciones salen con sql=0: se envían en streaming después de las cabeceras)")
+
+    resultado = {
+        "meta": {
+            "url": engine.url.render_as_string(hide_password=True),
+            "dialecto": engine.dialect.name,
+            "alumnos": len(ctx.alumnos),
+            "iteraciones": args.iteraciones,
+            "concurrencia": args.concurrencia,
+            "python": platform.python_version(),
+            "fecha": time.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+        "rutas": rutas,
+    }
+
+    for fichero in (args.json, args.guardar_baseline):
+        if fichero:
+            with open(fichero, "w", encoding="utf-8") as f:
+                json.dump(resultado, f, ensure_ascii=False, indent=2)
+            print(f"Resultados guardados en {fichero}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regresiones = comparar(rutas, baseline, args.umbral)
+        if regresiones:
+            print("\nREGRESIONES respecto a la baseline:")
+            for r in regresiones:
+                print(f"  - {r}")
+            return 1
+        print("\nSin regresiones respecto a la baseline")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,7 @@
+-- Índices para el listado paginado de alumnos (GET /alumnos)
+-- La paginación por cursor ordena por (apellidos, nombre, id_alumno) y
+-- filtra por ciclo/curso, así que ambos recorridos pueden ir por índice.
+
+ALTER TABLE `sgi_alumnos`
+  ADD KEY `listado_orden` (`apellidos`, `nombre`, `id_alumno`),
+  ADD KEY `ciclo_curso` (`id_ciclo`, `curso`);
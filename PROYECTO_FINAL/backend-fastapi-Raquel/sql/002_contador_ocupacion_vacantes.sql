@@ -0,0 +1,15 @@
+-- Contador de ocupación en sgi_vacantes
+-- asignar_alumno / desasignar_alumno / asignacion-automatica lo mantienen en la
+-- misma transacción que tocan sgi_vacantes_x_alumnos, así el listado de vacantes
+-- no tiene que hacer COUNT + GROUP BY en cada petición.
+-- Si alguna vez se descuadra: python -m app.scripts.reconciliar_ocupacion --reparar
+
+ALTER TABLE `sgi_vacantes`
+  ADD COLUMN `alumnos_asignados` int(11) NOT NULL DEFAULT '0' AFTER `num_vacantes`;
+
+UPDATE `sgi_vacantes` v
+SET v.`alumnos_asignados` = (
+  SELECT COUNT(*)
+  FROM `sgi_vacantes_x_alumnos` x
+  WHERE x.`id_vacante` = v.`id_vacante`
+);
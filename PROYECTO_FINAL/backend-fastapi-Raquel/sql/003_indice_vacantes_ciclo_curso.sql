@@ -0,0 +1,7 @@
+-- Índice para filtrar vacantes por ciclo y curso
+-- La asignación automática (y GET /vacantes?id_ciclo=&curso=) filtra por
+-- ciclo+curso; el UNIQUE (id_entidad, id_ciclo, curso) no sirve porque
+-- empieza por la entidad. Lo detectó python -m app.scripts.explicar_consultas.
+
+ALTER TABLE `sgi_vacantes`
+  ADD KEY `ciclo_curso` (`id_ciclo`, `curso`);
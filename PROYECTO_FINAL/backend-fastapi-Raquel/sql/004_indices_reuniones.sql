@@ -0,0 +1,14 @@
+-- Calendario de reuniones (GET /reuniones?desde=&hasta=) y detección de solapes.
+--
+-- fecha_horas: el listado filtra por rango de fecha y ordena por fecha y hora,
+-- y la comprobación de solapes busca las del mismo día que empiezan antes de
+-- que termine la nueva (fecha = ? AND hora_inicio < ?): sin esto, las dos
+-- recorren la tabla entera.
+--
+-- zona_fecha: el calendario de una zona (id_zona = ? AND fecha BETWEEN ...).
+--
+-- Los asistentes ya tienen UNIQUE (id_reunion, id_contacto) y KEY id_contacto.
+
+ALTER TABLE `sgi_reuniones`
+  ADD KEY `fecha_horas` (`fecha`, `hora_inicio`, `hora_fin`),
+  ADD KEY `zona_fecha` (`id_zona`, `fecha`, `hora_inicio`);
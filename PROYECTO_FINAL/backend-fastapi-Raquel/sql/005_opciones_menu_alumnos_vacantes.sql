@@ -0,0 +1,28 @@
+-- Opciones de menú de alumnos y vacantes (FP Dual).
+--
+-- Las rutas que escriben en /alumnos y /vacantes exigen el permiso
+-- post/put/delete del rol en la opción con accion 'alumnos' / 'vacantes'
+-- (app/core/permisos.py). Sin la opción solo Superadmin puede escribir.
+-- Se dan de alta en el grupo "FP Dual" para Superadmin; los roles que ya
+-- existían conservan la escritura con sql/007.
+
+INSERT INTO `sgi_opciones_menu` (`opcion`, `accion`, `texto_tooltip`)
+SELECT 'Alumnos', 'alumnos', 'Alumnos de FP Dual'
+FROM DUAL
+WHERE NOT EXISTS (SELECT 1 FROM `sgi_opciones_menu` WHERE `accion` = 'alumnos');
+
+INSERT INTO `sgi_opciones_menu` (`opcion`, `accion`, `texto_tooltip`)
+SELECT 'Vacantes', 'vacantes', 'Vacantes de FP Dual en empresas'
+FROM DUAL
+WHERE NOT EXISTS (SELECT 1 FROM `sgi_opciones_menu` WHERE `accion` = 'vacantes');
+
+INSERT INTO `sgi_rol_menu` (`id_opcion_menu`, `id_grupo_menu`, `id_rol`, `permiso_post`, `permiso_put`, `permiso_delete`)
+SELECT o.`id_opcion_menu`, g.`id_grupo_menu`, r.`id_rol`, 1, 1, 1
+FROM `sgi_opciones_menu` o
+JOIN `sgi_grupos_menu` g ON g.`grupo` = 'FP Dual'
+JOIN `sgi_roles` r ON r.`rol` = 'Superadmin'
+WHERE o.`accion` IN ('alumnos', 'vacantes')
+  AND NOT EXISTS (
+    SELECT 1 FROM `sgi_rol_menu` rm
+    WHERE rm.`id_opcion_menu` = o.`id_opcion_menu` AND rm.`id_rol` = r.`id_rol`
+  );
@@ -0,0 +1,11 @@
+-- Un alumno, una vacante
+-- asignar_alumno comprueba con una lectura normal si el alumno ya tiene vacante
+-- (un FOR UPDATE ahí cogería bloqueos de hueco y dos altas a la vez se
+-- interbloquearían). La garantía la da esta UNIQUE: el INSERT duplicado falla
+-- (400 en asignar_alumno, 409 en asignacion-automatica), venga de donde venga.
+-- Antes de aplicarla, comprobar que no hay duplicados:
+--   SELECT id_alumno, COUNT(*) FROM sgi_vacantes_x_alumnos GROUP BY id_alumno HAVING COUNT(*) > 1;
+-- y, si los hay, quitar los sobrantes y: python -m app.scripts.reconciliar_ocupacion --reparar
+
+ALTER TABLE `sgi_vacantes_x_alumnos`
+  ADD UNIQUE KEY `id_alumno` (`id_alumno`);
@@ -0,0 +1,20 @@
+-- Permisos de escritura en alumnos y vacantes para los roles que ya había.
+--
+-- Hasta sql/005 cualquier usuario con sesión podía dar de alta, cambiar y
+-- borrar alumnos y vacantes. Con 005 solo Superadmin tiene las opciones, así
+-- que 'Usuario' y 'Dinamizadoress' se quedarían sin poder escribir. Esto les
+-- da post/put/delete en las dos opciones (grupo "FP Dual") para que todo siga
+-- como estaba; recortarlos después es cosa del mantenimiento de roles/menú.
+-- Aplicar junto con 005 y, con la API arrancada, POST /menu/recargar (o
+-- esperar PERMISOS_TTL).
+
+INSERT INTO `sgi_rol_menu` (`id_opcion_menu`, `id_grupo_menu`, `id_rol`, `permiso_post`, `permiso_put`, `permiso_delete`)
+SELECT o.`id_opcion_menu`, g.`id_grupo_menu`, r.`id_rol`, 1, 1, 1
+FROM `sgi_opciones_menu` o
+JOIN `sgi_grupos_menu` g ON g.`grupo` = 'FP Dual'
+JOIN `sgi_roles` r ON r.`rol` IN ('Usuario', 'Dinamizadoress')
+WHERE o.`accion` IN ('alumnos', 'vacantes')
+  AND NOT EXISTS (
+    SELECT 1 FROM `sgi_rol_menu` rm
+    WHERE rm.`id_opcion_menu` = o.`id_opcion_menu` AND rm.`id_rol` = r.`id_rol`
+  );